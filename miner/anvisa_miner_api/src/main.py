@@ -7,7 +7,7 @@ from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
 from src.routes.user import user_bp
-from src.routes.mining import mining_bp
+from src.routes.mining import mining_bp, start_job_manager
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -18,6 +18,16 @@ CORS(app)
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(mining_bp, url_prefix='/api/mining')
 
+# Os jobs de mineração são executados (e os interrompidos, retomados) somente em um processo:
+# o servidor de desenvolvimento (`python src/main.py`) ou, em um servidor WSGI, com
+# MINER_START_JOBS=true. Com o reloader do modo debug, somente o processo filho
+# (WERKZEUG_RUN_MAIN) executa os jobs.
+if __name__ == '__main__':
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_job_manager()
+elif os.getenv('MINER_START_JOBS', 'false').lower() == 'true':
+    start_job_manager()
+
 # uncomment if you need to use database
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -1,7 +1,7 @@
 from flask import Blueprint, jsonify, request
 from flask_cors import cross_origin
 import threading
-import time
+import tempfile
 import sys
 import os
 
@@ -9,169 +9,230 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
 
 from database import MongoDBConnection
-from scraper import AnvisaScraper
+from job_queue import ACTIVE_STATUSES, MiningJobManager, MiningJobStore
+from pymongo.errors import PyMongoError
 from datetime import datetime
 import logging
 
 mining_bp = Blueprint('mining', __name__)
 
-# Estado global da mineração
-mining_state = {
-    'is_running': False,
-    'processed_count': 0,
-    'target_count': 50,
-    'current_medicine': None,
-    'logs': [],
-    'thread': None
-}
-
-class MiningLogger:
-    def __init__(self):
-        self.logs = []
-    
-    def log(self, level, message):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] {level}: {message}"
-        self.logs.append(log_entry)
-        mining_state['logs'] = self.logs[-100:]  # Manter apenas os últimos 100 logs
-        print(log_entry)
+# Jobs de mineração: persistidos no MongoDB (coleção mining_jobs) e executados por um
+# MiningJobManager compartilhado, que também retoma os jobs interrompidos por um reinício do
+# servidor. Os jobs são executados somente no processo que chama start_job_manager (ver main.py):
+# se dois processos retomassem os mesmos jobs, cada um liberaria as reservas do outro e o mesmo
+# job seria executado duas vezes. O lock em MINER_JOBS_LOCK_FILE impede isso entre os processos
+# de uma mesma máquina (ex.: workers do gunicorn).
+DEFAULT_WORKERS = int(os.getenv('MINER_WORKERS', 2))
+JOBS_LOCK_FILE = os.getenv('MINER_JOBS_LOCK_FILE', os.path.join(tempfile.gettempdir(), 'anvisa_miner_jobs.lock'))
+job_manager = None
+job_manager_enabled = False
+job_manager_thread = None
+job_manager_lock = threading.Lock()
+jobs_lock_file = None
+
+class JobManagerUnavailable(Exception):
+    pass
 
-mining_logger = MiningLogger()
+def start_job_manager():
+    """
+    Habilita a execução dos jobs neste processo e cria o MiningJobManager em segundo plano, de
+    forma que a inicialização do app não aguarda o MongoDB. Se o MongoDB estiver indisponível,
+    uma nova tentativa é feita na próxima requisição às rotas de mineração.
+    """
+    global job_manager_enabled, job_manager_thread
+    with job_manager_lock:
+        job_manager_enabled = True
+        if job_manager is None and (job_manager_thread is None or not job_manager_thread.is_alive()):
+            job_manager_thread = threading.Thread(target=load_job_manager, name='mining-job-manager', daemon=True)
+            job_manager_thread.start()
+        return job_manager_thread
 
-def mining_worker():
-    """Função que executa a mineração em thread separada"""
+def acquire_jobs_lock():
+    """Lock exclusivo do processo que executa os jobs (sem fcntl, ex.: Windows, não há verificação)"""
+    global jobs_lock_file
+    if jobs_lock_file is not None:
+        return True
     try:
-        db_connection = MongoDBConnection()
-        scraper = AnvisaScraper()
-        
-        mining_logger.log("INFO", "Iniciando processo de mineração")
-        mining_state['processed_count'] = db_connection.count_founded_medicines()
-        
-        while mining_state['is_running'] and mining_state['processed_count'] < mining_state['target_count']:
-            medicines_to_process = db_connection.get_active_medicines_to_process()
-            found_one_to_process = False
-            
-            for medicine in medicines_to_process:
-                if not mining_state['is_running']:
-                    break
-                    
-                found_one_to_process = True
-                product_name = medicine.get("product_name")
-                medicine_id = medicine.get("_id")
-                
-                mining_state['current_medicine'] = product_name
-                
-                if not product_name:
-                    mining_logger.log("WARNING", f"Medicamento com ID {medicine_id} não possui product_name. Pulando.")
-                    db_connection.update_medicine_data(medicine_id, {"founded": False, "processing_date": datetime.now()})
-                    continue
-                
-                mining_logger.log("INFO", f"Processando medicamento: {product_name}")
-                
-                founded = False
-                patient_leaflet_path = None
-                professional_leaflet_path = None
-                
-                try:
-                    if scraper.search_medicine(product_name):
-                        leaflet_links = scraper.get_leaflet_links()
-                        
-                        if leaflet_links["professional_leaflet"]:
-                            professional_leaflet_path = scraper.download_pdf(leaflet_links["professional_leaflet"], f"{product_name}_profissional.pdf")
-                            mining_logger.log("INFO", f"Bula profissional baixada para {product_name}")
-                            founded = True
-                        
-                        if leaflet_links["patient_leaflet"]:
-                            patient_leaflet_path = scraper.download_pdf(leaflet_links["patient_leaflet"], f"{product_name}_paciente.pdf")
-                            mining_logger.log("INFO", f"Bula paciente baixada para {product_name}")
-                            if not founded:
-                                founded = True
-                    
-                    update_data = {
-                        "founded": founded,
-                        "processing_date": datetime.now()
-                    }
-                    if patient_leaflet_path: 
-                        update_data["patient_leaflet"] = patient_leaflet_path
-                    if professional_leaflet_path: 
-                        update_data["professional_leaflet"] = professional_leaflet_path
-                    
-                    db_connection.update_medicine_data(medicine_id, update_data)
-                    
-                    if founded:
-                        mining_state['processed_count'] += 1
-                        mining_logger.log("INFO", f"Bula(s) encontrada(s) para {product_name}. Total processado: {mining_state['processed_count']}")
-                    else:
-                        mining_logger.log("INFO", f"Nenhuma bula encontrada para {product_name}")
-                
-                except Exception as e:
-                    mining_logger.log("ERROR", f"Erro ao processar {product_name}: {str(e)}")
-                    db_connection.update_medicine_data(medicine_id, {"founded": False, "processing_date": datetime.now()})
-                
-                if mining_state['processed_count'] >= mining_state['target_count']:
-                    break
-                
-                time.sleep(2)  # Intervalo entre requisições
-            
-            if not found_one_to_process:
-                mining_logger.log("INFO", "Nenhum medicamento ativo encontrado para processar")
-                break
-        
-        mining_state['is_running'] = False
-        mining_state['current_medicine'] = None
-        mining_logger.log("INFO", "Processo de mineração finalizado")
-        
-    except Exception as e:
-        mining_logger.log("ERROR", f"Erro crítico na mineração: {str(e)}")
-        mining_state['is_running'] = False
-        mining_state['current_medicine'] = None
+        import fcntl
+    except ImportError:
+        return True
+    lock_file = open(JOBS_LOCK_FILE, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    jobs_lock_file = lock_file
+    return True
+
+def load_job_manager():
+    """Cria o MiningJobManager e retoma os jobs interrompidos (uma thread por vez, ver start_job_manager)"""
+    global job_manager
+    if not acquire_jobs_lock():
+        logging.warning(f'Os jobs de mineração já são executados por outro processo ({JOBS_LOCK_FILE}).')
+        return
+    try:
+        store = MiningJobStore()
+    except PyMongoError as e:
+        logging.error(f'MongoDB indisponível, os jobs de mineração não foram iniciados: {e}')
+        return
+    manager = MiningJobManager(store=store)
+    try:
+        # Os jobs são retomados antes de o manager receber novos jobs das rotas.
+        manager.resume()
+    except PyMongoError as e:
+        logging.error(f'Não foi possível retomar os jobs interrompidos: {e}')
+    job_manager = manager
+
+def get_job_manager():
+    if job_manager is None:
+        if not job_manager_enabled:
+            raise JobManagerUnavailable('A execução de jobs não está habilitada neste processo (MINER_START_JOBS)')
+        start_job_manager().join(timeout=5)
+    if job_manager is None:
+        raise JobManagerUnavailable('Jobs de mineração indisponíveis: MongoDB inacessível ou jobs executados por outro processo')
+    return job_manager
+
+@mining_bp.errorhandler(JobManagerUnavailable)
+def job_manager_unavailable(e):
+    return jsonify({'error': str(e)}), 503
+
+def serialize_job(job):
+    """Converte o job para JSON (datas em ISO 8601)"""
+    job = dict(job)
+    job['id'] = job.pop('_id')
+    for key in ['created_at', 'updated_at', 'started_at', 'finished_at']:
+        if isinstance(job.get(key), datetime):
+            job[key] = job[key].isoformat()
+    return job
+
+def get_job_params(data):
+    target_count = data.get('target_count')
+    return {
+        'workers': int(data.get('workers', DEFAULT_WORKERS)),
+        'target_count': int(target_count) if target_count is not None else None,
+        'claim_size': int(data.get('claim_size', 5)),
+        'backend': data.get('backend'),
+    }
+
+@mining_bp.route('/jobs', methods=['POST'])
+@cross_origin()
+def create_job():
+    """Cria um job de mineração (target_count ausente ou nulo: todos os medicamentos ativos)"""
+    try:
+        params = get_job_params(request.get_json() or {})
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Parâmetros inválidos: {str(e)}'}), 400
+
+    mining_job = get_job_manager().submit(**params)
+    return jsonify(serialize_job(get_job_manager().get(mining_job.id))), 201
+
+@mining_bp.route('/jobs', methods=['GET'])
+@cross_origin()
+def list_jobs():
+    """Lista os jobs de mineração, do mais recente para o mais antigo"""
+    jobs = get_job_manager().list(status=request.args.get('status'), limit=request.args.get('limit', 50, type=int))
+    return jsonify({'jobs': [serialize_job(job) for job in jobs]})
+
+@mining_bp.route('/jobs/<job_id>', methods=['GET'])
+@cross_origin()
+def get_job(job_id):
+    """Retorna o status e o progresso de um job"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    job['logs'] = job['logs'][-20:]  # Últimos 20 logs
+    return jsonify(serialize_job(job))
+
+@mining_bp.route('/jobs/<job_id>/logs', methods=['GET'])
+@cross_origin()
+def get_job_logs(job_id):
+    """Retorna os logs de um job"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify({'logs': job['logs']})
+
+@mining_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+@cross_origin()
+def cancel_job(job_id):
+    """Cancela um job na fila ou em execução"""
+    manager = get_job_manager()
+    if manager.store.get(job_id) is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    if not manager.cancel(job_id):
+        return jsonify({'error': 'Job não está na fila nem em execução'}), 400
+    return jsonify(serialize_job(manager.get(job_id)))
+
+# Rotas da interface web, que controla um job por vez.
+
+def get_current_job():
+    """Retorna o job ativo mais antigo ou, se não houver, o mais recente"""
+    manager = get_job_manager()
+    active = manager.store.get_active()
+    if active:
+        return manager.get(active[0]['_id'])
+    jobs = manager.list(limit=1)
+    return manager.get(jobs[0]['_id']) if jobs else None
 
 @mining_bp.route('/status', methods=['GET'])
 @cross_origin()
 def get_status():
     """Retorna o status atual da mineração"""
+    manager = get_job_manager()
+    job = get_current_job()
+    if job is None:
+        return jsonify({
+            'is_running': False, 'job_id': None, 'processed_count': 0, 'target_count': None,
+            'current_medicine': None, 'workers': [], 'downloads': manager.downloader.stats.to_dict(), 'logs': []
+        })
+    current = [worker['current_medicine'] for worker in job['workers'] if worker.get('current_medicine')]
     return jsonify({
-        'is_running': mining_state['is_running'],
-        'processed_count': mining_state['processed_count'],
-        'target_count': mining_state['target_count'],
-        'current_medicine': mining_state['current_medicine'],
-        'logs': mining_state['logs'][-20:]  # Últimos 20 logs
+        'is_running': job['status'] in ACTIVE_STATUSES,
+        'job_id': job['_id'],
+        'status': job['status'],
+        'processed_count': job['found'],
+        'target_count': job['params']['target_count'],
+        'current_medicine': ', '.join(current) or None,
+        'workers': job['workers'],
+        'downloads': manager.downloader.stats.to_dict(),
+        'logs': job['logs'][-20:]  # Últimos 20 logs
     })
 
 @mining_bp.route('/start', methods=['POST'])
 @cross_origin()
 def start_mining():
     """Inicia o processo de mineração"""
-    if mining_state['is_running']:
+    manager = get_job_manager()
+    if manager.store.get_active():
         return jsonify({'error': 'Mineração já está em execução'}), 400
-    
+
     data = request.get_json() or {}
-    mining_state['target_count'] = data.get('target_count', 50)
-    
-    mining_state['is_running'] = True
-    mining_state['logs'] = []
-    mining_state['thread'] = threading.Thread(target=mining_worker)
-    mining_state['thread'].start()
-    
-    return jsonify({'message': 'Mineração iniciada com sucesso'})
+    try:
+        params = get_job_params({'target_count': 50, **data})
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Parâmetros inválidos: {str(e)}'}), 400
+    mining_job = manager.submit(**params)
+
+    return jsonify({'message': 'Mineração iniciada com sucesso', 'job_id': mining_job.id})
 
 @mining_bp.route('/stop', methods=['POST'])
 @cross_origin()
 def stop_mining():
-    """Para o processo de mineração"""
-    if not mining_state['is_running']:
+    """Para o processo de mineração (cancela todos os jobs ativos)"""
+    manager = get_job_manager()
+    cancelled = [job['_id'] for job in manager.store.get_active() if manager.cancel(job['_id'])]
+    if not cancelled:
         return jsonify({'error': 'Mineração não está em execução'}), 400
-    
-    mining_state['is_running'] = False
-    mining_logger.log("INFO", "Parando mineração por solicitação do usuário")
-    
-    return jsonify({'message': 'Mineração parada com sucesso'})
+
+    return jsonify({'message': 'Mineração parada com sucesso', 'job_ids': cancelled})
 
 @mining_bp.route('/logs', methods=['GET'])
 @cross_origin()
 def get_logs():
     """Retorna todos os logs da mineração"""
-    return jsonify({'logs': mining_state['logs']})
+    job = get_current_job()
+    return jsonify({'logs': job['logs'] if job is not None else []})
 
 @mining_bp.route('/results', methods=['GET'])
 @cross_origin()
@@ -0,0 +1,159 @@
+import argparse
+from datetime import datetime
+import logging
+import time
+
+from database import MongoDBConnection
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def build_records(n_records):
+    """Gera medicamentos sintéticos com os campos da coleção drugs (1 a cada 4 com registro ativo)."""
+    return [
+        {
+            "product_type": "MEDICAMENTO",
+            "product_name": f"MEDICAMENTO {i}",
+            "regulatory_category": "SIMILAR",
+            "product_registration_number": f"{100000000 + i}",
+            "process_number": f"{25351000000000000 + i}",
+            "therapeutic_class": "DESCONGESTIONANTES NASAIS TOPICOS",
+            "company_holding_registration": "05161069000110 - EMPRESA FARMACÊUTICA S.A",
+            "registration_status": "Ativo" if i % 4 == 0 else "VÁLIDO",
+            "active_ingredient": "CLORETO DE SÓDIO",
+            "process_completion_date": datetime(2012, 1, 2),
+        }
+        for i in range(n_records)
+    ]
+
+
+class CountingCollection:
+    """
+    Conta as operações (idas ao servidor) de cada método da coleção e, opcionalmente, simula a
+    latência de rede, que o mongomock não tem.
+    """
+
+    def __init__(self, collection, latency_ms=0.0):
+        self.collection = collection
+        self.latency = latency_ms / 1000
+        self.calls = {}
+        self.mongomock = type(collection).__module__.startswith("mongomock")
+
+    def bulk_write(self, requests, ordered=True):
+        self.calls["bulk_write"] = self.calls.get("bulk_write", 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        if not self.mongomock:
+            return self.collection.bulk_write(requests, ordered=ordered)
+        # O mongomock não aceita o UpdateOne das versões recentes do pymongo no bulk_write (argumento
+        # `sort`): as atualizações são aplicadas uma a uma, contadas como uma única operação.
+        for request in requests:
+            self.collection.update_one(request._filter, request._doc)
+
+    def __getattr__(self, name):
+        attr = getattr(self.collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if self.latency:
+                time.sleep(self.latency)
+            return attr(*args, **kwargs)
+
+        return call
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+
+def get_client(uri):
+    if uri:
+        from pymongo import MongoClient
+
+        return MongoClient(uri)
+    import mongomock
+
+    return mongomock.MongoClient()
+
+
+def measure(name, func):
+    start_time = time.perf_counter()
+    result = func()
+    logging.info(f"{name}: {time.perf_counter() - start_time:.3f}s")
+    return result
+
+
+def run_baseline(db, n_process):
+    # Fluxo anterior: consulta completa sem índices e um update_one por medicamento.
+    medicines = db.collection.find({
+        'registration_status': 'Ativo',
+        '$or': [{'founded': False}, {'founded': {'$exists': False}}]
+    })
+    processed = 0
+    for medicine in medicines:
+        db.collection.update_one(
+            {'_id': medicine['_id']}, {'$set': {'founded': False, 'processing_date': datetime.now()}}
+        )
+        processed += 1
+        if processed >= n_process:
+            break
+    return processed
+
+
+def run_batched(db, n_process, claim_size):
+    # Fluxo atual: reservas em lote com projeção e atualizações agrupadas em bulk_write.
+    started_at = datetime.now()
+    processed = 0
+    while processed < n_process:
+        claimed = db.claim_medicines("benchmark", started_at, min(claim_size, n_process - processed))
+        if not claimed:
+            break
+        for medicine in claimed:
+            db.queue_update(medicine['_id'], {'founded': False, 'processing_date': datetime.now()})
+        processed += len(claimed)
+    db.flush()
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara o acesso ao MongoDB da mineração antes e depois dos índices e lotes.")
+    parser.add_argument("--records", type=int, default=100_000, help="Quantidade de medicamentos.")
+    parser.add_argument("--process", type=int, default=2_000, help="Quantidade de medicamentos processados.")
+    parser.add_argument("--claim-size", type=int, default=50, help="Medicamentos reservados por operação.")
+    parser.add_argument("--flush-size", type=int, default=100, help="Atualizações por bulk_write.")
+    parser.add_argument("--uri", default=None, help="URI de um mongod local (padrão: mongomock).")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Latência simulada por operação (útil com o mongomock, que não tem rede nem índices).")
+    args = parser.parse_args()
+
+    client = get_client(args.uri)
+    records = build_records(args.records)
+    results = {}
+    for name, create_indexes in [("baseline", False), ("batched", True)]:
+        collection_name = f"benchmark_drugs_{name}"
+        client["benchmark"][collection_name].drop()
+        client["benchmark"][collection_name].insert_many([dict(i) for i in records])
+        db = MongoDBConnection(
+            db_name="benchmark",
+            collection_name=collection_name,
+            client=client,
+            create_indexes=create_indexes,
+            flush_size=args.flush_size,
+        )
+        db.collection = CountingCollection(db.collection, args.latency_ms)
+        if name == "baseline":
+            results[name] = measure(name, lambda: run_baseline(db, args.process))
+        else:
+            results[name] = measure(name, lambda: run_batched(db, args.process, args.claim_size))
+        logging.info(f"{name}: {db.collection.total_calls} operations {db.collection.calls}")
+        if name == "batched":
+            measure("full scan with projection", lambda: sum(1 for _ in db.get_active_medicines_to_process()))
+        client["benchmark"][collection_name].drop()
+
+    logging.info(f"Processed medicines: {results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from downloader import LeafletDownloader
+from rate_limiter import RequestCancelled
+
+API_URL = "https://consultas.anvisa.gov.br/api/consulta"
+
+
+class AnvisaBularioClient:
+    """
+    Cliente HTTP do bulário da ANVISA, sem navegador. Consulta diretamente a API JSON utilizada
+    pela página `#/bulario` e tem a mesma interface do AnvisaScraper (search_medicine,
+    get_leaflet_links, download_pdf e close).
+    As conexões são reutilizadas (requests.Session com keep-alive e gzip) e falhas temporárias
+    são repetidas com espera exponencial. As bulas são baixadas pelo `downloader`, que pode ser
+    compartilhado entre os workers. Quando `stop_event` é sinalizado, as consultas seguintes
+    levantam RequestCancelled, sem aguardar a vez no limitador.
+    """
+
+    def __init__(self, base_url=None, rate_limiter=None, downloader=None, timeout=10, pool_size=10, max_retries=3,
+                 stop_event=None):
+        self.base_url = (base_url or os.getenv("ANVISA_API_URL", API_URL)).rstrip("/")
+        self.rate_limiter = rate_limiter
+        self.downloader = downloader or LeafletDownloader(rate_limiter=rate_limiter, headers={"Authorization": "Guest"})
+        self.timeout = timeout
+        self.stop_event = stop_event
+        self.results = []
+
+        retry = Retry(total=max_retries, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=["GET"], respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            # A API aceita consultas anônimas com o valor "Guest", como faz a página do bulário.
+            "Authorization": "Guest",
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "User-Agent": "Mozilla/5.0 (compatible; tcc-ufg-akcit-nlp miner)",
+        })
+
+    def close(self):
+        self.session.close()
+
+    def wait_turn(self):
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise RequestCancelled()
+        if self.rate_limiter is not None and not self.rate_limiter.acquire(self.stop_event):
+            raise RequestCancelled()
+
+    def search_medicine(self, product_name):
+        """Consulta o medicamento pelo nome. Retorna True se houver resultados."""
+        self.wait_turn()
+        response = self.session.get(
+            f"{self.base_url}/bulario",
+            params={"count": 10, "page": 1, "filter[nomeProduto]": product_name},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        self.results = response.json().get("content") or []
+        return bool(self.results)
+
+    def get_leaflet_links(self):
+        """Retorna os links das bulas do primeiro resultado da última consulta que possui bula."""
+        result = next(
+            (i for i in self.results if i.get("idBulaProfissionalProtegido") or i.get("idBulaPacienteProtegido")),
+            None,
+        )
+        if result is None:
+            return {"patient_leaflet": None, "professional_leaflet": None}
+        return {
+            "patient_leaflet": self.get_leaflet_url(result.get("idBulaPacienteProtegido")),
+            "professional_leaflet": self.get_leaflet_url(result.get("idBulaProfissionalProtegido")),
+        }
+
+    def get_leaflet_url(self, leaflet_id):
+        if not leaflet_id:
+            return None
+        return f"{self.base_url}/medicamentos/arquivo/bula/parecer/{leaflet_id}/?Authorization=Guest"
+
+    def download_pdf(self, url, filename):
+        return self.downloader.download(url, filename, stop_event=self.stop_event)
+
+
+def create_scraper(rate_limiter=None, downloader=None, backend=None, stop_event=None):
+    """
+    Cria a sessão de consulta ao bulário de acordo com MINER_SCRAPER_BACKEND: "http" (padrão,
+    AnvisaBularioClient) ou "selenium" (AnvisaScraper, navegador headless).
+    """
+    backend = backend or os.getenv("MINER_SCRAPER_BACKEND", "http")
+    if backend == "selenium":
+        # Importado somente quando selecionado: o Selenium e o Chrome não são necessários no modo HTTP.
+        from scraper import AnvisaScraper
+
+        return AnvisaScraper(rate_limiter=rate_limiter, downloader=downloader, stop_event=stop_event)
+    if backend != "http":
+        raise ValueError(f"Backend de mineração inválido: {backend}")
+    return AnvisaBularioClient(rate_limiter=rate_limiter, downloader=downloader, stop_event=stop_event)
@@ -1,25 +1,146 @@
-from pymongo import MongoClient
+from datetime import datetime, timedelta
+import re
+import threading
+import uuid
+
+from pymongo import ASCENDING, MongoClient, UpdateOne
+
+# Campos lidos pelos workers: os demais campos dos medicamentos não são transferidos.
+WORK_PROJECTION = {'product_name': 1}
 
 class MongoDBConnection:
-    def __init__(self, db_name='tcc_ufg_akcit_nlp', collection_name='drugs', host='localhost', port=27017):
-        self.client = MongoClient(host, port)
+    """
+    Acesso ao MongoDB da mineração.
+    - Os índices da fila de trabalho são criados na inicialização (`create_indexes`).
+    - Os medicamentos a processar são lidos com projeção e em lotes de `batch_size`.
+    - As atualizações de `queue_update` são acumuladas e gravadas com `bulk_write` a cada
+      `flush_size` atualizações (ou em `flush`/`close`).
+    - Workers concorrentes reservam medicamentos com `claim_medicines`; a reserva expira após
+      `lease_seconds` e é renovada pelo worker (`renew_lease`) ou liberada (`release_medicines`).
+    - O job que processou o medicamento fica gravado em `processed_by`, de forma que jobs
+      simultâneos não processam novamente os medicamentos uns dos outros (`skip_jobs`).
+    """
+
+    def __init__(self, db_name='tcc_ufg_akcit_nlp', collection_name='drugs', host='localhost', port=27017,
+                 client=None, create_indexes=True, batch_size=500, flush_size=100, lease_seconds=300):
+        self.client = client or MongoClient(host, port)
         self.db = self.client[db_name]
         self.collection = self.db[collection_name]
+        self.batch_size = batch_size
+        self.flush_size = flush_size
+        self.lease_seconds = lease_seconds
+        self.pending_updates = []
+        self.lock = threading.Lock()
+        if create_indexes:
+            self.create_indexes()
+
+    def create_indexes(self):
+        # create_index não recria índices existentes.
+        self.collection.create_index(
+            [('registration_status', ASCENDING), ('founded', ASCENDING), ('processing_date', ASCENDING)],
+            name='work_queue'
+        )
+        self.collection.create_index([('founded', ASCENDING)], name='founded')
+        self.collection.create_index([('claimed_by', ASCENDING)], name='claimed_by', sparse=True)
 
-    def get_active_medicines_to_process(self):
-        # Seleciona medicamentos com registration_status = "Ativo" e founded = false ou founded inexistente.
-        return self.collection.find({
+    def get_active_medicines_to_process(self, projection=WORK_PROJECTION, batch_size=None):
+        # Seleciona medicamentos com registration_status = "Ativo" e founded = false ou founded inexistente
+        # ($in com None equivale a {'$exists': False} e utiliza o índice work_queue).
+        return self.collection.find(
+            {'registration_status': 'Ativo', 'founded': {'$in': [False, None]}},
+            projection
+        ).batch_size(batch_size or self.batch_size)
+
+    def get_claim_filter(self, started_at, now, skip_jobs=None):
+        processed_before = {'processing_date': {'$lt': started_at}}
+        if skip_jobs:
+            processed_before['processed_by'] = {'$nin': list(skip_jobs)}
+        return {
             'registration_status': 'Ativo',
-            '$or': [
-                {'founded': False},
-                {'founded': {'$exists': False}}
+            'founded': {'$in': [False, None]},
+            '$and': [
+                self.get_lease_filter(now),
+                {'$or': [
+                    {'processing_date': {'$exists': False}},
+                    processed_before
+                ]}
             ]
-        })
+        }
+
+    def get_lease_filter(self, now):
+        # Medicamentos sem reserva ou com a reserva expirada.
+        return {'$or': [
+            {'claimed_at': {'$exists': False}},
+            {'claimed_at': {'$lt': now - timedelta(seconds=self.lease_seconds)}}
+        ]}
+
+    def claim_medicines(self, worker_id, started_at, limit=10, skip_jobs=None):
+        """
+        Reserva até `limit` medicamentos em três operações (busca dos candidatos, reserva com
+        update_many e leitura dos reservados), em vez de uma operação por medicamento. A reserva é
+        verificada novamente no update_many, de forma que um medicamento reservado por outro worker
+        entre a busca e a reserva não é retornado. Medicamentos já processados a partir de
+        `started_at` ou por um dos jobs de `skip_jobs` (jobs simultâneos) não são reservados
+        novamente; reservas mais antigas que `lease_seconds` (worker interrompido) expiram e o
+        medicamento volta para a fila.
+        """
+        now = datetime.now()
+        claim_filter = self.get_claim_filter(started_at, now, skip_jobs)
+        ids = [i['_id'] for i in self.collection.find(claim_filter, {'_id': 1}).limit(limit)]
+        if not ids:
+            return []
 
-    def update_medicine_data(self, medicine_id, update_data):
-        self.collection.update_one({'_id': medicine_id}, {'$set': update_data})
+        claim_id = f'{worker_id}:{uuid.uuid4().hex}'
+        self.collection.update_many(
+            {'_id': {'$in': ids}, **self.get_lease_filter(now)},
+            {'$set': {'claimed_by': claim_id, 'claimed_at': now}}
+        )
+        return list(self.collection.find({'claimed_by': claim_id}, WORK_PROJECTION))
+
+    def renew_lease(self, worker_id, medicine_ids):
+        # Prorroga as reservas do worker ainda não processadas; reservas expiradas e tomadas por
+        # outro worker não são alteradas.
+        result = self.collection.update_many(
+            {'_id': {'$in': list(medicine_ids)}, 'claimed_by': {'$regex': f'^{re.escape(worker_id)}:'}},
+            {'$set': {'claimed_at': datetime.now()}}
+        )
+        return result.modified_count
+
+    def release_medicines(self, medicine_ids):
+        # Devolve à fila medicamentos reservados e não processados (ex.: mineração interrompida).
+        self.collection.update_many(
+            {'_id': {'$in': list(medicine_ids)}},
+            {'$unset': {'claimed_by': '', 'claimed_at': ''}}
+        )
+
+    def release_worker_claims(self, worker_prefix):
+        # Devolve à fila todas as reservas de um job (ex.: servidor reiniciado durante a mineração).
+        result = self.collection.update_many(
+            {'claimed_by': {'$regex': f'^{re.escape(worker_prefix)}'}},
+            {'$unset': {'claimed_by': '', 'claimed_at': ''}}
+        )
+        return result.modified_count
+
+    def queue_update(self, medicine_id, update_data):
+        # Acumula a atualização; as atualizações são gravadas em lote a cada `flush_size`.
+        with self.lock:
+            self.pending_updates.append(UpdateOne({'_id': medicine_id}, self.get_update(update_data)))
+            should_flush = len(self.pending_updates) >= self.flush_size
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            updates, self.pending_updates = self.pending_updates, []
+        if updates:
+            self.collection.bulk_write(updates, ordered=False)
+        return len(updates)
+
+    def get_update(self, update_data):
+        return {'$set': update_data, '$unset': {'claimed_by': '', 'claimed_at': ''}}
 
     def count_founded_medicines(self):
         return self.collection.count_documents({'founded': True})
 
-
+    def close(self):
+        self.flush()
@@ -0,0 +1,272 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from rate_limiter import RequestCancelled
+
+DEFAULT_DOWNLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+class InvalidLeaflet(Exception):
+    """A resposta não é um PDF (ex.: página de erro em HTML com status 200)."""
+
+
+def safe_filename(filename):
+    # Nomes de produtos podem conter barras e outros caracteres inválidos em nomes de arquivos.
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", filename).strip("_") or "bula.pdf"
+
+
+class DownloadStats:
+    """Estatísticas dos downloads: arquivos, bytes transferidos, tempo e taxa de download."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files = 0
+        self.bytes = 0
+        self.download_time = 0.0
+        self.resumed = 0
+        self.deduplicated = 0
+        self.failures = 0
+        self.started_at = time.monotonic()
+
+    def record(self, n_bytes, elapsed_time, resumed=False):
+        with self.lock:
+            self.files += 1
+            self.bytes += n_bytes
+            self.download_time += elapsed_time
+            self.resumed += int(resumed)
+
+    def record_duplicate(self):
+        with self.lock:
+            self.deduplicated += 1
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+
+    def to_dict(self):
+        wall_time = time.monotonic() - self.started_at
+        return {
+            "files": self.files,
+            "bytes": self.bytes,
+            "deduplicated": self.deduplicated,
+            "resumed": self.resumed,
+            "failures": self.failures,
+            "avg_file_bytes": self.bytes // self.files if self.files else 0,
+            # Taxa média de cada download e taxa agregada desde o início (downloads simultâneos).
+            "download_rate_mb_s": round(self.bytes / self.download_time / 1e6, 3) if self.download_time else 0.0,
+            "throughput_mb_s": round(self.bytes / wall_time / 1e6, 3) if wall_time else 0.0,
+        }
+
+
+class LeafletDownloader:
+    """
+    Download das bulas (PDF) em fluxo, em blocos de `chunk_size` bytes, para `download_dir`
+    (MINER_DOWNLOAD_DIR).
+    - Uma sessão HTTP com pool de conexões é compartilhada e no máximo `max_concurrent` downloads
+      são executados ao mesmo tempo (semáforo), somando todos os workers.
+    - O arquivo é gravado em `parts/<hash da URL>.part`; um download interrompido é retomado com o
+      cabeçalho Range a partir dos bytes já gravados.
+    - Respostas que não são PDF (Content-Type de texto/JSON ou sem a assinatura `%PDF`) levantam
+      InvalidLeaflet e o arquivo parcial é removido.
+    - Ao final, o arquivo é renomeado (de forma atômica) para `blobs/<sha256>.pdf`. A mesma bula
+      compartilhada por vários produtos é armazenada uma única vez e cada nome de arquivo é um
+      link para o conteúdo; URLs já baixadas não são baixadas novamente.
+    - O índice (URL -> sha256) fica em `index.json`; cada download é registrado com um append em
+      `index.journal.jsonl`, incorporado ao `index.json` a cada `compact_every` downloads e no
+      `close()`.
+    """
+
+    def __init__(self, download_dir=None, max_concurrent=4, chunk_size=64 * 1024, timeout=30,
+                 rate_limiter=None, headers=None, max_retries=3, compact_every=1000):
+        self.download_dir = download_dir or os.getenv("MINER_DOWNLOAD_DIR", DEFAULT_DOWNLOAD_DIR)
+        self.blobs_dir = os.path.join(self.download_dir, "blobs")
+        self.parts_dir = os.path.join(self.download_dir, "parts")
+        self.index_path = os.path.join(self.download_dir, "index.json")
+        self.journal_path = os.path.join(self.download_dir, "index.journal.jsonl")
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.parts_dir, exist_ok=True)
+
+        self.max_concurrent = max_concurrent
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.semaphore = threading.BoundedSemaphore(max_concurrent)
+        self.lock = threading.Lock()
+        self.url_locks = {}
+        self.stats = DownloadStats()
+        self.compact_every = compact_every
+        self.journal_size = 0
+        self.index = {}
+        self.load_index()
+
+        retry = Retry(total=max_retries, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=["GET"], respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=max_concurrent, pool_maxsize=max_concurrent, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Sem compressão: o cabeçalho Range e os tamanhos gravados se referem aos mesmos bytes.
+        self.session.headers.update({"Accept-Encoding": "identity", **(headers or {})})
+
+    def load_index(self):
+        # URL -> sha256 do conteúdo baixado: index.json e os downloads registrados depois no journal.
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        if not os.path.exists(self.journal_path):
+            return self.index
+
+        truncated = False
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última linha incompleta de uma escrita interrompida.
+                    truncated = True
+                    continue
+                self.index[entry["url"]] = entry["sha256"]
+                self.journal_size += 1
+        if truncated:
+            # Os próximos appends não podem continuar a linha incompleta.
+            self.save_index()
+        return self.index
+
+    def add_to_index(self, url, digest):
+        # Chamado com self.lock: um append por download em vez de reescrever todo o índice.
+        self.index[url] = digest
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"url": url, "sha256": digest}) + "\n")
+        self.journal_size += 1
+        if self.journal_size >= self.compact_every:
+            self.save_index()
+
+    def save_index(self):
+        # Reescreve o index.json com todo o índice e descarta o journal já incorporado.
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_size = 0
+
+    def get_url_lock(self, url):
+        with self.lock:
+            return self.url_locks.setdefault(url, threading.Lock())
+
+    def download(self, url, filename, stop_event=None):
+        """
+        Baixa a bula e retorna o caminho do arquivo `filename` em `download_dir`. Levanta
+        RequestCancelled se `stop_event` for sinalizado enquanto aguarda a vez no limitador.
+        """
+        if not url:
+            return None
+
+        filepath = os.path.join(self.download_dir, safe_filename(filename))
+        # Downloads simultâneos da mesma URL (produtos com a mesma bula) são feitos uma única vez.
+        with self.get_url_lock(url):
+            with self.lock:
+                digest = self.index.get(url)
+
+            if digest and os.path.exists(self.get_blob_path(digest)):
+                self.stats.record_duplicate()
+            else:
+                try:
+                    with self.semaphore:
+                        digest = self.fetch(url, stop_event)
+                except RequestCancelled:
+                    raise
+                except Exception:
+                    self.stats.record_failure()
+                    raise
+                with self.lock:
+                    self.add_to_index(url, digest)
+
+        self.link(self.get_blob_path(digest), filepath)
+        return filepath
+
+    def get_blob_path(self, digest):
+        return os.path.join(self.blobs_dir, f"{digest}.pdf")
+
+    def get_part_path(self, url):
+        return os.path.join(self.parts_dir, f"{hashlib.sha256(url.encode()).hexdigest()}.part")
+
+    def fetch(self, url, stop_event=None):
+        part_path = self.get_part_path(url)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        if self.rate_limiter is not None and not self.rate_limiter.acquire(stop_event):
+            raise RequestCancelled()
+
+        start_time = time.monotonic()
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                # O arquivo parcial já está completo.
+                response.close()
+            else:
+                response.raise_for_status()
+                content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                if content_type.startswith("text/") or content_type.endswith("json"):
+                    raise InvalidLeaflet(f"Resposta {content_type} em vez de PDF: {url}")
+                resumed = offset > 0 and response.status_code == 206
+                if not resumed:
+                    offset = 0
+                with open(part_path, "ab" if resumed else "wb") as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        f.write(chunk)
+                n_bytes = os.path.getsize(part_path) - offset
+                self.stats.record(n_bytes, time.monotonic() - start_time, resumed=resumed)
+
+        if not self.is_pdf(part_path):
+            os.remove(part_path)
+            raise InvalidLeaflet(f"O arquivo baixado não é um PDF: {url}")
+
+        digest = self.hash_file(part_path)
+        blob_path = self.get_blob_path(digest)
+        if os.path.exists(blob_path):
+            # Conteúdo já baixado por outra URL.
+            os.remove(part_path)
+            self.stats.record_duplicate()
+        else:
+            os.replace(part_path, blob_path)
+        return digest
+
+    def is_pdf(self, path):
+        # A assinatura %PDF- deve estar no primeiro 1 KB do arquivo.
+        with open(path, "rb") as f:
+            return b"%PDF-" in f.read(1024)
+
+    def hash_file(self, path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def link(self, blob_path, filepath):
+        tmp_path = f"{filepath}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(blob_path, tmp_path)
+        except OSError:
+            # Sistemas de arquivos sem hard links: o conteúdo é copiado.
+            shutil.copyfile(blob_path, tmp_path)
+        os.replace(tmp_path, filepath)
+
+    def close(self):
+        with self.lock:
+            if self.journal_size:
+                self.save_index()
+        self.session.close()
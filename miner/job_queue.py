@@ -0,0 +1,268 @@
+from collections import deque
+from datetime import datetime
+import logging
+import os
+import queue
+import threading
+import uuid
+
+from pymongo import ASCENDING, DESCENDING, MongoClient
+
+from bulario_client import create_scraper
+from database import MongoDBConnection
+from downloader import LeafletDownloader
+from rate_limiter import RateLimiter
+from worker_pool import MiningWorkerPool
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+FAILED = "failed"
+ACTIVE_STATUSES = [QUEUED, RUNNING]
+
+
+class MiningJobStore:
+    """
+    Jobs de mineração persistidos na coleção `mining_jobs` do MongoDB: parâmetros, status e o
+    progresso do último checkpoint (medicamentos processados, bulas encontradas, workers e logs).
+    As mudanças de status são condicionais (`only_if`), de forma que um job cancelado não é
+    marcado como concluído pelo worker que o executava.
+    """
+
+    def __init__(self, db_name='tcc_ufg_akcit_nlp', collection_name='mining_jobs', host='localhost', port=27017,
+                 client=None):
+        self.client = client or MongoClient(host, port)
+        self.collection = self.client[db_name][collection_name]
+        self.collection.create_index([('status', ASCENDING), ('created_at', ASCENDING)], name='status')
+
+    def create(self, params):
+        now = datetime.now()
+        job = {
+            '_id': uuid.uuid4().hex,
+            'status': QUEUED,
+            'params': params,
+            'created_at': now,
+            'updated_at': now,
+            'started_at': None,
+            'finished_at': None,
+            'processed': 0,
+            'found': 0,
+            'workers': [],
+            'error': None,
+            'logs': [],
+        }
+        self.collection.insert_one(job)
+        return job
+
+    def get(self, job_id):
+        return self.collection.find_one({'_id': job_id})
+
+    def list(self, status=None, limit=50):
+        query = {'status': status} if status else {}
+        return list(self.collection.find(query, {'logs': 0}).sort('created_at', DESCENDING).limit(limit))
+
+    def get_active(self):
+        return list(self.collection.find({'status': {'$in': ACTIVE_STATUSES}}).sort('created_at', ASCENDING))
+
+    def get_concurrent_ids(self, started_at):
+        """Jobs ativos ou finalizados a partir de `started_at`: os executados junto com um job iniciado em `started_at`."""
+        query = {'$or': [{'status': {'$in': ACTIVE_STATUSES}}, {'finished_at': {'$gte': started_at}}]}
+        return [job['_id'] for job in self.collection.find(query, {'_id': 1})]
+
+    def update(self, job_id, **fields):
+        self.collection.update_one({'_id': job_id}, {'$set': {**fields, 'updated_at': datetime.now()}})
+
+    def set_status(self, job_id, status, only_if=None, **fields):
+        """Altera o status do job (somente se o status atual estiver em `only_if`). Retorna True se alterou."""
+        query = {'_id': job_id}
+        if only_if is not None:
+            query['status'] = {'$in': only_if}
+        result = self.collection.update_one(
+            query, {'$set': {**fields, 'status': status, 'updated_at': datetime.now()}}
+        )
+        return result.modified_count == 1
+
+
+class MiningJob:
+    """Job carregado no processo: evento de cancelamento, pool de workers e logs recentes."""
+
+    def __init__(self, job):
+        self.id = job['_id']
+        self.params = job['params']
+        self.cancel_event = threading.Event()
+        self.pool = None
+        self.logs = deque(job.get('logs') or [], maxlen=100)
+        # Contadores do último checkpoint (job retomado); o pool conta somente a execução atual.
+        self.processed_offset = job.get('processed', 0)
+        self.found_offset = job.get('found', 0)
+
+    def log(self, level, message):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.logs.append(f"[{timestamp}] {level}: {message}")
+        logging.log(getattr(logging, level), f"[job {self.id}] {message}")
+
+    def get_progress(self):
+        pool = self.pool
+        if pool is None:
+            return {'logs': list(self.logs)}
+        return {
+            'processed': self.processed_offset + pool.total_processed,
+            'found': pool.found_count if pool.found_count is not None else self.found_offset,
+            'workers': [stats.to_dict() for stats in list(pool.stats.values())],
+            'logs': list(self.logs),
+        }
+
+
+class MiningJobManager:
+    """
+    Executa os jobs de mineração em até `max_jobs` threads (fila limitada), cada job com o seu
+    MiningWorkerPool. Todos os jobs compartilham o limitador de requisições (MINER_RATE) e o
+    downloader, de forma que o limite de acesso ao site vale para o processo inteiro, e reservam
+    medicamentos diferentes da mesma fila de trabalho no MongoDB. Cada medicamento processado é
+    marcado com o job; um job não processa novamente os medicamentos dos jobs simultâneos.
+    - O progresso é gravado a cada `checkpoint_interval` segundos e ao final do job, após gravar
+      as atualizações pendentes dos medicamentos.
+    - `resume()` reenfileira os jobs que estavam na fila ou em execução quando o servidor parou:
+      as reservas do job são liberadas e a mineração continua a partir do `started_at` original,
+      sem reprocessar os medicamentos já gravados.
+    - `cancel()` marca o job como cancelado imediatamente; os workers param sem aguardar a vez no
+      limitador e devolvem os medicamentos reservados para a fila.
+    """
+
+    def __init__(self, max_jobs=None, rate=None, max_downloads=4, checkpoint_interval=None, store=None,
+                 db_factory=MongoDBConnection, scraper_factory=create_scraper):
+        self.max_jobs = max_jobs or int(os.getenv("MINER_MAX_JOBS", 2))
+        self.checkpoint_interval = checkpoint_interval or float(os.getenv("MINER_CHECKPOINT_INTERVAL", 5))
+        self.store = store or MiningJobStore()
+        self.db_factory = db_factory
+        self.scraper_factory = scraper_factory
+        self.rate_limiter = RateLimiter(rate=rate or float(os.getenv("MINER_RATE", 0.5)))
+        self.downloader = LeafletDownloader(
+            max_concurrent=max_downloads, rate_limiter=self.rate_limiter, headers={"Authorization": "Guest"}
+        )
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.queue = queue.Queue()
+        # Threads daemon: encerrar o servidor não aguarda os jobs, que são retomados no próximo início.
+        self.threads = [
+            threading.Thread(target=self.run, name=f"mining-job-{i}", daemon=True)
+            for i in range(self.max_jobs)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, workers=2, target_count=None, claim_size=5, backend=None):
+        """Cria e enfileira um job. `target_count` é a quantidade de bulas encontradas pelo job (None: toda a fila)."""
+        job = self.store.create({
+            'workers': workers,
+            'target_count': target_count,
+            'claim_size': claim_size,
+            'backend': backend or os.getenv("MINER_SCRAPER_BACKEND", "http"),
+        })
+        return self.enqueue(job)
+
+    def enqueue(self, job):
+        mining_job = MiningJob(job)
+        with self.lock:
+            self.jobs[mining_job.id] = mining_job
+        self.queue.put(mining_job)
+        return mining_job
+
+    def resume(self):
+        jobs = self.store.get_active()
+        if not jobs:
+            return []
+        db_connection = self.db_factory()
+        try:
+            for job in jobs:
+                released = db_connection.release_worker_claims(f"{job['_id']}/")
+                logging.info(f"Retomando o job {job['_id']} ({released} medicamentos reservados liberados).")
+                self.store.set_status(job['_id'], QUEUED, only_if=ACTIVE_STATUSES)
+                self.enqueue(job)
+        finally:
+            db_connection.close()
+        return jobs
+
+    def cancel(self, job_id):
+        """Cancela um job na fila ou em execução. Retorna False se o job não estiver ativo."""
+        if not self.store.set_status(job_id, CANCELLED, only_if=ACTIVE_STATUSES, finished_at=datetime.now()):
+            return False
+        with self.lock:
+            mining_job = self.jobs.get(job_id)
+        if mining_job is not None:
+            mining_job.log("INFO", "Job cancelado por solicitação do usuário")
+            mining_job.cancel_event.set()
+        return True
+
+    def get(self, job_id):
+        """Retorna o job com o progresso atual (se estiver em execução neste processo)."""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        with self.lock:
+            mining_job = self.jobs.get(job_id)
+        if mining_job is not None:
+            job.update(mining_job.get_progress())
+        return job
+
+    def list(self, status=None, limit=50):
+        return self.store.list(status, limit)
+
+    def run(self):
+        while True:
+            mining_job = self.queue.get()
+            try:
+                self.run_job(mining_job)
+            except Exception as e:
+                logging.exception(f"Erro inesperado no job {mining_job.id}: {e}")
+            finally:
+                with self.lock:
+                    self.jobs.pop(mining_job.id, None)
+
+    def run_job(self, mining_job):
+        job = self.store.get(mining_job.id)
+        started_at = job['started_at'] or datetime.now()
+        # Jobs cancelados enquanto aguardavam na fila não são executados.
+        if mining_job.cancel_event.is_set() or not self.store.set_status(
+            mining_job.id, RUNNING, only_if=[QUEUED], started_at=started_at
+        ):
+            return
+
+        params = mining_job.params
+        pool = mining_job.pool = MiningWorkerPool(
+            workers=params['workers'],
+            target_count=params['target_count'],
+            claim_size=params['claim_size'],
+            scraper_factory=lambda **kwargs: self.scraper_factory(backend=params['backend'], **kwargs),
+            db_factory=self.db_factory,
+            log=mining_job.log,
+            rate_limiter=self.rate_limiter,
+            downloader=self.downloader,
+            job_id=mining_job.id,
+            started_at=started_at,
+            found_count=mining_job.found_offset,
+            stop_event=mining_job.cancel_event,
+            get_concurrent_jobs=lambda: self.store.get_concurrent_ids(started_at),
+        )
+        try:
+            mining_job.log("INFO", f"Iniciando job de mineração: {params}")
+            pool.start()
+            while pool.is_running and not mining_job.cancel_event.wait(self.checkpoint_interval):
+                self.checkpoint(mining_job)
+            pool.join()
+            mining_job.log("INFO", "Job de mineração finalizado")
+            self.checkpoint(mining_job)
+            self.store.set_status(mining_job.id, COMPLETED, only_if=[RUNNING], finished_at=datetime.now())
+        except Exception as e:
+            mining_job.log("ERROR", f"Erro crítico no job de mineração: {e}")
+            pool.stop()
+            self.store.set_status(mining_job.id, FAILED, only_if=[RUNNING], error=str(e),
+                                  finished_at=datetime.now(), **mining_job.get_progress())
+
+    def checkpoint(self, mining_job):
+        pool = mining_job.pool
+        # Os resultados pendentes são gravados antes dos contadores do job.
+        if pool.db_connection is not None:
+            pool.db_connection.flush()
+        self.store.update(mining_job.id, **mining_job.get_progress())
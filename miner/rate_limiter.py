@@ -0,0 +1,40 @@
+import threading
+import time
+
+
+class RequestCancelled(Exception):
+    """A requisição não foi realizada porque a mineração foi interrompida (`stop_event`)."""
+
+
+class RateLimiter:
+    """
+    Limitador de requisições (token bucket) compartilhado entre os workers.
+    Garante no máximo `rate` requisições por segundo ao site da ANVISA, somando todos os
+    navegadores, com rajadas de até `burst` requisições.
+    """
+
+    def __init__(self, rate=0.5, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self, stop_event=None):
+        """Bloqueia até que uma requisição seja permitida. Retorna False se `stop_event` for sinalizado."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+
+            self.waited += wait
+            if stop_event is None:
+                time.sleep(wait)
+            elif stop_event.wait(wait):
+                return False
@@ -1,36 +1,59 @@
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
+from downloader import LeafletDownloader
+from rate_limiter import RequestCancelled
+
+BASE_URL = "https://consultas.anvisa.gov.br/#/bulario"
+
+
 class AnvisaScraper:
-    def __init__(self):
+    """
+    Sessão de navegador (Chrome headless) para consultar o bulário da ANVISA.
+    As esperas são explícitas (WebDriverWait); o intervalo entre as requisições é controlado pelo
+    `rate_limiter` e as bulas são baixadas pelo `downloader`; ambos podem ser compartilhados
+    entre várias sessões. Quando `stop_event` é sinalizado, as ações seguintes levantam
+    RequestCancelled.
+    """
+
+    def __init__(self, base_url=BASE_URL, rate_limiter=None, downloader=None, timeout=10, stop_event=None):
         chrome_options = Options()
         chrome_options.add_argument("--headless")
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-        self.base_url = "https://consultas.anvisa.gov.br/#/bulario"
+        self.base_url = base_url
+        self.rate_limiter = rate_limiter
+        self.downloader = downloader or LeafletDownloader(rate_limiter=rate_limiter)
+        self.timeout = timeout
+        self.stop_event = stop_event
 
     def __del__(self):
-        self.driver.quit()
+        self.close()
 
+    def close(self):
+        driver = getattr(self, "driver", None)
+        if driver is not None:
+            driver.quit()
+            self.driver = None
 
-
-
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
-import random
-import os
-
-class AnvisaScraper(object):
-    # ... (código existente)
+    def wait_turn(self):
+        # Cada ação que gera requisições ao site aguarda a vez no limitador global.
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise RequestCancelled()
+        if self.rate_limiter is not None and not self.rate_limiter.acquire(self.stop_event):
+            raise RequestCancelled()
 
     def search_medicine(self, product_name):
+        self.wait_turn()
         self.driver.get(self.base_url)
-        wait = WebDriverWait(self.driver, 10)
+        wait = WebDriverWait(self.driver, self.timeout)
 
         # Preencher o campo "Medicamento"
         medicine_input = wait.until(EC.presence_of_element_located((By.ID, "txtMedicamento")))
@@ -38,74 +61,37 @@ class AnvisaScraper(object):
 
         # Clicar no botão "Consultar"
         consult_button = wait.until(EC.element_to_be_clickable((By.ID, "btnConsultar")))
+        self.wait_turn()
         consult_button.click()
 
-        # Aguardar o carregamento da página de resultados
-        time.sleep(random.uniform(1, 3)) # Espera aleatória para evitar bloqueios
-
         # Verificar se há resultados
         try:
-            wait.until(EC.presence_of_element_located((By.XPATH, "//table[@id=\'resultadoBulario\']/tbody/tr")))
+            wait.until(EC.presence_of_element_located((By.XPATH, "//table[@id='resultadoBulario']/tbody/tr")))
             return True
-        except:
+        except TimeoutException:
             return False
 
     def get_leaflet_links(self):
-        wait = WebDriverWait(self.driver, 10)
+        wait = WebDriverWait(self.driver, self.timeout)
         try:
             # Selecionar a primeira linha disponível
-            first_row = wait.until(EC.presence_of_element_located((By.XPATH, "//table[@id=\'resultadoBulario\']/tbody/tr[1]")))
+            first_row = wait.until(EC.presence_of_element_located((By.XPATH, "//table[@id='resultadoBulario']/tbody/tr[1]")))
+            self.wait_turn()
             first_row.click()
 
-            # Aguardar o carregamento do grid de detalhes
-            time.sleep(random.uniform(1, 3))
-
-            # Identificar os links das bulas
-            patient_leaflet_link = None
-            professional_leaflet_link = None
-
-            # Tentar encontrar a bula para o profissional primeiro
-            try:
-                professional_leaflet_element = wait.until(EC.presence_of_element_located((By.XPATH, "//a[contains(text(), \'Bula para o Profissional\')]")))
-                professional_leaflet_link = professional_leaflet_element.get_attribute("href")
-            except:
-                pass
-
-            # Tentar encontrar a bula para o paciente
-            try:
-                patient_leaflet_element = wait.until(EC.presence_of_element_located((By.XPATH, "//a[contains(text(), \'Bula para o Paciente\')]")))
-                patient_leaflet_link = patient_leaflet_element.get_attribute("href")
-            except:
-                pass
-
-            return {
-                "patient_leaflet": patient_leaflet_link,
-                "professional_leaflet": professional_leaflet_link
-            }
-        except:
+            # Aguardar o carregamento do grid de detalhes (primeiro link de bula)
+            wait.until(EC.presence_of_element_located((By.XPATH, "//a[contains(text(), 'Bula para o')]")))
+        except TimeoutException:
             return {"patient_leaflet": None, "professional_leaflet": None}
 
-    def download_pdf(self, url, filename, download_dir="C:/tcc/data"):
-        if not url:
-            return None
-
-        os.makedirs(download_dir, exist_ok=True)
-        filepath = os.path.join(download_dir, filename)
-
-        # Selenium não baixa diretamente, então usaremos requests
-        # No ambiente real, o Selenium pode ser configurado para baixar automaticamente
-        # Para este ambiente simulado, vamos apenas retornar o caminho como se tivesse baixado
-        # Em um ambiente real, você faria algo como:
-        # response = requests.get(url, stream=True)
-        # with open(filepath, 'wb') as pdf_file:
-        #     for chunk in response.iter_content(chunk_size=1024):
-        #         if chunk:
-        #             pdf_file.write(chunk)
-
-        # Simula o download salvando um arquivo vazio com o nome correto
-        with open(filepath, 'w') as f:
-            f.write("")
-
-        return filepath
+        return {
+            "patient_leaflet": self.find_link("Bula para o Paciente"),
+            "professional_leaflet": self.find_link("Bula para o Profissional"),
+        }
 
+    def find_link(self, text):
+        elements = self.driver.find_elements(By.XPATH, f"//a[contains(text(), '{text}')]")
+        return elements[0].get_attribute("href") if elements else None
 
+    def download_pdf(self, url, filename):
+        return self.downloader.download(url, filename, stop_event=self.stop_event)
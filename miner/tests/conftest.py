@@ -0,0 +1,63 @@
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import os
+import threading
+import uuid
+
+import pytest
+
+from database import MongoDBConnection
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class MockMongoDBConnection(MongoDBConnection):
+    """MongoDBConnection sobre o mongomock, que não suporta o bulk_write das versões recentes do pymongo."""
+
+    def flush(self):
+        with self.lock:
+            updates, self.pending_updates = self.pending_updates, []
+        for update in updates:
+            self.collection.update_one(update._filter, update._doc)
+        return len(updates)
+
+
+@pytest.fixture
+def mongo_client():
+    """MongoDB de MINER_TEST_MONGO_URI (ex.: mongodb://localhost:27017) ou, sem ele, o mongomock."""
+    uri = os.getenv("MINER_TEST_MONGO_URI")
+    if uri:
+        from pymongo import MongoClient
+
+        client = MongoClient(uri)
+    else:
+        mongomock = pytest.importorskip("mongomock")
+        client = mongomock.MongoClient()
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def db_factory(mongo_client):
+    """Cria conexões ao mesmo banco de teste, como o `db_factory` do MiningWorkerPool."""
+    db_name = f"miner_test_{uuid.uuid4().hex[:8]}"
+    connection_class = MongoDBConnection if os.getenv("MINER_TEST_MONGO_URI") else MockMongoDBConnection
+    yield partial(connection_class, db_name=db_name, client=mongo_client)
+    mongo_client.drop_database(db_name)
+
+
+@pytest.fixture
+def bulario_server():
+    """Servidor HTTP local com as páginas de tests/fixtures/bulario. Retorna a URL base."""
+    handler = partial(QuietHandler, directory=os.path.join(FIXTURES_DIR, "bulario"))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
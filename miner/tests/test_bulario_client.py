@@ -0,0 +1,141 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from bulario_client import AnvisaBularioClient
+from downloader import InvalidLeaflet, LeafletDownloader
+
+PDF = b"%PDF-1.4\n% bula de teste\n%%EOF\n"
+
+PRODUCTS = [
+    # O primeiro resultado não tem bula: o cliente usa o primeiro resultado com bula.
+    {"nomeProduto": "PARACETAMOL", "idBulaPacienteProtegido": None, "idBulaProfissionalProtegido": None},
+    {"nomeProduto": "PARACETAMOL", "idBulaPacienteProtegido": "PAC1", "idBulaProfissionalProtegido": "PROF1"},
+    {"nomeProduto": "IBUPROFENO", "idBulaPacienteProtegido": "PAC2", "idBulaProfissionalProtegido": None},
+    {"nomeProduto": "DIPIRONA", "idBulaPacienteProtegido": "HTML", "idBulaProfissionalProtegido": None},
+]
+
+
+class StubAnvisaAPI(ThreadingHTTPServer):
+    """API do bulário local: consulta `/bulario` e arquivos `/medicamentos/arquivo/bula/parecer/<id>/`."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.requests = []
+        # Status devolvidos, em ordem, antes das respostas normais (ex.: [503]).
+        self.failures = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.requests.append((url.path, parse_qs(url.query), dict(self.headers)))
+        if self.server.failures:
+            return self.send(self.server.failures.pop(0), b"", "text/plain", {"Retry-After": "0"})
+
+        if url.path == "/bulario":
+            name = parse_qs(url.query)["filter[nomeProduto]"][0].upper()
+            content = [i for i in PRODUCTS if i["nomeProduto"].startswith(name)]
+            return self.send(200, json.dumps({"content": content}).encode(), "application/json")
+
+        leaflet_id = url.path.rstrip("/").rsplit("/", 1)[-1]
+        if leaflet_id == "HTML":
+            # Página de erro em HTML com status 200.
+            return self.send(200, b"<html>Erro</html>", "text/html")
+        return self.send(200, PDF, "application/pdf")
+
+    def send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api():
+    server = StubAnvisaAPI()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(stub_api, tmp_path, monkeypatch):
+    monkeypatch.setenv("ANVISA_API_URL", stub_api.url)
+    client = AnvisaBularioClient(
+        downloader=LeafletDownloader(download_dir=str(tmp_path), headers={"Authorization": "Guest"})
+    )
+    yield client
+    client.downloader.close()
+    client.close()
+
+
+def test_search_medicine(client, stub_api):
+    assert client.search_medicine("paracetamol")
+    assert not client.search_medicine("inexistente")
+
+    path, query, headers = stub_api.requests[0]
+    assert path == "/bulario"
+    assert query["filter[nomeProduto]"] == ["paracetamol"]
+    assert headers["Authorization"] == "Guest"
+
+
+def test_get_leaflet_links(client, stub_api):
+    client.search_medicine("paracetamol")
+    assert client.get_leaflet_links() == {
+        "patient_leaflet": f"{stub_api.url}/medicamentos/arquivo/bula/parecer/PAC1/?Authorization=Guest",
+        "professional_leaflet": f"{stub_api.url}/medicamentos/arquivo/bula/parecer/PROF1/?Authorization=Guest",
+    }
+
+    client.search_medicine("ibuprofeno")
+    assert client.get_leaflet_links()["professional_leaflet"] is None
+
+    client.search_medicine("inexistente")
+    assert client.get_leaflet_links() == {"patient_leaflet": None, "professional_leaflet": None}
+
+
+def test_download_pdf(client, stub_api, tmp_path):
+    client.search_medicine("paracetamol")
+    url = client.get_leaflet_links()["patient_leaflet"]
+
+    path = client.download_pdf(url, "PARACETAMOL/500mg_paciente.pdf")
+    assert path == str(tmp_path / "PARACETAMOL_500mg_paciente.pdf")
+    with open(path, "rb") as f:
+        assert f.read() == PDF
+
+    # A mesma URL não é baixada novamente.
+    client.download_pdf(url, "OUTRO_paciente.pdf")
+    assert sum(1 for path, *_ in stub_api.requests if path.startswith("/medicamentos")) == 1
+    assert client.downloader.stats.deduplicated == 1
+
+
+def test_download_rejects_html_responses(client, tmp_path):
+    client.search_medicine("dipirona")
+    url = client.get_leaflet_links()["patient_leaflet"]
+
+    with pytest.raises(InvalidLeaflet):
+        client.download_pdf(url, "DIPIRONA_paciente.pdf")
+    assert not (tmp_path / "DIPIRONA_paciente.pdf").exists()
+    assert list((tmp_path / "blobs").iterdir()) == []
+
+
+def test_search_retries_temporary_failures(client, stub_api):
+    stub_api.failures = [503, 429]
+
+    assert client.search_medicine("paracetamol")
+    assert len(stub_api.requests) == 3
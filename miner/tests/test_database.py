@@ -0,0 +1,52 @@
+from datetime import datetime
+import os
+
+import pytest
+
+from database import MongoDBConnection
+
+# O mongomock não executa o bulk_write das versões recentes do pymongo (ver MockMongoDBConnection).
+requires_mongo = pytest.mark.skipif(
+    not os.getenv("MINER_TEST_MONGO_URI"), reason="Requer um MongoDB (MINER_TEST_MONGO_URI)."
+)
+
+
+class BulkWriteSpy:
+    """Coleção que registra a quantidade de atualizações de cada bulk_write."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.bulk_writes = []
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def bulk_write(self, requests, ordered=True):
+        self.bulk_writes.append(len(requests))
+        return self.collection.bulk_write(requests, ordered=ordered)
+
+
+@requires_mongo
+def test_flush_writes_queued_updates_with_bulk_write(db_factory):
+    db_connection = db_factory(flush_size=3)
+    assert type(db_connection) is MongoDBConnection
+    db_connection.collection.insert_many(
+        [{"_id": i, "product_name": f"MEDICAMENTO {i}", "registration_status": "Ativo"} for i in range(5)]
+    )
+    claimed = db_connection.claim_medicines("worker-0", datetime.now(), limit=5)
+    db_connection.collection = BulkWriteSpy(db_connection.collection)
+
+    for medicine in claimed:
+        db_connection.queue_update(
+            medicine["_id"], {"founded": medicine["_id"] % 2 == 0, "processing_date": datetime.now()}
+        )
+    # As 3 primeiras atualizações são gravadas ao atingir `flush_size`; as demais ficam pendentes.
+    assert db_connection.collection.bulk_writes == [3]
+    assert db_connection.flush() == 2
+    assert db_connection.flush() == 0
+    assert db_connection.collection.bulk_writes == [3, 2]
+
+    collection = db_connection.collection.collection
+    assert collection.count_documents({"processing_date": {"$exists": True}}) == 5
+    assert collection.count_documents({"founded": True}) == 3
+    assert collection.count_documents({"claimed_by": {"$exists": True}}) == 0
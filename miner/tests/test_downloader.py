@@ -0,0 +1,131 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+
+import pytest
+
+from downloader import LeafletDownloader
+
+PDF = b"%PDF-1.4\n" + b"conteudo da bula " * 64 + b"\n%%EOF\n"
+
+
+class StubFileServer(ThreadingHTTPServer):
+    """Servidor de arquivos com suporte ao cabeçalho Range (respostas 206)."""
+
+    def __init__(self, files):
+        super().__init__(("127.0.0.1", 0), RangeHandler)
+        self.files = files
+        self.requests = []
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_port}{path}"
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("Range")))
+        body = self.server.files[self.path]
+        status, headers = 200, {}
+        if self.headers.get("Range"):
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+            if start >= len(body):
+                self.send_response(416)
+                self.end_headers()
+                return
+            headers["Content-Range"] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+            status, body = 206, body[start:]
+        self.send_response(status)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = StubFileServer({"/a.pdf": PDF, "/b.pdf": PDF, "/c.pdf": PDF.replace(b"bula", b"BULA")})
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    downloader = LeafletDownloader(download_dir=str(tmp_path))
+    yield downloader
+    downloader.close()
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_resumes_interrupted_downloads(downloader, server):
+    url = server.url("/a.pdf")
+    with open(downloader.get_part_path(url), "wb") as f:
+        f.write(PDF[:100])
+
+    path = downloader.download(url, "A.pdf")
+
+    assert read(path) == PDF
+    assert server.requests == [("/a.pdf", "bytes=100-")]
+    assert downloader.stats.resumed == 1
+    assert downloader.stats.bytes == len(PDF) - 100
+    assert os.listdir(downloader.parts_dir) == []
+
+
+def test_completed_part_files_are_not_downloaded_again(downloader, server):
+    url = server.url("/a.pdf")
+    with open(downloader.get_part_path(url), "wb") as f:
+        f.write(PDF)
+
+    assert read(downloader.download(url, "A.pdf")) == PDF
+    assert server.requests == [("/a.pdf", f"bytes={len(PDF)}-")]
+
+
+def test_same_content_from_different_urls_is_stored_once(downloader, server):
+    path_a = downloader.download(server.url("/a.pdf"), "A.pdf")
+    path_b = downloader.download(server.url("/b.pdf"), "B.pdf")
+    path_c = downloader.download(server.url("/c.pdf"), "C.pdf")
+
+    assert read(path_a) == read(path_b) == PDF
+    assert read(path_c) != PDF
+    assert len(os.listdir(downloader.blobs_dir)) == 2
+    assert downloader.stats.deduplicated == 1
+    assert downloader.index[server.url("/a.pdf")] == downloader.index[server.url("/b.pdf")]
+
+
+def test_index_is_journaled_and_compacted(tmp_path, server):
+    downloader = LeafletDownloader(download_dir=str(tmp_path), compact_every=2)
+    downloader.download(server.url("/a.pdf"), "A.pdf")
+    # Um append por download; o index.json só é reescrito a cada `compact_every` downloads.
+    assert not os.path.exists(downloader.index_path)
+    assert len(read(downloader.journal_path).splitlines()) == 1
+
+    downloader.download(server.url("/b.pdf"), "B.pdf")
+    assert not os.path.exists(downloader.journal_path)
+    downloader.download(server.url("/c.pdf"), "C.pdf")
+    with open(downloader.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"url": "http://interrompido')
+
+    # Um novo processo carrega o index.json e o journal (ignorando a linha incompleta).
+    reloaded = LeafletDownloader(download_dir=str(tmp_path))
+    assert reloaded.index == downloader.index
+    assert len(reloaded.index) == 3
+    reloaded.download(server.url("/c.pdf"), "C2.pdf")
+    assert len(server.requests) == 3
+
+    reloaded.close()
+    downloader.close()
+    with open(reloaded.index_path, encoding="utf-8") as f:
+        assert json.load(f) == reloaded.index
+    assert not os.path.exists(reloaded.journal_path)
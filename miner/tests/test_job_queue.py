@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+import time
+
+import pytest
+
+from job_queue import CANCELLED, COMPLETED, QUEUED, RUNNING, MiningJobManager, MiningJobStore
+from rate_limiter import RequestCancelled
+
+JOB_PARAMS = {"workers": 2, "target_count": None, "claim_size": 3, "backend": "http"}
+
+
+class FakeScraper:
+    """Sessão sem rede: registra os medicamentos consultados (nenhuma bula é encontrada)."""
+
+    def __init__(self, requests, rate_limiter=None, downloader=None, stop_event=None):
+        self.requests = requests
+        self.rate_limiter = rate_limiter
+        self.stop_event = stop_event
+
+    def search_medicine(self, product_name):
+        if not self.rate_limiter.acquire(self.stop_event):
+            raise RequestCancelled()
+        self.requests.append(product_name)
+        return False
+
+    def close(self):
+        pass
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "tempo esgotado"
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def store(db_factory, mongo_client):
+    return MiningJobStore(db_name=db_factory.keywords["db_name"], client=mongo_client)
+
+
+@pytest.fixture
+def medicines(db_factory):
+    db_connection = db_factory()
+    db_connection.collection.insert_many(
+        [{"_id": i, "product_name": f"MEDICAMENTO {i}", "registration_status": "Ativo"} for i in range(20)]
+    )
+    return db_connection.collection
+
+
+@pytest.fixture
+def make_manager(store, db_factory, tmp_path, monkeypatch):
+    monkeypatch.setenv("MINER_DOWNLOAD_DIR", str(tmp_path))
+
+    def make_manager(requests, rate=1000):
+        return MiningJobManager(
+            max_jobs=1,
+            rate=rate,
+            checkpoint_interval=0.05,
+            store=store,
+            db_factory=db_factory,
+            scraper_factory=lambda backend, **kwargs: FakeScraper(requests, **kwargs),
+        )
+
+    return make_manager
+
+
+def test_resume_releases_claims_and_skips_processed_medicines(store, medicines, make_manager):
+    # Job interrompido por um reinício do servidor: 5 medicamentos gravados e 3 ainda reservados.
+    job = store.create(JOB_PARAMS)
+    started_at = datetime.now() - timedelta(minutes=1)
+    store.set_status(job["_id"], RUNNING, started_at=started_at, processed=5)
+    medicines.update_many(
+        {"_id": {"$in": list(range(5))}},
+        {"$set": {"founded": False, "processing_date": datetime.now(), "processed_by": job["_id"]}},
+    )
+    medicines.update_many(
+        {"_id": {"$in": [5, 6, 7]}},
+        {"$set": {"claimed_by": f"{job['_id']}/worker-0:interrompido", "claimed_at": datetime.now()}},
+    )
+    requests = []
+    manager = make_manager(requests)
+
+    assert [i["_id"] for i in manager.resume()] == [job["_id"]]
+    wait_for(lambda: store.get(job["_id"])["status"] == COMPLETED)
+
+    job = store.get(job["_id"])
+    assert sorted(requests) == sorted(f"MEDICAMENTO {i}" for i in range(5, 20))
+    # A mineração continua a partir do started_at original (o MongoDB grava milissegundos).
+    assert abs(job["started_at"] - started_at) < timedelta(milliseconds=1)
+    assert job["processed"] == 20
+    assert medicines.count_documents({"claimed_by": {"$exists": True}}) == 0
+
+
+def test_cancel_stops_running_and_queued_jobs(store, medicines, make_manager):
+    requests = []
+    manager = make_manager(requests, rate=10)
+    running = manager.submit(workers=2, claim_size=2)
+    queued = manager.submit(workers=2, claim_size=2)
+
+    # O checkpoint grava os resultados pendentes antes do progresso do job.
+    wait_for(lambda: store.get(running.id)["processed"] >= 2)
+    processed = store.get(running.id)["processed"]
+    assert medicines.count_documents({"processed_by": running.id}) >= processed
+    assert store.get(queued.id)["status"] == QUEUED
+
+    start_time = time.monotonic()
+    assert manager.cancel(queued.id)
+    assert manager.cancel(running.id)
+    wait_for(lambda: not manager.jobs)
+
+    assert time.monotonic() - start_time < 1
+    assert store.get(running.id)["status"] == CANCELLED
+    assert store.get(queued.id)["status"] == CANCELLED
+    assert store.get(queued.id)["started_at"] is None
+    assert len(requests) < 20
+    assert medicines.count_documents({"claimed_by": {"$exists": True}}) == 0
+    assert not manager.cancel(running.id)
@@ -0,0 +1,187 @@
+from collections import Counter
+from datetime import datetime
+import shutil
+import threading
+import time
+
+import pytest
+
+from downloader import LeafletDownloader
+from rate_limiter import RateLimiter, RequestCancelled
+from worker_pool import MiningWorkerPool
+
+
+def insert_medicines(db_factory, count):
+    db_connection = db_factory()
+    db_connection.collection.insert_many(
+        [{"_id": i, "product_name": f"MEDICAMENTO {i}", "registration_status": "Ativo"} for i in range(count)]
+    )
+    return db_connection
+
+
+class FakeScraper:
+    """Sessão sem rede: registra as consultas e o horário em que cada uma passou pelo limitador."""
+
+    def __init__(self, requests, rate_limiter=None, downloader=None, stop_event=None):
+        self.requests = requests
+        self.rate_limiter = rate_limiter
+        self.stop_event = stop_event
+
+    def search_medicine(self, product_name):
+        if not self.rate_limiter.acquire(self.stop_event):
+            raise RequestCancelled()
+        self.requests.append((product_name, time.monotonic()))
+        return False
+
+    def close(self):
+        pass
+
+
+def test_claims_are_atomic(db_factory):
+    insert_medicines(db_factory, 300)
+    started_at = datetime.now()
+    claimed = []
+    lock = threading.Lock()
+
+    def claim(worker_id):
+        db_connection = db_factory(create_indexes=False)
+        while True:
+            medicines = db_connection.claim_medicines(worker_id, started_at, limit=7)
+            if not medicines:
+                break
+            with lock:
+                claimed.extend(i["_id"] for i in medicines)
+
+    threads = [threading.Thread(target=claim, args=(f"worker-{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == list(range(300))
+
+
+def test_expired_claims_return_to_the_queue(db_factory):
+    db_connection = insert_medicines(db_factory, 3)
+    started_at = datetime.now()
+    db_connection.lease_seconds = 0.2
+
+    assert len(db_connection.claim_medicines("worker-0", started_at, limit=10)) == 3
+    assert db_connection.claim_medicines("worker-1", started_at, limit=10) == []
+    time.sleep(0.3)
+    assert len(db_connection.claim_medicines("worker-1", started_at, limit=10)) == 3
+
+
+def test_pool_processes_each_medicine_once(db_factory, tmp_path):
+    db_connection = insert_medicines(db_factory, 40)
+    requests = []
+    pool = MiningWorkerPool(
+        workers=4,
+        target_count=None,
+        rate=200,
+        claim_size=3,
+        scraper_factory=lambda **kwargs: FakeScraper(requests, **kwargs),
+        db_factory=db_factory,
+        downloader=LeafletDownloader(download_dir=str(tmp_path)),
+    )
+    pool.run()
+
+    assert len(requests) == 40
+    assert max(Counter(name for name, _ in requests).values()) == 1
+    assert pool.total_processed == 40
+    assert db_connection.collection.count_documents({"processing_date": {"$exists": True}}) == 40
+    assert db_connection.collection.count_documents({"claimed_by": {"$exists": True}}) == 0
+
+
+def test_rate_limit_is_shared_by_all_workers(db_factory, tmp_path):
+    insert_medicines(db_factory, 30)
+    requests = []
+    rate = 20
+    pool = MiningWorkerPool(
+        workers=5,
+        target_count=None,
+        rate=rate,
+        burst=1,
+        claim_size=2,
+        scraper_factory=lambda **kwargs: FakeScraper(requests, **kwargs),
+        db_factory=db_factory,
+        downloader=LeafletDownloader(download_dir=str(tmp_path)),
+    )
+    pool.run()
+
+    times = sorted(t for _, t in requests)
+    assert len(times) == 30
+    # Com burst=1, as requisições de todos os workers ficam espaçadas de 1/rate segundos.
+    assert times[-1] - times[0] >= (len(times) - 1) / rate * 0.9
+    assert min(b - a for a, b in zip(times, times[1:])) >= 1 / rate * 0.5
+
+
+def test_stop_interrupts_workers_waiting_for_the_rate_limiter(db_factory, tmp_path):
+    db_connection = insert_medicines(db_factory, 10)
+    requests = []
+    pool = MiningWorkerPool(
+        workers=3,
+        target_count=None,
+        rate=0.2,
+        scraper_factory=lambda **kwargs: FakeScraper(requests, **kwargs),
+        db_factory=db_factory,
+        downloader=LeafletDownloader(download_dir=str(tmp_path)),
+    ).start()
+    time.sleep(0.5)
+
+    start_time = time.monotonic()
+    pool.stop().join()
+
+    assert time.monotonic() - start_time < 1
+    assert len(requests) == 1
+    # Os medicamentos reservados e não processados voltam para a fila.
+    assert db_connection.collection.count_documents({"claimed_by": {"$exists": True}}) == 0
+
+
+def test_rate_limiter_acquire_returns_false_when_stopped():
+    rate_limiter = RateLimiter(rate=0.1)
+    assert rate_limiter.acquire()
+
+    stop_event = threading.Event()
+    threading.Timer(0.1, stop_event.set).start()
+    start_time = time.monotonic()
+
+    assert rate_limiter.acquire(stop_event) is False
+    assert time.monotonic() - start_time < 1
+
+
+@pytest.fixture
+def selenium_scraper(bulario_server, tmp_path):
+    pytest.importorskip("selenium")
+    if not any(shutil.which(i) for i in ["google-chrome", "chromium", "chromium-browser"]):
+        pytest.skip("Chrome não está instalado.")
+    from scraper import AnvisaScraper
+
+    scraper = AnvisaScraper(
+        base_url=f"{bulario_server}/index.html",
+        downloader=LeafletDownloader(download_dir=str(tmp_path)),
+        timeout=5,
+    )
+    yield scraper
+    scraper.close()
+
+
+def test_scraper_finds_and_downloads_leaflets(selenium_scraper, bulario_server):
+    assert selenium_scraper.search_medicine("paracetamol")
+
+    links = selenium_scraper.get_leaflet_links()
+    assert links == {
+        "patient_leaflet": f"{bulario_server}/bulas/paracetamol_paciente.pdf",
+        "professional_leaflet": f"{bulario_server}/bulas/paracetamol_profissional.pdf",
+    }
+
+    path = selenium_scraper.download_pdf(links["patient_leaflet"], "PARACETAMOL_paciente.pdf")
+    with open(path, "rb") as f:
+        assert f.read().startswith(b"%PDF-")
+
+
+def test_scraper_handles_missing_results_and_leaflets(selenium_scraper):
+    assert not selenium_scraper.search_medicine("inexistente")
+
+    assert selenium_scraper.search_medicine("ibuprofeno")
+    assert selenium_scraper.get_leaflet_links()["professional_leaflet"] is None
@@ -0,0 +1,254 @@
+from datetime import datetime
+import logging
+import threading
+import time
+
+from bulario_client import create_scraper
+from database import MongoDBConnection
+from downloader import LeafletDownloader
+from rate_limiter import RateLimiter, RequestCancelled
+
+
+def default_log(level, message):
+    logging.log(getattr(logging, level), message)
+
+
+def process_medicine(scraper, db_connection, medicine, log=default_log, job_id=None):
+    """
+    Busca e baixa as bulas de um medicamento e grava o resultado (em lote, ver queue_update),
+    marcado com o `job_id` que o processou. Retorna True se alguma bula foi encontrada.
+    """
+    product_name = medicine.get("product_name")
+    medicine_id = medicine.get("_id")
+    processed_by = {"processed_by": job_id} if job_id else {}
+
+    if not product_name:
+        log("WARNING", f"Medicamento com ID {medicine_id} não possui product_name. Pulando.")
+        db_connection.queue_update(medicine_id, {"founded": False, "processing_date": datetime.now(), **processed_by})
+        return False
+
+    log("INFO", f"Processando medicamento: {product_name} (ID: {medicine_id})")
+
+    founded = False
+    patient_leaflet_path = None
+    professional_leaflet_path = None
+
+    try:
+        if scraper.search_medicine(product_name):
+            leaflet_links = scraper.get_leaflet_links()
+
+            if leaflet_links["professional_leaflet"]:
+                professional_leaflet_path = scraper.download_pdf(leaflet_links["professional_leaflet"], f"{product_name}_profissional.pdf")
+                log("INFO", f"Bula profissional baixada para {product_name}: {professional_leaflet_path}")
+                founded = True
+
+            if leaflet_links["patient_leaflet"]:
+                patient_leaflet_path = scraper.download_pdf(leaflet_links["patient_leaflet"], f"{product_name}_paciente.pdf")
+                log("INFO", f"Bula paciente baixada para {product_name}: {patient_leaflet_path}")
+                founded = True
+
+        update_data = {
+            "founded": founded,
+            "processing_date": datetime.now(),
+            **processed_by
+        }
+        if patient_leaflet_path:
+            update_data["patient_leaflet"] = patient_leaflet_path
+        if professional_leaflet_path:
+            update_data["professional_leaflet"] = professional_leaflet_path
+
+        db_connection.queue_update(medicine_id, update_data)
+        if founded:
+            log("INFO", f"Bula(s) encontrada(s) e dados atualizados para {product_name}.")
+        else:
+            log("INFO", f"Nenhuma bula encontrada para {product_name}.")
+        return founded
+
+    except RequestCancelled:
+        # Mineração interrompida: o medicamento não é marcado como processado e volta para a fila.
+        raise
+    except Exception as e:
+        log("ERROR", f"Erro ao processar {product_name} (ID: {medicine_id}): {e}")
+        db_connection.queue_update(medicine_id, {"founded": False, "processing_date": datetime.now(), **processed_by})
+        return False
+
+
+class WorkerStats:
+    """Estatísticas de um worker: medicamentos processados, bulas encontradas, erros e vazão."""
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.processed = 0
+        self.found = 0
+        self.busy_time = 0.0
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.current_medicine = None
+
+    @property
+    def elapsed_time(self):
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self):
+        # Medicamentos processados por minuto.
+        return 60 * self.processed / self.elapsed_time if self.elapsed_time else 0.0
+
+    def to_dict(self):
+        return {
+            "worker_id": self.worker_id,
+            "processed": self.processed,
+            "found": self.found,
+            "current_medicine": self.current_medicine,
+            "elapsed_time": round(self.elapsed_time, 1),
+            "avg_time": round(self.busy_time / self.processed, 2) if self.processed else None,
+            "throughput_per_minute": round(self.throughput, 2),
+        }
+
+
+class MiningWorkerPool:
+    """
+    Pool de workers de mineração, cada um com a sua própria sessão de consulta ao bulário
+    (cliente HTTP ou navegador, ver create_scraper).
+    Os medicamentos são reservados atomicamente no MongoDB (fila de trabalho), em lotes de
+    `claim_size` (a reserva do lote é renovada na metade de `lease_seconds`), os resultados são gravados em lote (bulk_write) e todas as sessões
+    compartilham um único limitador de requisições, no lugar das pausas fixas de cada worker, e um
+    único LeafletDownloader, que limita a quantidade de downloads simultâneos.
+    A mineração termina quando `target_count` bulas foram encontradas (contando as já existentes,
+    ou a partir de `found_count`; None processa toda a fila), a fila acaba ou `stop()` é chamado;
+    `stop()` interrompe inclusive os workers que aguardam a vez no limitador.
+    Para retomar uma mineração (ver job_queue), `started_at` e `found_count` são os do início e
+    do último checkpoint, e as reservas dos workers são identificadas pelo `job_id`.
+    `get_concurrent_jobs` retorna os jobs executados ao mesmo tempo que este (ver job_queue): os
+    medicamentos que eles processaram não são reservados novamente, mesmo antes de `started_at`.
+    """
+
+    def __init__(self, workers=2, target_count=50, rate=0.5, burst=1, max_downloads=4, claim_size=5,
+                 scraper_factory=create_scraper, db_factory=MongoDBConnection, log=default_log,
+                 rate_limiter=None, downloader=None, job_id=None, started_at=None, found_count=None,
+                 stop_event=None, get_concurrent_jobs=None):
+        self.workers = workers
+        self.claim_size = claim_size
+        self.target_count = target_count
+        # O limitador e o downloader podem ser compartilhados entre vários pools (jobs simultâneos).
+        self.rate_limiter = rate_limiter or RateLimiter(rate=rate, burst=burst)
+        self.downloader = downloader or LeafletDownloader(
+            max_concurrent=max_downloads, rate_limiter=self.rate_limiter, headers={"Authorization": "Guest"}
+        )
+        self.job_id = job_id
+        self.get_concurrent_jobs = get_concurrent_jobs
+        self.scraper_factory = scraper_factory
+        self.db_factory = db_factory
+        self.log = log
+        self.stop_event = stop_event or threading.Event()
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.threads = []
+        self.found_count = found_count
+        self.started_at = started_at
+        self.db_connection = None
+
+    @property
+    def is_running(self):
+        return any(thread.is_alive() for thread in self.threads)
+
+    @property
+    def total_processed(self):
+        return sum(stats.processed for stats in list(self.stats.values()))
+
+    def get_worker_id(self, i):
+        return f"{self.job_id}/worker-{i}" if self.job_id else f"worker-{i}"
+
+    def start(self):
+        self.started_at = self.started_at or datetime.now()
+        # Conexão (pool do pymongo) e buffer de atualizações compartilhados pelos workers.
+        self.db_connection = self.db_factory(flush_size=max(self.workers, 10))
+        if self.found_count is None:
+            self.found_count = self.db_connection.count_founded_medicines()
+        self.log("INFO", f"Iniciando {self.workers} workers. {self.found_count} bulas já foram encontradas.")
+        self.threads = [
+            threading.Thread(target=self.run_worker, args=(self.get_worker_id(i),), daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def join(self):
+        for thread in self.threads:
+            thread.join()
+        self.db_connection.close()
+        self.log("INFO", f"Mineração concluída: {self.found_count} bulas encontradas.")
+        for stats in self.stats.values():
+            self.log("INFO", f"{stats.worker_id}: {stats.to_dict()}")
+        self.log("INFO", f"Downloads: {self.downloader.stats.to_dict()}")
+        return self
+
+    def run(self):
+        return self.start().join()
+
+    def stop(self):
+        self.stop_event.set()
+        return self
+
+    def target_reached(self):
+        if self.target_count is None:
+            return False
+        with self.lock:
+            return self.found_count >= self.target_count
+
+    def run_worker(self, worker_id):
+        stats = self.stats[worker_id] = WorkerStats(worker_id)
+        db_connection = self.db_connection
+        scraper = None
+        claimed = []
+        claimed_at = time.monotonic()
+        try:
+            scraper = self.scraper_factory(
+                rate_limiter=self.rate_limiter, downloader=self.downloader, stop_event=self.stop_event
+            )
+
+            while not self.stop_event.is_set() and not self.target_reached():
+                if not claimed:
+                    skip_jobs = self.get_concurrent_jobs() if self.get_concurrent_jobs else None
+                    claimed = db_connection.claim_medicines(
+                        worker_id, self.started_at, self.claim_size, skip_jobs=skip_jobs
+                    )
+                    claimed_at = time.monotonic()
+                    if not claimed:
+                        self.log("INFO", f"{worker_id}: nenhum medicamento ativo para processar.")
+                        break
+                elif time.monotonic() - claimed_at > db_connection.lease_seconds / 2:
+                    # Com o limitador disputado por vários workers e jobs, processar o lote pode
+                    # demorar mais do que a reserva: ela é renovada antes de expirar.
+                    db_connection.renew_lease(worker_id, [i["_id"] for i in claimed])
+                    claimed_at = time.monotonic()
+
+                medicine = claimed.pop(0)
+                stats.current_medicine = medicine.get("product_name")
+                start_time = time.monotonic()
+                try:
+                    founded = process_medicine(scraper, db_connection, medicine, self.log, self.job_id)
+                except RequestCancelled:
+                    claimed.insert(0, medicine)
+                    break
+                stats.busy_time += time.monotonic() - start_time
+                stats.processed += 1
+                stats.current_medicine = None
+
+                if founded:
+                    stats.found += 1
+                    with self.lock:
+                        self.found_count += 1
+                    self.log("INFO", f"{worker_id}: total de bulas encontradas: {self.found_count}")
+
+        except Exception as e:
+            self.log("ERROR", f"{worker_id}: erro crítico na mineração: {e}")
+        finally:
+            if claimed:
+                # Medicamentos reservados e não processados voltam para a fila.
+                db_connection.release_medicines([i["_id"] for i in claimed])
+            stats.current_medicine = None
+            stats.finished_at = time.monotonic()
+            if scraper is not None:
+                scraper.close()
@@ -0,0 +1,276 @@
+import csv
+from dataclasses import dataclass, field
+import heapq
+import logging
+from pathlib import Path
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from langchain_core.embeddings import Embeddings
+import numpy as np
+
+from src.agents.request_extractor import normalize_text
+from src.config import CATALOG_DIR, CATALOG_TOP_K, CATALOG_USE_EMBEDDINGS
+from src.constants import ALL_BRAZILIAN_UF, CATMAT_CODE
+
+_log = logging.getLogger(__name__)
+
+
+def get_trigrams(text: str) -> List[str]:
+    """
+    Retorna os trigramas das palavras do texto normalizado. Cada palavra é delimitada por espaços,
+    de forma que o início e o fim das palavras também são comparados.
+
+    Args:
+        text (str): Texto.
+
+    Returns:
+        List[str]: Trigramas sem repetição.
+    """
+
+    trigrams = set()
+    for word in normalize_text(text).split():
+        word = f" {word} "
+        trigrams.update(word[i : i + 3] for i in range(len(word) - 2))
+    return list(trigrams)
+
+
+def read_csv(path: Union[str, Path]) -> List[Dict[str, str]]:
+    with open(path, encoding="utf-8", newline="") as file:
+        return list(csv.DictReader(file))
+
+
+@dataclass
+class CatalogEntry:
+    """
+    Item de um catálogo: código, nome pesquisado, descrição apresentada ao LLM e nomes
+    alternativos também pesquisados (ex.: "esomeprazol" para "Esomeprazol, Magnésio").
+    """
+
+    code: str
+    name: str
+    description: str
+    aliases: List[str] = field(default_factory=list)
+
+
+@dataclass
+class CatalogIndex:
+    """
+    Classe responsável pela busca aproximada em um catálogo de códigos.
+    Os nomes são indexados por trigramas (índice invertido); a pontuação de um item é a fração dos
+    trigramas do seu nome (ou de um nome alternativo) presentes na pergunta, o que tolera erros de
+    digitação e acentos. Com um modelo de embeddings, a similaridade de cosseno entre a pergunta e
+    os nomes também é considerada.
+    O custo da busca depende dos trigramas da pergunta e não do tamanho do catálogo inteiro.
+
+    Args:
+        entries (List[CatalogEntry]): Itens do catálogo.
+        embeddings (Optional[Embeddings], optional): Modelo de embeddings para a busca semântica. Defaults to None.
+        min_score (float, optional): Pontuação mínima dos candidatos. Defaults to 0.6.
+    """
+
+    entries: List[CatalogEntry]
+    embeddings: Optional[Embeddings] = None
+    min_score: float = 0.6
+
+    postings: Dict[str, np.ndarray] = field(init=False, default_factory=dict)
+    trigram_counts: np.ndarray = field(init=False, default=None)
+    term_entries: np.ndarray = field(init=False, default=None)
+    vectors: np.ndarray = field(init=False, default=None)
+    lock: Any = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        # Cada nome (principal ou alternativo) é um termo do índice, associado ao seu item.
+        postings: Dict[str, List[int]] = {}
+        counts, term_entries = [], []
+        for idx, entry in enumerate(self.entries):
+            for name in [entry.name, *entry.aliases]:
+                trigrams = get_trigrams(name)
+                for trigram in trigrams:
+                    postings.setdefault(trigram, []).append(len(term_entries))
+                counts.append(len(trigrams))
+                term_entries.append(idx)
+
+        self.postings = {key: np.asarray(value, dtype=np.int64) for key, value in postings.items()}
+        self.trigram_counts = np.maximum(np.asarray(counts, dtype=np.float32), 1)
+        self.term_entries = np.asarray(term_entries, dtype=np.int64)
+
+    def search(self, question: str, k: int = CATALOG_TOP_K) -> List[Tuple[CatalogEntry, float]]:
+        """
+        Retorna os `k` itens mais próximos da pergunta.
+
+        Args:
+            question (str): Pergunta do usuário.
+            k (int, optional): Quantidade de candidatos. Defaults to CATALOG_TOP_K.
+
+        Returns:
+            List[Tuple[CatalogEntry, float]]: Itens e pontuações, da maior para a menor.
+        """
+
+        if not self.entries:
+            return []
+
+        matched = [self.postings[i] for i in get_trigrams(question) if i in self.postings]
+        scores = np.zeros(len(self.entries), dtype=np.float32)
+        if matched:
+            term_scores = np.bincount(np.concatenate(matched), minlength=len(self.term_entries))
+            np.maximum.at(scores, self.term_entries, term_scores / self.trigram_counts)
+
+        if self.embeddings is not None:
+            scores = np.maximum(scores, self.semantic_scores(question))
+
+        candidates = np.flatnonzero(scores >= self.min_score)
+        best = heapq.nlargest(k, candidates, key=lambda i: scores[i])
+        return [(self.entries[i], float(scores[i])) for i in best]
+
+    def semantic_scores(self, question: str) -> np.ndarray:
+        with self.lock:
+            if self.vectors is None:
+                start_time = time.perf_counter()
+                vectors = np.asarray(
+                    self.embeddings.embed_documents([i.name for i in self.entries]),
+                    dtype=np.float32,
+                )
+                self.vectors = vectors / np.maximum(
+                    np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12
+                )
+                _log.info(
+                    f"{len(self.entries)} catalog entries embedded in "
+                    f"{time.perf_counter() - start_time:.2f}s."
+                )
+
+        query = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        return self.vectors @ (query / max(np.linalg.norm(query), 1e-12))
+
+
+@dataclass
+class HorusCatalog:
+    """
+    Classe responsável pelos catálogos utilizados na extração dos parâmetros da API Hórus:
+    itens CATMAT, UFs e municípios do IBGE. Em vez de incluir os catálogos inteiros no prompt,
+    somente os `top_k` candidatos mais próximos da pergunta são apresentados ao LLM, de forma que
+    o tamanho do prompt não cresce com o catálogo. As UFs (27 no máximo) são sempre incluídas.
+
+    Os arquivos CSV (UTF-8) são lidos de `catalog_dir`; sem eles, as listas de src.constants são
+    utilizadas:
+    - catmat.csv: codigo_catmat, principio_ativo, concentracao, forma_farmaceutica, unidade_fornecimento
+    - ibge_uf.csv: codigo, nome, sigla
+    - ibge_municipios.csv: codigo_municipio, municipio, codigo_uf
+
+    Args:
+        catalog_dir (Union[str, Path], optional): Diretório dos catálogos. Defaults to CATALOG_DIR.
+        embeddings (Optional[Embeddings], optional): Modelo de embeddings para a busca semântica. Defaults to None.
+        top_k (int, optional): Quantidade de candidatos de cada catálogo incluídos no prompt. Defaults to CATALOG_TOP_K.
+    """
+
+    catalog_dir: Union[str, Path] = CATALOG_DIR
+    embeddings: Optional[Embeddings] = None
+    top_k: int = CATALOG_TOP_K
+
+    uf_rows: List[Dict] = field(init=False, default_factory=list)
+    catmat_rows: List[Dict] = field(init=False, default_factory=list)
+    municipality_rows: List[Dict] = field(init=False, default_factory=list)
+    catmat_index: CatalogIndex = field(init=False, default=None)
+    municipality_index: CatalogIndex = field(init=False, default=None)
+
+    def __post_init__(self):
+        start_time = time.perf_counter()
+        catalog_dir = Path(self.catalog_dir)
+        self.uf_rows = self.load(catalog_dir / "ibge_uf.csv", ALL_BRAZILIAN_UF)
+        self.catmat_rows = self.load(catalog_dir / "catmat.csv", CATMAT_CODE)
+        self.municipality_rows = self.load(catalog_dir / "ibge_municipios.csv", [])
+
+        siglas = {str(i["codigo"]): i["sigla"] for i in self.uf_rows}
+        self.catmat_index = CatalogIndex(
+            entries=[
+                CatalogEntry(
+                    code=i["codigo_catmat"],
+                    name=i["principio_ativo"],
+                    aliases=[i["principio_ativo"].split(",")[0]],
+                    description=", ".join(
+                        f"{key} = {i[key]}"
+                        for key in ["concentracao", "forma_farmaceutica", "unidade_fornecimento"]
+                        if i.get(key)
+                    ),
+                )
+                for i in self.catmat_rows
+            ],
+            embeddings=self.embeddings,
+        )
+        self.municipality_index = CatalogIndex(
+            entries=[
+                CatalogEntry(
+                    code=str(i["codigo_municipio"]),
+                    name=i["municipio"],
+                    description=f"UF = {siglas.get(str(i['codigo_uf']), i['codigo_uf'])}",
+                )
+                for i in self.municipality_rows
+            ],
+            embeddings=self.embeddings,
+        )
+        _log.info(
+            f"Horus catalog loaded in {time.perf_counter() - start_time:.2f}s: "
+            f"{len(self.catmat_rows)} CATMAT items, {len(self.uf_rows)} UFs, "
+            f"{len(self.municipality_rows)} municipalities."
+        )
+
+    def load(self, path: Path, default: List[Dict]) -> List[Dict]:
+        if path.exists():
+            return read_csv(path)
+        return list(default)
+
+    def get_prompt_context(self, question: str) -> Dict[str, str]:
+        """
+        Retorna os candidatos de cada catálogo para a pergunta, no formato do prompt de extração.
+
+        Args:
+            question (str): Pergunta do usuário.
+
+        Returns:
+            Dict[str, str]: Textos das variáveis `ibge_code_for_brazilian_uf`, `ibge_code_for_municipality` e `catmat_code`.
+        """
+
+        ufs = "\n".join(
+            f"- Nome do Estado (UF) = {i['nome']}, Sigla = {i['sigla']}, "
+            f"Código IBGE = {i['codigo']}"
+            for i in self.uf_rows
+        )
+        municipalities = "\n".join(
+            f"- Município = {entry.name}, {entry.description}, Código IBGE = {entry.code}"
+            for entry, _ in self.municipality_index.search(question, self.top_k)
+        )
+        catmat = "\n".join(
+            f"- Princípio ativo = {entry.name}"
+            + (f", {entry.description}" if entry.description else "")
+            + f", Código CATMAT = {entry.code}"
+            for entry, _ in self.catmat_index.search(question, self.top_k)
+        )
+        return {
+            "ibge_code_for_brazilian_uf": ufs,
+            "ibge_code_for_municipality": municipalities or "- Nenhum município encontrado.",
+            "catmat_code": catmat or "- Nenhum item encontrado.",
+        }
+
+
+_CATALOG: HorusCatalog = None
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_horus_catalog(embeddings: Optional[Embeddings] = None) -> HorusCatalog:
+    """
+    Retorna o catálogo compartilhado pelo processo, carregando-o na primeira chamada.
+
+    Args:
+        embeddings (Optional[Embeddings], optional): Modelo de embeddings, utilizado quando CATALOG_USE_EMBEDDINGS é True. Defaults to None.
+
+    Returns:
+        HorusCatalog: Catálogos CATMAT e IBGE.
+    """
+
+    global _CATALOG
+    if _CATALOG is None:
+        with _CATALOG_LOCK:
+            if _CATALOG is None:
+                _CATALOG = HorusCatalog(embeddings=embeddings if CATALOG_USE_EMBEDDINGS else None)
+    return _CATALOG
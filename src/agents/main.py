@@ -1,53 +1,211 @@
+from collections import OrderedDict
 from dataclasses import dataclass, field
+import threading
+from typing import Any, AsyncIterator, Dict, List
 
-from langchain.agents import AgentType, initialize_agent
+from langchain.agents import AgentType, Tool, initialize_agent
 from langchain.agents.agent import AgentExecutor
 from langchain.memory import ConversationSummaryMemory
 
 from src.agents.tools.tools import MyTools
-from src.config import EMBEDDING_PROVIDER, LLM_MAX_TOKENS, LLM_PROVIDER, LLM_TEMPERATURE
+from src.config import (
+    AGENT_MAX_SESSIONS,
+    EMBEDDING_PROVIDER,
+    LLM_MAX_TOKENS,
+    LLM_PROVIDER,
+    LLM_TEMPERATURE,
+)
 from src.connetion.chat_model import LLMModel
 from src.connetion.embeddings import EmbeddingsModel
 
+DEFAULT_SESSION_ID = "default"
+
+
+@dataclass
+class FinalAnswerFilter:
+    """
+    Filtra os tokens gerados pelo LLM do agente, repassando somente a resposta final.
+    No agente conversacional ReAct, a resposta final é o texto gerado após o prefixo "AI:";
+    os passos intermediários ("Thought", "Action", ...) não são exibidos ao usuário.
+    """
+
+    ai_prefix: str = "AI"
+    buffer: str = field(init=False, default="")
+    answering: bool = field(init=False, default=False)
+
+    def reset(self):
+        self.buffer = ""
+        self.answering = False
+
+    def feed(self, token: str) -> str:
+        """
+        Recebe um token do LLM e retorna o trecho que pertence à resposta final.
+
+        Args:
+            token (str): Token gerado pelo LLM.
+
+        Returns:
+            str: Trecho da resposta final (vazio quando o token é de um passo intermediário).
+        """
+
+        if self.answering:
+            return token
+
+        self.buffer += token
+        marker = f"{self.ai_prefix}:"
+        if marker not in self.buffer:
+            return ""
+        self.answering = True
+        return self.buffer.split(marker, 1)[1].lstrip()
+
 
 @dataclass
 class MyAgent:
     """
     Classe responsável pela orquestração do agente.
+    O LLM, o modelo de embeddings e as tools (incluindo as conexões com o Neo4j) são criados uma
+    única vez e compartilhados entre as sessões; cada sessão possui somente a sua própria memória
+    de conversa.
     """
 
     llm_provider: str = LLM_PROVIDER
     llm_temperature: float = LLM_TEMPERATURE
     llm_max_tokens: int = LLM_MAX_TOKENS
     embedding_provider: str = EMBEDDING_PROVIDER
+    max_sessions: int = AGENT_MAX_SESSIONS
 
-    agent: AgentExecutor = field(init=False, default=None)
+    llm: Any = field(init=False, default=None)
+    embedding: Any = field(init=False, default=None)
+    tools: List[Tool] = field(init=False, default_factory=list)
+    sessions: OrderedDict = field(init=False, default_factory=OrderedDict)
+    lock: Any = field(init=False, default_factory=threading.Lock)
 
     def __post_init__(self):
-        llm = LLMModel(
+        self.llm = LLMModel(
             provider=self.llm_provider,
             temperature=self.llm_temperature,
             max_tokens=self.llm_max_tokens,
         ).llm
-        embedding = EmbeddingsModel(
+        self.embedding = EmbeddingsModel(
             provider=self.embedding_provider,
         ).embeddings
 
-        tools = MyTools(llm=llm, embedding=embedding).tools
+        self.tools = MyTools(llm=self.llm, embedding=self.embedding).tools
+
+    @property
+    def agent(self) -> AgentExecutor:
+        return self.get_agent(DEFAULT_SESSION_ID)
+
+    def get_agent(self, session_id: str = DEFAULT_SESSION_ID) -> AgentExecutor:
+        """
+        Retorna o agente da sessão, criando-o na primeira pergunta da sessão. Quando o limite de
+        sessões é atingido, a sessão usada há mais tempo é descartada.
+
+        Args:
+            session_id (str, optional): Identificador da sessão de conversa. Defaults to "default".
+
+        Returns:
+            AgentExecutor: Agente com a memória de conversa da sessão.
+        """
 
-        # Criando uma instância de ConversationBufferMemory para criar a memória
-        memory = ConversationSummaryMemory(
-            llm=llm, memory_key="chat_history", return_messages=True
-        )
+        with self.lock:
+            if session_id in self.sessions:
+                self.sessions.move_to_end(session_id)
+                return self.sessions[session_id]
 
-        # Intanciando o agente e passando os recursos necessários
-        self.agent = initialize_agent(
-            tools,
-            llm,
-            agent=AgentType.CONVERSATIONAL_REACT_DESCRIPTION,
-            memory=memory,
-            verbose=True,
-        )
+            # Criando uma instância de ConversationBufferMemory para criar a memória
+            memory = ConversationSummaryMemory(
+                llm=self.llm, memory_key="chat_history", return_messages=True
+            )
+
+            # Intanciando o agente e passando os recursos necessários
+            agent = initialize_agent(
+                self.tools,
+                self.llm,
+                agent=AgentType.CONVERSATIONAL_REACT_DESCRIPTION,
+                memory=memory,
+                verbose=True,
+            )
+
+            self.sessions[session_id] = agent
+            if len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+            return agent
+
+    def invoke(self, question: str, session_id: str = DEFAULT_SESSION_ID) -> str:
+        return self.get_agent(session_id).run(question)
+
+    async def astream(
+        self, question: str, session_id: str = DEFAULT_SESSION_ID
+    ) -> AsyncIterator[Dict[str, str]]:
+        """
+        Executa o agente transmitindo os eventos à medida que são gerados: o status das tools
+        (`{"type": "status", ...}`) e os tokens da resposta final (`{"type": "token", ...}`).
+
+        Args:
+            question (str): Pergunta do usuário.
+            session_id (str, optional): Identificador da sessão de conversa. Defaults to "default".
+
+        Yields:
+            Dict[str, str]: Evento com as chaves `type` e `content`.
+        """
+
+        agent = self.get_agent(session_id)
+        answer_filter = FinalAnswerFilter()
+        tool_depth = 0
+        answered = False
+        streamed = False
+
+        async for event in agent.astream_events({"input": question}, version="v2"):
+            kind = event["event"]
+
+            if kind == "on_tool_start":
+                tool_depth += 1
+                yield {"type": "status", "content": f"Consultando {event['name']}..."}
+            elif kind == "on_tool_end":
+                tool_depth -= 1
+                yield {"type": "status", "content": f"{event['name']} concluído."}
+            elif tool_depth or answered:
+                # Eventos internos das tools e chamadas ao LLM após a resposta final (ex.: resumo
+                # da memória) não são repassados.
+                continue
+            elif kind == "on_chat_model_start":
+                answer_filter.reset()
+            elif kind == "on_chat_model_stream":
+                content = event["data"]["chunk"].content
+                if isinstance(content, list):
+                    content = "".join(i.get("text", "") for i in content if isinstance(i, dict))
+                token = answer_filter.feed(content or "")
+                if token:
+                    streamed = True
+                    yield {"type": "token", "content": token}
+            elif kind == "on_chat_model_end" and answer_filter.answering:
+                answered = True
+            elif kind == "on_chain_end" and event["name"] == "AgentExecutor" and not streamed:
+                # Provedores sem suporte a streaming: a resposta final é enviada de uma vez.
+                yield {"type": "token", "content": event["data"]["output"]["output"]}
+
+
+_AGENT: MyAgent = None
+_AGENT_LOCK = threading.Lock()
+
+
+def get_agent() -> MyAgent:
+    """
+    Retorna o agente compartilhado pelo processo, criando-o na primeira chamada.
+
+    Returns:
+        MyAgent: Agente configurado com os provedores definidos nas variáveis de ambiente.
+    """
 
-    def invoke(self, question: str) -> str:
-        return self.agent.run(question)
+    global _AGENT
+    if _AGENT is None:
+        with _AGENT_LOCK:
+            if _AGENT is None:
+                _AGENT = MyAgent(
+                    llm_provider=LLM_PROVIDER,
+                    llm_temperature=LLM_TEMPERATURE,
+                    llm_max_tokens=LLM_MAX_TOKENS,
+                    embedding_provider=EMBEDDING_PROVIDER,
+                )
+    return _AGENT
@@ -1,5 +1,6 @@
 from src.constants import CATMAT_CODE_TEXT, IBGE_CODE_FOR_BRAZILIAN_UF_TEXT
 
+# Os códigos são preenchidos por pergunta, com os candidatos do catálogo (ver HorusCatalog).
 SYSTEM_TEMPLATE_STRUCTURED_OUTPUT = """
 You are an expert extraction algorithm, specialized in extract relevant information from the text 
 and return a output as specified by the provided JSON schema.
@@ -14,11 +15,18 @@ Never return a code for cities and states that are not on the list.
 IBGE code of the Brazilian States, also called Federation Unit (UF):
 {ibge_code_for_brazilian_uf}
 
-CATMAT code (Catálogo de Materiais):
+IBGE code of the Brazilian cities (municipalities) that may be mentioned in the question:
+{ibge_code_for_municipality}
+
+CATMAT code (Catálogo de Materiais) of the items that may be mentioned in the question:
 {catmat_code}
-""".format(
-    ibge_code_for_brazilian_uf=IBGE_CODE_FOR_BRAZILIAN_UF_TEXT, catmat_code=CATMAT_CODE_TEXT
-)
+"""
+
+STRUCTURED_OUTPUT_CONTEXT = {
+    "ibge_code_for_brazilian_uf": IBGE_CODE_FOR_BRAZILIAN_UF_TEXT,
+    "ibge_code_for_municipality": "- Nenhum município encontrado.",
+    "catmat_code": CATMAT_CODE_TEXT,
+}
 
 
 SYSTEM_TEMPLATE_RETRIEVER = """
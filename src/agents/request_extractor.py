@@ -0,0 +1,374 @@
+from dataclasses import dataclass, field
+from datetime import date
+import logging
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import unicodedata
+
+from src.api.schemas.request.horus import HorusMedicineStockRequest
+from src.constants import ALL_BRAZILIAN_UF, CATMAT_CODE
+
+_log = logging.getLogger(__name__)
+
+MONTHS = {
+    "janeiro": 1,
+    "fevereiro": 2,
+    "marco": 3,
+    "abril": 4,
+    "maio": 5,
+    "junho": 6,
+    "julho": 7,
+    "agosto": 8,
+    "setembro": 9,
+    "outubro": 10,
+    "novembro": 11,
+    "dezembro": 12,
+}
+
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+BR_DATE = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b")
+LONG_DATE = re.compile(rf"\b(\d{{1,2}}) de ({'|'.join(MONTHS)}) de (\d{{4}})\b")
+
+# Indícios de datas em formatos não suportados (ex.: "em março de 2024", "21/02") ou relativas
+# (ex.: "hoje", "semana passada"): nesses casos a extração fica com o LLM.
+RELATIVE_DATES = [
+    "hoje",
+    "ontem",
+    "anteontem",
+    "amanha",
+    "atual",
+    "atualmente",
+    "agora",
+    "recente",
+    "recentemente",
+    "semana",
+    "mes",
+    "ano",
+    "passado",
+    "passada",
+    "ultimo",
+    "ultima",
+    "ultimos",
+    "ultimas",
+    "proximo",
+    "proxima",
+]
+DATE_HINT = re.compile(
+    rf"\b({'|'.join(MONTHS)}|{'|'.join(RELATIVE_DATES)}|\d{{1,2}}/\d{{1,2}}|(19|20)\d{{2}})\b"
+)
+
+CITY_HINT = re.compile(r"\b(cidade|cidades|municipio|municipios|prefeitura)\b")
+
+# Nome próprio após uma preposição de lugar (ex.: "em Uberlândia", "no Triângulo Mineiro"):
+# quando não é uma UF nem um item conhecido, a extração fica com o LLM.
+PLACE_HINT = re.compile(r"\b(?:em|no|na|nos|nas|para|pelo|pela)\s+([^\W\d_][\w-]*)", re.IGNORECASE)
+
+CATMAT_CODE_PATTERN = re.compile(r"\bBR\d{7}(-\d)?\b", re.IGNORECASE)
+UF_SIGLA_PATTERN = re.compile(r"\b[A-Z]{2}\b")
+
+
+def normalize_text(text: str, lower: bool = True) -> str:
+    """
+    Remove os acentos e a pontuação e converte o texto para minúsculas.
+
+    Args:
+        text (str): Texto.
+        lower (bool, optional): Converte o texto para minúsculas. Defaults to True.
+
+    Returns:
+        str: Texto normalizado.
+    """
+
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(i for i in text if not unicodedata.combining(i))
+    if lower:
+        text = text.lower()
+    return " ".join(re.sub(r"[^\w/-]+", " ", text).split())
+
+
+@dataclass
+class TokenTrie:
+    """
+    Árvore de prefixos sobre sequências de palavras. Encontra, em uma única passada pelo texto,
+    as ocorrências mais longas dos termos cadastrados (ex.: "sao paulo", "esomeprazol magnesio").
+    Um termo pode ter mais de um valor (ex.: o mesmo princípio ativo em concentrações diferentes).
+    """
+
+    root: Dict = field(default_factory=dict)
+
+    def add(self, term: str, value: Any):
+        node = self.root
+        for token in normalize_text(term).split():
+            node = node.setdefault(token, {})
+        node.setdefault(None, set()).add(value)
+        return self
+
+    def find_all(self, tokens: List[str]) -> List[Tuple[int, int, Any]]:
+        """
+        Retorna as ocorrências dos termos, sem sobreposição, priorizando as mais longas.
+
+        Args:
+            tokens (List[str]): Palavras normalizadas do texto.
+
+        Returns:
+            List[Tuple[int, int, Any]]: Início, fim e valores de cada ocorrência.
+        """
+
+        matches = []
+        i = 0
+        while i < len(tokens):
+            node, end, values = self.root, None, None
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if None in node:
+                    end, values = j + 1, node[None]
+            if end is None:
+                i += 1
+            else:
+                matches.append((i, end, values))
+                i = end
+        return matches
+
+
+@dataclass
+class ExtractionStats:
+    """
+    Estatísticas do extrator: perguntas resolvidas pelas regras e pelo LLM.
+    """
+
+    rule_hits: int = 0
+    llm_fallbacks: int = 0
+    rule_time: float = 0.0
+    llm_time: float = 0.0
+    lock: Any = field(default_factory=threading.Lock, repr=False)
+
+    def record_rule(self, elapsed_time: float, hit: bool):
+        with self.lock:
+            self.rule_time += elapsed_time
+            self.rule_hits += int(hit)
+
+    def record_llm(self, elapsed_time: float):
+        with self.lock:
+            self.llm_fallbacks += 1
+            self.llm_time += elapsed_time
+
+    @property
+    def latency_saved(self) -> float:
+        # Tempo médio do LLM para cada pergunta resolvida pelas regras, menos o custo das regras.
+        if not self.llm_fallbacks:
+            return 0.0
+        return max(0.0, self.rule_hits * self.llm_time / self.llm_fallbacks - self.rule_time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.rule_hits + self.llm_fallbacks
+        return {
+            "rule_hits": self.rule_hits,
+            "llm_fallbacks": self.llm_fallbacks,
+            "rule_hit_rate": self.rule_hits / total if total else 0.0,
+            "latency_saved": round(self.latency_saved, 2),
+        }
+
+
+@dataclass
+class HorusRequestExtractor:
+    """
+    Classe responsável por extrair o HorusMedicineStockRequest da pergunta sem chamar o LLM.
+    Os nomes dos estados e os princípios ativos (ALL_BRAZILIAN_UF e CATMAT_CODE) são
+    procurados em árvores de prefixos pré-compiladas, sem distinção de acentos e maiúsculas; as
+    siglas das UFs somente em maiúsculas (ex.: "SP"), para não confundir com palavras comuns; e as
+    datas por expressões regulares. Os municípios do catálogo são procurados da mesma forma, com
+    a inicial maiúscula (ex.: "Anápolis"); o nome de um município igual ao de uma UF (ex.: "São
+    Paulo") só é considerado com uma menção a cidades (ex.: "na cidade de São Paulo").
+    A extração só é usada quando é inequívoca: no máximo uma UF, um município, um item e uma
+    data, nenhum indício de data em formato não suportado ou relativa (ex.: "ontem"), nenhuma
+    menção a cidades sem um município identificado e nenhum lugar desconhecido.
+
+    Args:
+        uf_codes (List[Dict], optional): Códigos IBGE das UFs. Defaults to ALL_BRAZILIAN_UF.
+        catmat_codes (List[Dict], optional): Códigos CATMAT dos itens. Defaults to CATMAT_CODE.
+        municipality_rows (List[Dict], optional): Municípios do IBGE (codigo_municipio, municipio, codigo_uf). Defaults to [].
+    """
+
+    uf_codes: List[Dict] = field(default_factory=lambda: ALL_BRAZILIAN_UF)
+    catmat_codes: List[Dict] = field(default_factory=lambda: CATMAT_CODE)
+    municipality_rows: List[Dict] = field(default_factory=list)
+
+    uf_trie: TokenTrie = field(init=False, default_factory=TokenTrie)
+    catmat_trie: TokenTrie = field(init=False, default_factory=TokenTrie)
+    municipality_trie: TokenTrie = field(init=False, default_factory=TokenTrie)
+    uf_siglas: Dict[str, str] = field(init=False, default_factory=dict)
+    catmat_by_code: Dict[str, str] = field(init=False, default_factory=dict)
+    stats: ExtractionStats = field(init=False, default_factory=ExtractionStats)
+
+    def __post_init__(self):
+        for uf in self.uf_codes:
+            self.uf_trie.add(uf["nome"], str(uf["codigo"]))
+            self.uf_siglas[uf["sigla"]] = str(uf["codigo"])
+
+        for item in self.catmat_codes:
+            code = item["codigo_catmat"]
+            self.catmat_by_code[code.upper()] = code
+            self.catmat_trie.add(item["principio_ativo"], code)
+            # Princípios ativos compostos também são reconhecidos pelo primeiro nome
+            # (ex.: "Esomeprazol, Magnésio" -> "esomeprazol").
+            first_name = item["principio_ativo"].split(",")[0]
+            if first_name != item["principio_ativo"]:
+                self.catmat_trie.add(first_name, code)
+
+        for municipality in self.municipality_rows:
+            self.municipality_trie.add(
+                municipality["municipio"],
+                (str(municipality["codigo_municipio"]), str(municipality["codigo_uf"])),
+            )
+
+    def extract(self, question: str) -> Optional[HorusMedicineStockRequest]:
+        """
+        Extrai os parâmetros da consulta da pergunta.
+
+        Args:
+            question (str): Pergunta do usuário.
+
+        Returns:
+            Optional[HorusMedicineStockRequest]: Parâmetros da consulta ou None quando a extração não é confiável.
+        """
+
+        text = normalize_text(question)
+        tokens = text.split()
+
+        uf_matches = self.uf_trie.find_all(tokens)
+        ufs = {value for _, _, values in uf_matches for value in values}
+        ufs.update(
+            self.uf_siglas[i] for i in UF_SIGLA_PATTERN.findall(question) if i in self.uf_siglas
+        )
+
+        catmats = self.find_catmats(question, tokens)
+
+        city_hint = CITY_HINT.search(text) is not None
+        municipality_matches = self.find_municipalities(question, tokens, uf_matches, city_hint)
+        municipalities = {value for _, _, values in municipality_matches for value in values}
+        # Municípios homônimos em outras UFs são descartados quando a UF é citada.
+        if ufs:
+            municipalities = {i for i in municipalities if i[1] in ufs}
+            if municipality_matches and not municipalities:
+                return None
+
+        # Palavras reconhecidas como UF, município ou item; os demais lugares ficam com o LLM.
+        known = {
+            token
+            for start, end, _ in uf_matches
+            + municipality_matches
+            + self.catmat_trie.find_all(tokens)
+            for token in tokens[start:end]
+        }
+        known.update(normalize_text(i) for i in [*self.uf_siglas, *self.catmat_by_code])
+
+        dates, remaining = self.find_dates(text)
+
+        if len(ufs) > 1 or len(municipalities) > 1 or len(catmats) > 1 or len(dates) > 1:
+            return None
+        # Sem um município do catálogo, o município é identificado pelo LLM com os candidatos.
+        if city_hint and not municipalities:
+            return None
+        if not ufs and not municipalities and not catmats:
+            return None
+        if DATE_HINT.search(remaining):
+            return None
+        if any(
+            normalize_text(i) not in known for i in PLACE_HINT.findall(question) if i[0].isupper()
+        ):
+            return None
+
+        codigo_municipio, codigo_uf = next(iter(municipalities), (None, next(iter(ufs), None)))
+        return HorusMedicineStockRequest(
+            codigo_uf=codigo_uf,
+            codigo_municipio=codigo_municipio,
+            codigo_catmat=next(iter(catmats), None),
+            data_posicao_estoque=next(iter(dates), None),
+        )
+
+    def find_municipalities(
+        self,
+        question: str,
+        tokens: List[str],
+        uf_matches: List[Tuple[int, int, Any]],
+        city_hint: bool,
+    ) -> List[Tuple[int, int, Any]]:
+        """
+        Procura os municípios citados na pergunta.
+
+        Args:
+            question (str): Pergunta do usuário.
+            tokens (List[str]): Palavras normalizadas da pergunta.
+            uf_matches (List[Tuple[int, int, Any]]): Ocorrências das UFs na pergunta.
+            city_hint (bool): Se a pergunta menciona cidades.
+
+        Returns:
+            List[Tuple[int, int, Any]]: Início, fim e valores (código do município e da UF) de cada ocorrência.
+        """
+
+        # As palavras com maiúsculas ficam nas mesmas posições das palavras normalizadas.
+        cased_tokens = normalize_text(question, lower=False).split()
+        matches = []
+        for start, end, values in self.municipality_trie.find_all(tokens):
+            if not cased_tokens[start][:1].isupper():
+                continue
+            if not city_hint and any(
+                start < uf_end and uf_start < end for uf_start, uf_end, _ in uf_matches
+            ):
+                continue
+            matches.append((start, end, values))
+        return matches
+
+    def find_catmats(self, question: str, tokens: Optional[List[str]] = None) -> set:
+        """
+        Procura os itens do CATMAT citados na pergunta, pelo princípio ativo ou pelo código.
+
+        Args:
+            question (str): Pergunta do usuário.
+            tokens (List[str], optional): Palavras normalizadas da pergunta. Defaults to None.
+
+        Returns:
+            set: Códigos CATMAT encontrados.
+        """
+
+        if tokens is None:
+            tokens = normalize_text(question).split()
+        catmats = {value for _, _, values in self.catmat_trie.find_all(tokens) for value in values}
+        catmats.update(
+            self.catmat_by_code[i.group(0).upper()]
+            for i in CATMAT_CODE_PATTERN.finditer(question)
+            if i.group(0).upper() in self.catmat_by_code
+        )
+        return catmats
+
+    def find_dates(self, text: str) -> Tuple[set, str]:
+        """
+        Procura as datas do texto.
+
+        Args:
+            text (str): Texto normalizado.
+
+        Returns:
+            Tuple[set, str]: Datas no formato AAAA-MM-DD e o texto sem as datas encontradas.
+        """
+
+        dates = set()
+
+        def parse(parts: Iterable[int]) -> str:
+            year, month, day = parts
+            try:
+                dates.add(date(year, month, day).isoformat())
+            except ValueError:
+                # Data inválida: mantém um indício para que a extração fique com o LLM.
+                return " 2000 "
+            return " "
+
+        text = ISO_DATE.sub(lambda m: parse(map(int, m.groups())), text)
+        text = BR_DATE.sub(lambda m: parse(map(int, reversed(m.groups()))), text)
+        text = LONG_DATE.sub(
+            lambda m: parse((int(m.group(3)), MONTHS[m.group(2)], int(m.group(1)))), text
+        )
+        return dates, text
@@ -0,0 +1,220 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional
+
+from langchain_core.embeddings import Embeddings
+import numpy as np
+
+from src.config import SEMANTIC_CACHE_MAX_SIZE, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    """
+    Resposta armazenada no cache semântico.
+    """
+
+    question: str
+    embedding: np.ndarray
+    answer: str
+    context: str
+    latency: float
+    entities: FrozenSet[str] = frozenset()
+    created_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class SemanticAnswerCache:
+    """
+    Classe responsável pelo cache semântico das respostas do GraphRAG.
+    A pergunta é convertida em embedding e comparada (similaridade de cosseno) com as perguntas
+    já respondidas; acima do limiar, a resposta armazenada é retornada sem consultar o grafo nem
+    o LLM. As entradas expiram após `ttl` segundos, as menos usadas são descartadas ao atingir
+    `max_size` e todo o cache é invalidado quando a versão do grafo muda (nova ingestão).
+    Com `get_entities`, uma resposta só é reutilizada se a pergunta citar as mesmas entidades
+    (ex.: códigos CATMAT e medicamentos do grafo), de forma que perguntas quase idênticas sobre
+    medicamentos diferentes (ex.: a dose de outro medicamento) não compartilham a resposta.
+    Perguntas sem nenhuma entidade reconhecida (ex.: medicamento fora do grafo ou com erro de
+    digitação) não são consultadas nem armazenadas no cache.
+
+    Args:
+        embeddings (Embeddings): Modelo de embeddings utilizado nas perguntas.
+        get_graph_version (Callable[[], int], optional): Função que retorna a versão atual do grafo. Defaults to None.
+        get_entities (Callable[[str], Iterable[str]], optional): Função que retorna as entidades citadas na pergunta. Defaults to None.
+        threshold (float, optional): Similaridade mínima para reutilizar uma resposta. Defaults to SEMANTIC_CACHE_THRESHOLD.
+        ttl (float, optional): Tempo de vida das entradas em segundos. Defaults to SEMANTIC_CACHE_TTL.
+        max_size (int, optional): Quantidade máxima de respostas armazenadas. Defaults to SEMANTIC_CACHE_MAX_SIZE.
+        version_check_interval (float, optional): Intervalo mínimo entre as consultas da versão do grafo em segundos. Defaults to 30.
+    """
+
+    embeddings: Embeddings
+    get_graph_version: Optional[Callable[[], int]] = None
+    get_entities: Optional[Callable[[str], Iterable[str]]] = None
+    threshold: float = SEMANTIC_CACHE_THRESHOLD
+    ttl: float = SEMANTIC_CACHE_TTL
+    max_size: int = SEMANTIC_CACHE_MAX_SIZE
+    version_check_interval: float = 30
+
+    entries: OrderedDict = field(init=False, default_factory=OrderedDict)
+    lock: Any = field(init=False, default_factory=threading.Lock)
+    graph_version: Optional[int] = field(init=False, default=None)
+    version_checked_at: float = field(init=False, default=0.0)
+    hits: int = field(init=False, default=0)
+    misses: int = field(init=False, default=0)
+    bypassed: int = field(init=False, default=0)
+    latency_saved: float = field(init=False, default=0.0)
+
+    def lookup(self, question: str) -> Optional[CachedAnswer]:
+        """
+        Procura uma resposta para uma pergunta semanticamente equivalente.
+
+        Args:
+            question (str): Pergunta do usuário.
+
+        Returns:
+            Optional[CachedAnswer]: Resposta armazenada ou None quando não há pergunta similar.
+        """
+
+        start_time = time.perf_counter()
+        entities = self.find_entities(question)
+        if not self.is_cacheable(entities):
+            with self.lock:
+                self.bypassed += 1
+            return None
+
+        self.check_graph_version()
+        embedding = self.embed(question)
+        with self.lock:
+            self.remove_expired()
+            entry, similarity = self.most_similar(embedding, entities)
+            if entry is None or similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(entry.question)
+            self.hits += 1
+            self.latency_saved += max(0.0, entry.latency - (time.perf_counter() - start_time))
+
+        _log.info(
+            f"Semantic cache hit (similarity {similarity:.3f}) for {question!r}: "
+            f"{entry.question!r}. {self.stats()}"
+        )
+        return entry
+
+    def store(self, question: str, answer: str, context: str, latency: float):
+        """
+        Armazena a resposta de uma pergunta.
+
+        Args:
+            question (str): Pergunta do usuário.
+            answer (str): Resposta gerada.
+            context (str): Contexto utilizado na resposta.
+            latency (float): Tempo gasto para gerar a resposta em segundos.
+        """
+
+        entities = self.find_entities(question)
+        if not self.is_cacheable(entities):
+            return self
+
+        embedding = self.embed(question)
+        with self.lock:
+            self.entries[question] = CachedAnswer(
+                question=question,
+                embedding=embedding,
+                answer=answer,
+                context=context,
+                latency=latency,
+                entities=entities,
+            )
+            self.entries.move_to_end(question)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return self
+
+    def invalidate(self):
+        """
+        Remove todas as respostas armazenadas.
+        """
+
+        with self.lock:
+            self.entries.clear()
+        return self
+
+    def check_graph_version(self):
+        """
+        Consulta a versão do grafo (no máximo a cada `version_check_interval` segundos) e
+        invalida o cache quando ela muda.
+        """
+
+        now = time.time()
+        if self.get_graph_version is None:
+            return self
+        if now - self.version_checked_at < self.version_check_interval:
+            return self
+
+        self.version_checked_at = now
+        try:
+            version = self.get_graph_version()
+        except Exception as e:
+            _log.warning(f"Could not read graph version: {e!r}")
+            return self
+
+        if self.graph_version is not None and version != self.graph_version:
+            _log.info(
+                f"Graph version changed from {self.graph_version} to {version}, "
+                "invalidating semantic cache."
+            )
+            self.invalidate()
+        self.graph_version = version
+        return self
+
+    def embed(self, question: str) -> np.ndarray:
+        embedding = np.asarray(self.embeddings.embed_query(question.strip()), dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+
+    def find_entities(self, question: str) -> FrozenSet[str]:
+        if self.get_entities is None:
+            return frozenset()
+        return frozenset(self.get_entities(question))
+
+    def is_cacheable(self, entities: FrozenSet[str]) -> bool:
+        # Sem entidades, perguntas sobre medicamentos diferentes não podem ser distinguidas.
+        return self.get_entities is None or bool(entities)
+
+    def most_similar(self, embedding: np.ndarray, entities: FrozenSet[str] = frozenset()):
+        # Somente as respostas de perguntas com as mesmas entidades são candidatas.
+        entries = [i for i in self.entries.values() if i.entities == entities]
+        if not entries:
+            return None, 0.0
+        similarities = np.stack([i.embedding for i in entries]) @ embedding
+        best = int(np.argmax(similarities))
+        return entries[best], float(similarities[best])
+
+    def remove_expired(self):
+        expires_before = time.time() - self.ttl
+        for question in [k for k, v in self.entries.items() if v.created_at < expires_before]:
+            del self.entries[question]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna as estatísticas de uso do cache.
+
+        Returns:
+            Dict[str, Any]: Quantidade de acertos, falhas, perguntas sem entidades (não consultadas), taxa de acerto, tempo economizado e tamanho do cache.
+        """
+
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / total if total else 0.0,
+            "latency_saved": round(self.latency_saved, 2),
+            "size": len(self.entries),
+        }
@@ -1,4 +1,11 @@
-from dataclasses import dataclass
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from langchain.prompts import (
     ChatPromptTemplate,
@@ -9,20 +16,125 @@ from langchain.prompts import (
 from langchain_core.output_parsers import StrOutputParser
 
 from src.agents.prompt_templates.graph_rag import CONTEXT, SYSTEM_TEMPLATE
+from src.agents.semantic_cache import SemanticAnswerCache
+from src.config import (
+    RETRIEVAL_MAX_WORKERS,
+    RETRIEVAL_STRUCTURED_TIMEOUT,
+    RETRIEVAL_UNSTRUCTURED_TIMEOUT,
+)
 from src.connetion.chat_model import LLMModel
 from src.connetion.graph_db import KgDatabaseConnetion
 
+_log = logging.getLogger(__name__)
+
+STRUCTURED_FALLBACK = ["Não sei responder com base nos dados estruturados."]
+UNSTRUCTURED_FALLBACK = ["Não sei responder com base nos dados não estruturados."]
+
+# Threads utilizadas para executar as etapas da recuperação em paralelo (fluxos síncrono e
+# assíncrono). Uma etapa que excede o tempo não pode ser interrompida e ocupa a thread até
+# terminar: enquanto as etapas abandonadas de um tipo ocuparem metade das threads, novas
+# etapas desse tipo não são executadas (o contexto é montado somente com a outra).
+_RETRIEVAL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=RETRIEVAL_MAX_WORKERS, thread_name_prefix="graph-rag"
+)
+MAX_ABANDONED_LEGS = max(1, RETRIEVAL_MAX_WORKERS // 2)
+
+
+@dataclass
+class RetrievalMetrics:
+    """
+    Métricas de uma etapa da recuperação do GraphRAG.
+    """
+
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    skipped: int = 0
+    abandoned: int = 0
+    latency: float = 0.0
+    max_latency: float = 0.0
+    lock: Any = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, latency: float, error: bool = False):
+        # Chamado ao final da etapa, inclusive das etapas abandonadas (latência real).
+        with self.lock:
+            self.calls += 1
+            self.errors += int(error)
+            self.latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def abandon(self, future: Future):
+        # Etapa que excedeu o tempo: cancelada se ainda estiver na fila, senão contabilizada
+        # como abandonada até terminar.
+        with self.lock:
+            self.timeouts += 1
+            if future.cancel():
+                return
+            self.abandoned += 1
+        future.add_done_callback(self.release)
+
+    def release(self, future: Future):
+        with self.lock:
+            self.abandoned -= 1
+
+    def skip(self) -> bool:
+        with self.lock:
+            if self.abandoned < MAX_ABANDONED_LEGS:
+                return False
+            self.skipped += 1
+            return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "skipped": self.skipped,
+                "abandoned": self.abandoned,
+                "mean_latency": self.latency / self.calls if self.calls else 0.0,
+                "max_latency": self.max_latency,
+            }
+
+
+_RETRIEVAL_METRICS = {"structured": RetrievalMetrics(), "unstructured": RetrievalMetrics()}
+
+
+def get_retrieval_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    Retorna as métricas das etapas da recuperação do GraphRAG no processo.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Chamadas, falhas, tempos esgotados, etapas não executadas, etapas abandonadas em execução e latências (segundos) por etapa.
+    """
+
+    return {name: metrics.to_dict() for name, metrics in _RETRIEVAL_METRICS.items()}
+
 
 @dataclass
 class GraphRAG:
     """
     Classe responsável pelo GraphRAG.
+    As consultas estruturada (Cypher) e não estruturada (busca vetorial) são executadas em
+    paralelo, cada uma com seu próprio tempo máximo. Se uma delas falhar ou exceder o tempo, o
+    contexto é montado somente com a outra. As latências de cada consulta são registradas no log
+    (nível debug) e nas métricas do processo (`get_retrieval_metrics`).
+    Com um `cache` semântico, perguntas equivalentes a outras já respondidas são atendidas sem
+    consultar o grafo nem o LLM.
+
+    Args:
+        structured_timeout (float, optional): Tempo máximo da consulta estruturada em segundos. Defaults to RETRIEVAL_STRUCTURED_TIMEOUT.
+        unstructured_timeout (float, optional): Tempo máximo da busca vetorial em segundos. Defaults to RETRIEVAL_UNSTRUCTURED_TIMEOUT.
+        cache (SemanticAnswerCache, optional): Cache semântico das respostas. Defaults to None.
     """
 
     llm: LLMModel
     db: KgDatabaseConnetion
+    structured_timeout: float = RETRIEVAL_STRUCTURED_TIMEOUT
+    unstructured_timeout: float = RETRIEVAL_UNSTRUCTURED_TIMEOUT
+    cache: Optional[SemanticAnswerCache] = None
 
-    def get_context(self, question: str) -> str:
+    def get_context(self, question: str) -> Tuple[str, bool]:
         """
         Método responsável pelo fluxo de execussão do GraphRAG.
 
@@ -30,19 +142,113 @@ class GraphRAG:
             question (str):  Pergunta a ser respondida.
 
         Returns:
-            str: Resposta da pergunta.
+            Tuple[str, bool]: Contexto com os dados estruturados e não estruturados e se algum dado foi recuperado.
+        """
+
+        start_time = time.perf_counter()
+        futures = {
+            name: self._submit(name, func, question) for name, func, _, _ in self._get_legs()
+        }
+
+        results = {}
+        latencies = {}
+        for name, _, timeout, fallback in self._get_legs():
+            results[name], latencies[name] = None, 0.0
+            if futures[name] is not None:
+                remaining = max(0.0, timeout - (time.perf_counter() - start_time))
+                try:
+                    results[name], latencies[name] = futures[name].result(timeout=remaining)
+                except FutureTimeoutError:
+                    self._abandon(name, futures[name], timeout)
+                    latencies[name] = timeout
+            if results[name] is None:
+                results[name] = fallback
+
+        _log.debug(f"Retrieval latencies: {latencies}")
+        return self._format_context(results["structured"], results["unstructured"])
+
+    async def aget_context(self, question: str) -> Tuple[str, bool]:
+        """
+        Versão assíncrona do `get_context`.
+
+        Args:
+            question (str):  Pergunta a ser respondida.
+
+        Returns:
+            Tuple[str, bool]: Contexto com os dados estruturados e não estruturados e se algum dado foi recuperado.
         """
 
-        structured_data = self.db.qa_chain.search(question=question)
-        unstructured_data = self.db.vector.similarity_search(question=question)
+        latencies = {}
+
+        async def run(name: str, func: Callable, timeout: float, fallback: List[str]):
+            result, latencies[name] = None, 0.0
+            future = self._submit(name, func, question)
+            if future is not None:
+                try:
+                    result, latencies[name] = await asyncio.wait_for(
+                        asyncio.wrap_future(future), timeout
+                    )
+                except asyncio.TimeoutError:
+                    self._abandon(name, future, timeout)
+                    latencies[name] = timeout
+            return fallback if result is None else result
+
+        structured_data, unstructured_data = await asyncio.gather(
+            *[run(*leg) for leg in self._get_legs()]
+        )
+        _log.debug(f"Retrieval latencies: {latencies}")
+        return self._format_context(structured_data, unstructured_data)
+
+    def _get_legs(self):
+        return [
+            ("structured", self.db.qa_chain.search, self.structured_timeout, STRUCTURED_FALLBACK),
+            (
+                "unstructured",
+                self.db.vector.similarity_search,
+                self.unstructured_timeout,
+                UNSTRUCTURED_FALLBACK,
+            ),
+        ]
+
+    def _submit(self, name: str, func: Callable, question: str) -> Optional[Future]:
+        # Retorna None (etapa não executada) se as etapas abandonadas ocupam as threads.
+        if _RETRIEVAL_METRICS[name].skip():
+            _log.warning(f"GraphRAG {name} retrieval skipped: too many abandoned calls running.")
+            return None
+        return _RETRIEVAL_EXECUTOR.submit(self._run_leg, name, func, question)
+
+    def _abandon(self, name: str, future: Future, timeout: float):
+        _log.warning(f"GraphRAG {name} retrieval timed out after {timeout:.1f}s.")
+        _RETRIEVAL_METRICS[name].abandon(future)
+
+    def _run_leg(self, name: str, func: Callable, question: str):
+        # Retorna o resultado (None em caso de falha) e a latência da etapa.
+        start_time = time.perf_counter()
+        error = False
+        try:
+            result = func(question=question)
+        except Exception as e:
+            _log.error(f"GraphRAG {name} retrieval failed: {e!r}")
+            result, error = None, True
+        latency = time.perf_counter() - start_time
+        _RETRIEVAL_METRICS[name].record(latency, error)
+        return result, latency
 
+    def _format_context(
+        self, structured_data: List, unstructured_data: List[str]
+    ) -> Tuple[str, bool]:
+        # O contexto é retornado com a indicação de dados recuperados (respostas sem nenhum dado
+        # não são armazenadas no cache), sem estado compartilhado entre as requisições.
+        found = (
+            structured_data != STRUCTURED_FALLBACK or unstructured_data != UNSTRUCTURED_FALLBACK
+        )
         context = CONTEXT.format(
             structured_data=structured_data, unstructured_data="\n".join(unstructured_data)
         )
         print(f"\n\n Context:\n {context}")
-        return context
+        return context, found
 
-    def retriever(self, question: str) -> str:
+    def get_chain(self):
         system_template = SYSTEM_TEMPLATE
 
         system_prompt = SystemMessagePromptTemplate(
@@ -58,10 +264,77 @@ class GraphRAG:
             input_variables=["context", "question"],
             messages=messages,
         )
-        context = self.get_context(question=question)
-        prompt_template.format_messages(context=context, question=question)
 
         output_parser = StrOutputParser()
-        review_chain = prompt_template | self.llm | output_parser
+        return prompt_template | self.llm | output_parser
+
+    def get_answer(self, question: str) -> Tuple[str, str]:
+        """
+        Responde a pergunta com o contexto recuperado do grafo (ou a resposta e o contexto
+        armazenados no cache semântico para uma pergunta equivalente).
+
+        Args:
+            question (str): Pergunta a ser respondida.
+
+        Returns:
+            Tuple[str, str]: Resposta e contexto utilizado.
+        """
+
+        cached = self._get_cached(question)
+        if cached is not None:
+            return cached
+
+        start_time = time.perf_counter()
+        context, found = self.get_context(question=question)
+        answer = self.get_chain().invoke({"context": context, "question": question})
+        self._store_cached(question, answer, context, found, time.perf_counter() - start_time)
+        return answer, context
+
+    async def aget_answer(self, question: str) -> Tuple[str, str]:
+        """
+        Versão assíncrona do `get_answer`.
+
+        Args:
+            question (str): Pergunta a ser respondida.
+
+        Returns:
+            Tuple[str, str]: Resposta e contexto utilizado.
+        """
+
+        cached = await asyncio.to_thread(self._get_cached, question)
+        if cached is not None:
+            return cached
+
+        start_time = time.perf_counter()
+        context, found = await self.aget_context(question=question)
+        answer = await self.get_chain().ainvoke({"context": context, "question": question})
+        await asyncio.to_thread(
+            self._store_cached, question, answer, context, found, time.perf_counter() - start_time
+        )
+        return answer, context
+
+    def retriever(self, question: str) -> str:
+        return self.get_answer(question)[0]
+
+    async def aretriever(self, question: str) -> str:
+        return (await self.aget_answer(question))[0]
+
+    def _get_cached(self, question: str) -> Optional[Tuple[str, str]]:
+        if self.cache is None:
+            return None
+        try:
+            entry = self.cache.lookup(question)
+        except Exception as e:
+            _log.error(f"Semantic cache lookup failed: {e!r}")
+            return None
+        if entry is None:
+            return None
+        return entry.answer, entry.context
 
-        return review_chain.invoke({"context": context, "question": question})
+    def _store_cached(self, question: str, answer: str, context: str, found: bool, latency: float):
+        if self.cache is None or not found:
+            return
+        try:
+            self.cache.store(question, answer, context, latency)
+        except Exception as e:
+            _log.error(f"Semantic cache store failed: {e!r}")
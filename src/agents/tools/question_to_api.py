@@ -1,5 +1,7 @@
 from dataclasses import dataclass
-from typing import Any
+import logging
+import time
+from typing import Any, Optional
 
 from langchain.prompts import (
     ChatPromptTemplate,
@@ -10,22 +12,34 @@ from langchain.prompts import (
 from langchain_core.output_parsers import StrOutputParser
 
 from src.agents.prompt_templates.question_to_api import (
+    STRUCTURED_OUTPUT_CONTEXT,
     SYSTEM_TEMPLATE_RETRIEVER,
     SYSTEM_TEMPLATE_STRUCTURED_OUTPUT,
 )
 from src.connetion.chat_model import LLMModel
 
+_log = logging.getLogger(__name__)
+
 
 @dataclass
 class QuestionToAPI:
     """
     Classe responsável por converter a pergunta do usuário em dados estruturados para realizar uma
     consulta de API.
+    Com um `extractor`, os dados estruturados são extraídos por regras quando a pergunta é
+    inequívoca e o LLM só é chamado nos demais casos. Com um `catalog`, o prompt do LLM recebe
+    somente os códigos candidatos para a pergunta em vez das listas completas.
+
+    Args:
+        extractor (Any, optional): Extrator por regras com o método `extract(question)` e o atributo `stats`. Defaults to None.
+        catalog (Any, optional): Catálogo com o método `get_prompt_context(question)`. Defaults to None.
     """
 
     llm: LLMModel
     schema: Any
     api_func: Any
+    extractor: Optional[Any] = None
+    catalog: Optional[Any] = None
 
     def get_structured_output(self, question: str) -> Any:
         """
@@ -38,7 +52,37 @@ class QuestionToAPI:
             Any: Objeto do pydantic representando os dados estruturados.
         """
 
-        system_template = SYSTEM_TEMPLATE_STRUCTURED_OUTPUT
+        if self.extractor is not None:
+            start_time = time.perf_counter()
+            request = self.extractor.extract(question)
+            self.extractor.stats.record_rule(time.perf_counter() - start_time, request is not None)
+            if request is not None:
+                _log.info(f"Request extracted by rules. {self.extractor.stats.to_dict()}")
+                return request
+
+        start_time = time.perf_counter()
+        request = self.get_llm_structured_output(question)
+        if self.extractor is not None:
+            self.extractor.stats.record_llm(time.perf_counter() - start_time)
+        return request
+
+    def get_llm_structured_output(self, question: str) -> Any:
+        """
+        Extrai os dados estruturados com o LLM (`with_structured_output`).
+
+        Args:
+            question (str):  Pergunta a ser respondida.
+
+        Returns:
+            Any: Objeto do pydantic representando os dados estruturados.
+        """
+
+        context = (
+            self.catalog.get_prompt_context(question)
+            if self.catalog is not None
+            else STRUCTURED_OUTPUT_CONTEXT
+        )
+        system_template = SYSTEM_TEMPLATE_STRUCTURED_OUTPUT.format(**context)
         system_prompt = SystemMessagePromptTemplate(
             prompt=PromptTemplate(template=system_template)
         )
@@ -1,13 +1,19 @@
 from dataclasses import dataclass, field
-from typing import Any, List
+from typing import Any, List, Set
 
 from langchain.agents import Tool
 
+from src.agents.catalog_index import get_horus_catalog
+from src.agents.request_extractor import HorusRequestExtractor
+from src.agents.semantic_cache import SemanticAnswerCache
 from src.agents.tools.graph_rag import GraphRAG
 from src.agents.tools.question_to_api import QuestionToAPI
-from src.api.routes.routes import get_horus_medicine_stock
 from src.api.schemas.request.horus import HorusMedicineStockRequest
+from src.config import HORUS_BACKEND, SEMANTIC_CACHE_ENABLED
+from src.connetion.cypher_templates import normalize_text
 from src.connetion.graph_db import KgDatabaseConnetion
+from src.connetion.horus_client import fetch_horus_medicine_stock
+from src.connetion.horus_snapshot import query_horus_medicine_stock
 
 
 @dataclass
@@ -27,14 +33,49 @@ class MyTools:
             embedding=self.embedding,
         )
 
-        grag = GraphRAG(llm=self.llm, db=db)
+        catalog = get_horus_catalog(embeddings=self.embedding)
+        extractor = HorusRequestExtractor(
+            uf_codes=catalog.uf_rows,
+            catmat_codes=catalog.catmat_rows,
+            municipality_rows=catalog.municipality_rows,
+        )
+
+        cache = None
+        if SEMANTIC_CACHE_ENABLED:
+            template_cache = db.qa_chain.template_cache
+
+            def get_entities(question: str) -> Set[str]:
+                # Itens do CATMAT e medicamentos do grafo citados na pergunta.
+                entities = extractor.find_catmats(question)
+                if template_cache is not None:
+                    entities.update(
+                        drug for _, drug in template_cache.find_drugs(normalize_text(question))
+                    )
+                return entities
+
+            cache = SemanticAnswerCache(
+                embeddings=self.embedding,
+                get_graph_version=db.graph.get_version,
+                get_entities=get_entities,
+            )
+
+        grag = GraphRAG(llm=self.llm, db=db, cache=cache)
+        # Estoque consultado na API de dados abertos ou no snapshot local sincronizado.
+        horus_func = (
+            query_horus_medicine_stock if HORUS_BACKEND == "local" else fetch_horus_medicine_stock
+        )
         qapi = QuestionToAPI(
-            llm=self.llm, schema=HorusMedicineStockRequest, api_func=get_horus_medicine_stock
+            llm=self.llm,
+            schema=HorusMedicineStockRequest,
+            api_func=horus_func,
+            extractor=extractor,
+            catalog=catalog,
         )
 
         medicine_usage_instructions_tools = Tool(
             name="MedicineUsageInstructions",
             func=grag.retriever,
+            coroutine=grag.aretriever,
             description="Use this tool to get medicine usage instructions.",
         )
         horus_medicine_stock_tool = Tool(
@@ -1,9 +1,13 @@
 from fastapi import FastAPI
 
 import gradio as gr
+from src.api.routes.chat import router as chat_router
 from src.api.routes.routes import router
+from src.connetion.horus_client import get_horus_client
 from src.gradio.chat import chat_interface
 
 app = FastAPI()
+app.add_event_handler("shutdown", get_horus_client().aclose)
 app.include_router(router)
+app.include_router(chat_router)
 app = gr.mount_gradio_app(app, chat_interface, path="")
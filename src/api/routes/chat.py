@@ -0,0 +1,37 @@
+import json
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from src.agents.main import get_agent
+from src.api.schemas.request.chat import ChatRequest
+
+router = APIRouter()
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.get("/chat/stream", tags=["Chat"])
+async def stream_chat(request: ChatRequest = Depends()):
+    """
+    Responde a pergunta do usuário via Server-Sent Events. São enviados eventos `status` (tools em
+    execução), `token` (trechos da resposta final), `error` e, ao final, `end`.
+    """
+
+    async def event_stream():
+        try:
+            async for event in get_agent().astream(
+                request.question, session_id=request.session_id
+            ):
+                yield format_sse(event["type"], {"content": event["content"]})
+        except Exception as e:
+            yield format_sse("error", {"content": str(e)})
+        yield format_sse("end", {})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
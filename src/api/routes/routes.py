@@ -1,20 +1,36 @@
-from fastapi import APIRouter, Depends
-import requests
+from fastapi import APIRouter, Depends, HTTPException
 
+from src.agents.tools.graph_rag import get_retrieval_metrics
 from src.api.schemas.request.horus import HorusMedicineStockRequest
 from src.api.schemas.response.horus import HorusMedicineStockResponse
-from src.config import API_DADOS_ABERTOS, HORUS_ROUTE
+from src.config import HORUS_ROUTE
+from src.connetion.driver_registry import get_driver_registry
+from src.connetion.horus_client import HorusAPIError, get_horus_client
 
 router = APIRouter()
 
 
 @router.get(HORUS_ROUTE, tags=["BNAFAR"], response_model=HorusMedicineStockResponse)
-def get_horus_medicine_stock(request: HorusMedicineStockRequest = Depends()):
-    url = f"{API_DADOS_ABERTOS}{HORUS_ROUTE}"
-    params = request.model_dump(exclude_none=True)
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        return response.json()
-
-    else:
-        return f"Failed: {response.status_code}"
+async def get_horus_medicine_stock(request: HorusMedicineStockRequest = Depends()):
+    try:
+        return await get_horus_client().aget_stock(request)
+    except HorusAPIError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@router.get("/metrics/neo4j", tags=["Metrics"])
+def get_neo4j_pool_metrics():
+    """
+    Retorna as métricas dos pools de conexões do Neo4j compartilhados pelo processo.
+    """
+
+    return get_driver_registry().stats()
+
+
+@router.get("/metrics/retrieval", tags=["Metrics"])
+def get_graph_rag_retrieval_metrics():
+    """
+    Retorna as métricas das etapas (estruturada e não estruturada) da recuperação do GraphRAG.
+    """
+
+    return get_retrieval_metrics()
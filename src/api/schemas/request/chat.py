@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+
+from src.agents.main import DEFAULT_SESSION_ID
+
+
+class ChatRequest(BaseModel):
+    question: str = Field(description="Pergunta do usuário")
+    session_id: str = Field(
+        default=DEFAULT_SESSION_ID,
+        description="Identificador da sessão de conversa. Perguntas com o mesmo identificador compartilham a memória da conversa",
+    )
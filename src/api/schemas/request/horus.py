@@ -8,10 +8,10 @@ class HorusMedicineStockRequest(BaseModel):
         default=None,
         description="Filtra pelo Código IBGE da Unidade da Federação à qual pertence o estabelecimento",
     )
-    # codigo_municipio: Optional[str] = Field(
-    #     default=None,
-    #     description="Filtra pelo Código IBGE do município ao qual pertence o estabelecimento",
-    # )
+    codigo_municipio: Optional[str] = Field(
+        default=None,
+        description="Filtra pelo Código IBGE do município ao qual pertence o estabelecimento",
+    )
     # codigo_cnes: Optional[str] = Field(
     #     default=None,
     #     description="Filtra pelo Código CNES do estabelecimento",
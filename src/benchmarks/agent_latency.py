@@ -0,0 +1,87 @@
+import asyncio
+import statistics
+import time
+from typing import AsyncIterator, Callable, List, Tuple
+
+from loguru import logger
+import typer
+
+from src.agents.main import MyAgent, get_agent
+from src.config import EMBEDDING_PROVIDER, LLM_MAX_TOKENS, LLM_PROVIDER, LLM_TEMPERATURE
+
+app = typer.Typer()
+
+
+async def per_message_agent(message: str) -> AsyncIterator[str]:
+    """
+    Fluxo anterior do chat: um novo agente (LLM, embeddings, conexões com o Neo4j e chains) é
+    criado a cada mensagem e a primeira saída exibida é a resposta completa do `invoke`.
+    """
+
+    agent = MyAgent(
+        llm_provider=LLM_PROVIDER,
+        llm_temperature=LLM_TEMPERATURE,
+        llm_max_tokens=LLM_MAX_TOKENS,
+        embedding_provider=EMBEDDING_PROVIDER,
+    )
+    yield await asyncio.to_thread(agent.invoke, message, "benchmark-before")
+
+
+async def shared_agent(message: str) -> AsyncIterator[str]:
+    """
+    Fluxo atual do chat: o agente compartilhado pelo processo transmite os tokens da resposta.
+    """
+
+    async for event in get_agent().astream(message, session_id="benchmark-after"):
+        if event["type"] == "token":
+            yield event["content"]
+
+
+async def measure_turn(
+    func: Callable[[str], AsyncIterator[str]], message: str
+) -> Tuple[float, float]:
+    # Tempo até a primeira saída da resposta (time-to-first-token) e tempo total do turno.
+    start_time = time.perf_counter()
+    first_token_time = None
+    async for _ in func(message):
+        if first_token_time is None:
+            first_token_time = time.perf_counter() - start_time
+    total_time = time.perf_counter() - start_time
+    return first_token_time if first_token_time is not None else total_time, total_time
+
+
+async def measure(
+    func: Callable[[str], AsyncIterator[str]], message: str, n_turns: int
+) -> Tuple[List[float], List[float]]:
+    # Todos os turnos no mesmo event loop, como no servidor da aplicação.
+    first_token_times, total_times = [], []
+    for _ in range(n_turns):
+        first_token_time, total_time = await measure_turn(func, message)
+        first_token_times.append(first_token_time)
+        total_times.append(total_time)
+    return first_token_times, total_times
+
+
+@app.command()
+def main(
+    message: str = typer.Option("Qual a posologia do paracetamol?", help="Pergunta enviada."),
+    n_turns: int = typer.Option(3, help="Quantidade de turnos medidos em cada cenário."),
+):
+    """
+    Mede o tempo até o primeiro token da resposta de um turno do chat criando o agente a cada
+    mensagem (antes) e reutilizando o agente compartilhado pelo processo com streaming (depois).
+    Requer o Neo4j e o provedor de LLM configurados no .env.
+    """
+
+    for name, func in [("before", per_message_agent), ("after", shared_agent)]:
+        first_token_times, total_times = asyncio.run(measure(func, message, n_turns))
+        logger.info(
+            f"{name}: time to first token {first_token_times[0]:.2f}s on the first turn, "
+            f"median {statistics.median(first_token_times):.2f}s, "
+            f"min {min(first_token_times):.2f}s; "
+            f"median turn {statistics.median(total_times):.2f}s over {n_turns} turns"
+        )
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,86 @@
+import time
+from typing import List
+
+from langchain_core.documents import Document
+from loguru import logger
+import typer
+
+from src.etl.chunks import ChunksFromMarkdow
+
+app = typer.Typer()
+
+SECTION = """
+## {title}
+
+{paragraph}
+
+{paragraph}
+"""
+
+PARAGRAPH = (
+    "O medicamento deve ser administrado por via oral, com um copo de água, "
+    "preferencialmente após as refeições. Em caso de reações adversas, procure um médico. "
+)
+
+
+def build_documents(n_documents: int, n_sections: int = 12) -> List[Document]:
+    """
+    Gera documentos markdown sintéticos com o formato aproximado de uma bula.
+
+    Args:
+        n_documents (int): Quantidade de documentos.
+        n_sections (int, optional): Quantidade de seções por documento. Defaults to 12.
+
+    Returns:
+        List[Document]: Documentos markdown.
+    """
+
+    documents = []
+    for i in range(n_documents):
+        text = f"# Bula {i}\n" + "".join(
+            SECTION.format(title=f"Seção {j}", paragraph=PARAGRAPH * 3) for j in range(n_sections)
+        )
+        documents.append(Document(page_content=text, metadata={"source": f"bula_{i}.md"}))
+    return documents
+
+
+@app.command()
+def main(
+    sizes: List[int] = typer.Option([25, 50, 100, 200], help="Quantidade de documentos."),
+    max_ratio: float = typer.Option(
+        2.0, help="Razão máxima aceita entre o tempo por documento do maior e do menor N."
+    ),
+):
+    """
+    Mede o tempo de geração de chunks para N documentos e verifica se o custo cresce de forma
+    linear (tempo e quantidade de chunks por documento constantes).
+    """
+
+    chunker = ChunksFromMarkdow()
+    results = []
+    for n_documents in sizes:
+        documents = build_documents(n_documents)
+        start_time = time.perf_counter()
+        n_chunks = sum(1 for _ in chunker.iter_chunks(documents))
+        elapsed_time = time.perf_counter() - start_time
+        results.append((n_documents, n_chunks, elapsed_time))
+        logger.info(
+            f"N={n_documents}: {n_chunks} chunks ({n_chunks / n_documents:.1f}/doc) in "
+            f"{elapsed_time:.3f}s ({1000 * elapsed_time / n_documents:.2f} ms/doc)"
+        )
+
+    chunks_per_doc = {round(n_chunks / n_documents, 6) for n_documents, n_chunks, _ in results}
+    if len(chunks_per_doc) != 1:
+        logger.error(f"Chunk count is not linear in N: {sorted(chunks_per_doc)} chunks/doc.")
+        raise typer.Exit(code=1)
+
+    first, last = results[0], results[-1]
+    ratio = (last[2] / last[0]) / (first[2] / first[0])
+    logger.info(f"Time per document ratio (N={last[0]} vs N={first[0]}): {ratio:.2f}")
+    if ratio > max_ratio:
+        logger.error(f"Chunking time is growing faster than linear (ratio > {max_ratio}).")
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,102 @@
+from pathlib import Path
+import time
+from typing import List
+
+from loguru import logger
+import typer
+
+from src.config import (
+    DATA_DIR,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_LOCAL_MODEL,
+    EMBEDDING_NUM_THREADS,
+)
+from src.etl.chunks import ChunksFromMarkdow
+
+app = typer.Typer()
+
+
+def load_leaflet_chunks(leaflets_dir: Path, max_files: int) -> List[str]:
+    """
+    Converte as bulas de exemplo (pdf) em markdown e gera os chunks utilizados na ingestão.
+
+    Args:
+        leaflets_dir (Path): Diretório das bulas.
+        max_files (int): Quantidade máxima de bulas.
+
+    Returns:
+        List[str]: Textos dos chunks.
+    """
+
+    import pymupdf4llm
+
+    paths = sorted(leaflets_dir.glob("*.pdf"))[:max_files]
+    documents = [pymupdf4llm.to_markdown(str(path)) for path in paths]
+    chunks = [i.page_content for i in ChunksFromMarkdow().iter_chunks(documents)]
+    logger.info(f"{len(chunks)} chunks from {len(paths)} leaflets.")
+    return chunks
+
+
+def measure(name: str, embeddings, texts: List[str]) -> float:
+    # Aquecimento: a primeira chamada inclui a inicialização do backend.
+    embeddings.embed_documents(texts[: min(len(texts), 8)])
+    start_time = time.perf_counter()
+    embeddings.embed_documents(texts)
+    elapsed_time = time.perf_counter() - start_time
+    rate = len(texts) / elapsed_time
+    logger.info(f"{name}: {len(texts)} texts in {elapsed_time:.2f}s ({rate:.1f} sentences/s)")
+    return rate
+
+
+@app.command()
+def main(
+    leaflets_dir: Path = typer.Option(DATA_DIR / "leaflets", help="Diretório das bulas (pdf)."),
+    max_files: int = typer.Option(20, help="Quantidade máxima de bulas."),
+    model_name: str = typer.Option(
+        EMBEDDING_LOCAL_MODEL, help="Modelo do sentence-transformers (nome ou diretório)."
+    ),
+    backends: List[str] = typer.Option(
+        ["torch", "torch-int8", "onnx", "onnx-int8"], help="Backends do provedor hf-local."
+    ),
+    batch_size: int = typer.Option(EMBEDDING_BATCH_SIZE, help="Quantidade de textos por lote."),
+    num_threads: int = typer.Option(EMBEDDING_NUM_THREADS, help="Threads da inferência."),
+    processes: int = typer.Option(0, help="Processos na codificação (0 para desabilitar)."),
+):
+    """
+    Compara a taxa de embeddings (sentenças/s) do provedor atual ("hf", HuggingFaceEmbeddings)
+    com os backends do provedor "hf-local" nos chunks das bulas de exemplo.
+    """
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    from src.connetion.local_embeddings import LocalEmbeddings
+
+    texts = load_leaflet_chunks(leaflets_dir, max_files)
+    if not texts:
+        logger.error(f"No leaflets found in {leaflets_dir}.")
+        raise typer.Exit(code=1)
+
+    baseline = measure(
+        "hf (HuggingFaceEmbeddings)",
+        HuggingFaceEmbeddings(model_name=model_name),
+        texts,
+    )
+    for backend in backends:
+        try:
+            embeddings = LocalEmbeddings(
+                model_name=model_name,
+                backend=backend,
+                batch_size=batch_size,
+                num_threads=num_threads,
+                processes=processes,
+            )
+        except Exception as e:
+            logger.warning(f"hf-local ({backend}) skipped: {e!r}")
+            continue
+        rate = measure(f"hf-local ({backend})", embeddings, texts)
+        logger.info(f"hf-local ({backend}) speedup: {rate / baseline:.2f}x")
+        embeddings.close()
+
+
+if __name__ == "__main__":
+    app()
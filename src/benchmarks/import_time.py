@@ -0,0 +1,100 @@
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from loguru import logger
+import typer
+
+from src.config import PROJ_ROOT
+from src.connetion.chat_model import LLM_PROVIDERS
+from src.connetion.embeddings import EMBEDDING_PROVIDERS
+
+app = typer.Typer()
+
+# Pacotes pesados que só devem ser importados quando utilizados (provedor selecionado, ingestão).
+LAZY_MODULES = sorted(
+    {i.module for i in [*LLM_PROVIDERS.values(), *EMBEDDING_PROVIDERS.values()]}
+    | {"spacy", "sentence_transformers", "docling"}
+)
+
+# Medido com `python -X importtime -c "import src.api.main"` (Python 3.12, dependências do
+# poetry.lock, 1 CPU): 7,1 a 7,9s em 7 execuções. O orçamento tem uma folga de ~15%.
+IMPORT_TIME_BUDGET = 9.0
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def measure_import_time(module: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Importa o módulo em um novo interpretador com `python -X importtime`.
+
+    Args:
+        module (str): Módulo importado (ex.: "src.api.main").
+
+    Returns:
+        List[Tuple[str, int, int, int]]: Módulo, nível de aninhamento, tempo próprio e tempo acumulado (µs) de cada import.
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJ_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        logger.error(result.stderr.splitlines()[-1] if result.stderr else "Import failed.")
+        raise typer.Exit(code=1)
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_time, cumulative, indent, name = match.groups()
+            imports.append((name, len(indent) // 2, int(self_time), int(cumulative)))
+    return imports
+
+
+def get_package_times(imports: List[Tuple[str, int, int, int]]) -> Dict[str, int]:
+    # Tempo próprio somado por pacote de primeiro nível (ex.: "langchain_core").
+    times: Dict[str, int] = {}
+    for name, _, self_time, _ in imports:
+        package = name.split(".")[0]
+        times[package] = times.get(package, 0) + self_time
+    return times
+
+
+@app.command()
+def main(
+    module: str = typer.Option("src.api.main", help="Módulo importado."),
+    budget: float = typer.Option(
+        IMPORT_TIME_BUDGET, help="Tempo máximo de importação em segundos."
+    ),
+    top: int = typer.Option(15, help="Quantidade de pacotes exibidos."),
+):
+    """
+    Mede o tempo de importação do módulo (inicialização da API) e verifica se está dentro do
+    orçamento e se nenhum pacote pesado não utilizado (LAZY_MODULES) é importado.
+    """
+
+    imports = measure_import_time(module)
+    total = sum(cumulative for _, level, _, cumulative in imports if level == 0) / 1e6
+
+    for package, self_time in sorted(
+        get_package_times(imports).items(), key=lambda i: i[1], reverse=True
+    )[:top]:
+        logger.info(f"{package}: {self_time / 1e6:.3f}s")
+    logger.info(f"import {module}: {total:.3f}s ({len(imports)} modules, budget {budget:.1f}s)")
+
+    imported = {name for name, *_ in imports}
+    eager = [i for i in LAZY_MODULES if i in imported]
+    if eager:
+        logger.error(f"Modules that should be imported lazily: {', '.join(eager)}.")
+        raise typer.Exit(code=1)
+    if total > budget:
+        logger.error(f"Import time {total:.3f}s is over the budget of {budget:.1f}s.")
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -24,11 +24,22 @@ REPORTS_DIR = PROJ_ROOT / "reports"
 FIGURES_DIR = REPORTS_DIR / "figures"
 REPORTS_HTML_DIR = REPORTS_DIR / "html"
 
+INGESTION_CACHE_DIR = INTERIM_DATA_DIR / "ingestion_cache"
+EXTRACTION_CHECKPOINT_DIR = INTERIM_DATA_DIR / "extraction_checkpoints"
+
 
 # Load neo4j credentials (and openai api key in background).
 NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+NEO4J_WRITE_BATCH_SIZE = int(os.getenv("NEO4J_WRITE_BATCH_SIZE", 1000))
+NEO4J_MAX_CONNECTION_POOL_SIZE = int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", 50))
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", 30))
+NEO4J_LIVENESS_CHECK_TIMEOUT = float(os.getenv("NEO4J_LIVENESS_CHECK_TIMEOUT", 30))
+NEO4J_REFRESH_SCHEMA = strtobool(os.getenv("NEO4J_REFRESH_SCHEMA", "False"))
+NEO4J_SCHEMA_SNAPSHOT_PATH = Path(
+    os.getenv("NEO4J_SCHEMA_SNAPSHOT_PATH", INTERIM_DATA_DIR / "neo4j_schema.json")
+)
 
 # Load LLMs provider credential
 os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
@@ -45,9 +56,73 @@ LLM_MAX_TOKENS = os.getenv("LLM_MAX_TOKENS", None)
 LLM_MAX_TOKENS = None if LLM_MAX_TOKENS == "" else LLM_MAX_TOKENS
 
 EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "hf")
-
-API_DADOS_ABERTOS = "https://apidadosabertos.saude.gov.br"
+EMBEDDING_BACKFILL_BATCH_SIZE = int(os.getenv("EMBEDDING_BACKFILL_BATCH_SIZE", 64))
+EMBEDDING_CACHE_ENABLED = strtobool(os.getenv("EMBEDDING_CACHE_ENABLED", "True"))
+EMBEDDING_CACHE_PATH = Path(
+    os.getenv("EMBEDDING_CACHE_PATH", INTERIM_DATA_DIR / "embedding_cache.sqlite3")
+)
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 500_000))
+
+# Inferência local de embeddings (EMBEDDING_PROVIDER="hf-local").
+EMBEDDING_LOCAL_MODEL = os.getenv(
+    "EMBEDDING_LOCAL_MODEL", "sentence-transformers/all-mpnet-base-v2"
+)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+EMBEDDING_NUM_THREADS = int(os.getenv("EMBEDDING_NUM_THREADS", 0))
+EMBEDDING_PROCESSES = int(os.getenv("EMBEDDING_PROCESSES", 0))
+EMBEDDING_ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+AGENT_MAX_SESSIONS = int(os.getenv("AGENT_MAX_SESSIONS", 1000))
+
+# Tempo máximo (segundos) de cada etapa da recuperação do GraphRAG.
+RETRIEVAL_STRUCTURED_TIMEOUT = float(os.getenv("RETRIEVAL_STRUCTURED_TIMEOUT", 20))
+RETRIEVAL_UNSTRUCTURED_TIMEOUT = float(os.getenv("RETRIEVAL_UNSTRUCTURED_TIMEOUT", 10))
+# Threads compartilhadas pelas etapas da recuperação (duas por pergunta em andamento).
+RETRIEVAL_MAX_WORKERS = int(os.getenv("RETRIEVAL_MAX_WORKERS", 16))
+
+# Cache semântico das respostas do GraphRAG.
+SEMANTIC_CACHE_ENABLED = strtobool(os.getenv("SEMANTIC_CACHE_ENABLED", "True"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", 24 * 60 * 60))
+SEMANTIC_CACHE_MAX_SIZE = int(os.getenv("SEMANTIC_CACHE_MAX_SIZE", 1000))
+
+# Cache das consultas Cypher geradas pelo GraphCypherQAChain.
+CYPHER_TEMPLATE_CACHE_ENABLED = strtobool(os.getenv("CYPHER_TEMPLATE_CACHE_ENABLED", "True"))
+CYPHER_TEMPLATE_CACHE_PATH = Path(
+    os.getenv("CYPHER_TEMPLATE_CACHE_PATH", INTERIM_DATA_DIR / "cypher_templates.json")
+)
+
+# Limites da extração do grafo de conhecimento com LLM (requisições por minuto por provedor).
+EXTRACTION_MAX_IN_FLIGHT = int(os.getenv("EXTRACTION_MAX_IN_FLIGHT", 4))
+EXTRACTION_MAX_RETRIES = int(os.getenv("EXTRACTION_MAX_RETRIES", 5))
+EXTRACTION_REQUESTS_PER_MINUTE = {
+    "local": None,
+    "openai": 500,
+    "google": 15,
+    "groq": 30,
+    "hf": 60,
+}
+if os.getenv("EXTRACTION_REQUESTS_PER_MINUTE"):
+    EXTRACTION_REQUESTS_PER_MINUTE[LLM_PROVIDER] = int(os.getenv("EXTRACTION_REQUESTS_PER_MINUTE"))
+
+API_DADOS_ABERTOS = os.getenv("API_DADOS_ABERTOS", "https://apidadosabertos.saude.gov.br")
 HORUS_ROUTE = "/daf/estoque-medicamentos-bnafar-horus"
+HORUS_TIMEOUT = float(os.getenv("HORUS_TIMEOUT", 30))
+HORUS_MAX_RETRIES = int(os.getenv("HORUS_MAX_RETRIES", 3))
+HORUS_MAX_CONNECTIONS = int(os.getenv("HORUS_MAX_CONNECTIONS", 20))
+HORUS_PAGE_SIZE = int(os.getenv("HORUS_PAGE_SIZE", 20))
+HORUS_MAX_PAGES = int(os.getenv("HORUS_MAX_PAGES", 50))
+HORUS_CACHE_TTL = float(os.getenv("HORUS_CACHE_TTL", 60 * 60))
+HORUS_CACHE_MAX_SIZE = int(os.getenv("HORUS_CACHE_MAX_SIZE", 1000))
+# "api" consulta a API de dados abertos e "local" o snapshot Parquet sincronizado.
+HORUS_BACKEND = os.getenv("HORUS_BACKEND", "api")
+HORUS_SNAPSHOT_DIR = Path(os.getenv("HORUS_SNAPSHOT_DIR", EXTERNAL_DATA_DIR / "horus"))
+
+# Catálogos CATMAT e IBGE utilizados na extração dos parâmetros da API Hórus.
+CATALOG_DIR = Path(os.getenv("CATALOG_DIR", EXTERNAL_DATA_DIR / "catalog"))
+CATALOG_TOP_K = int(os.getenv("CATALOG_TOP_K", 5))
+CATALOG_USE_EMBEDDINGS = strtobool(os.getenv("CATALOG_USE_EMBEDDINGS", "False"))
 
 # If tqdm is installed, configure loguru with tqdm.write
 # https://github.com/Delgan/loguru/issues/135
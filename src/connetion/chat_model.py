@@ -1,19 +1,25 @@
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Dict
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_groq import ChatGroq
-from langchain_huggingface import ChatHuggingFace
-from langchain_ollama import ChatOllama
-from langchain_openai import ChatOpenAI
+from src.connetion.providers import Provider, get_provider
 
 # https://python.langchain.com/docs/integrations/chat/
 
+# As integrações são importadas somente quando o provedor é selecionado.
+LLM_PROVIDERS: Dict[str, Provider] = {
+    "local": Provider("langchain_ollama", "ChatOllama", "get_local_llm_model"),
+    "openai": Provider("langchain_openai", "ChatOpenAI", "get_openai_llm_model"),
+    "google": Provider("langchain_google_genai", "ChatGoogleGenerativeAI", "get_google_llm_model"),
+    "groq": Provider("langchain_groq", "ChatGroq", "get_groq_llm_model"),
+    "hf": Provider("langchain_huggingface", "ChatHuggingFace", "get_hf_llm_model"),
+}
+
 
 @dataclass
 class LLMModel:
     """
     Classe responsável por instanciar provedores de modelos LLMs.
+    Somente a integração do provedor selecionado (LLM_PROVIDERS) é importada.
     """
 
     provider: str = "local"
@@ -22,39 +28,31 @@ class LLMModel:
     llm: Any = field(init=False, default=None)
 
     def __post_init__(self):
-        if self.provider == "local":
-            self.llm = self.get_local_llm_model()
-        if self.provider == "openai":
-            self.llm = self.get_openai_llm_model()
-        if self.provider == "google":
-            self.llm = self.get_google_llm_model()
-        if self.provider == "groq":
-            self.llm = self.get_groq_llm_model()
-        if self.provider == "hf":
-            self.llm = self.get_hf_llm_model()
-
-    def get_local_llm_model(self):
-        return ChatOllama(
+        provider = get_provider(LLM_PROVIDERS, self.provider)
+        self.llm = getattr(self, provider.builder)(provider.load())
+
+    def get_local_llm_model(self, model_class: Any):
+        return model_class(
             model="tinyllama:1.1b", temperature=self.temperature, num_predict=self.max_tokens
         )
 
-    def get_openai_llm_model(self):
-        return ChatOpenAI(
+    def get_openai_llm_model(self, model_class: Any):
+        return model_class(
             model="gpt-4o-mini", temperature=self.temperature, max_tokens=self.max_tokens
         )
 
-    def get_google_llm_model(self):
-        return ChatGoogleGenerativeAI(
+    def get_google_llm_model(self, model_class: Any):
+        return model_class(
             model="gemini-1.5-flash", temperature=self.temperature, max_tokens=self.max_tokens
         )
 
-    def get_groq_llm_model(self):
-        return ChatGroq(
+    def get_groq_llm_model(self, model_class: Any):
+        return model_class(
             model="llama3-8b-8192", temperature=self.temperature, max_tokens=self.max_tokens
         )
 
-    def get_hf_llm_model(self):
-        return ChatHuggingFace(
+    def get_hf_llm_model(self, model_class: Any):
+        return model_class(
             model="mistralai/Mistral-7B-Instruct-v0.2",
             temperature=self.temperature,
             max_tokens=self.max_tokens,
@@ -0,0 +1,357 @@
+from dataclasses import dataclass, field
+import json
+import logging
+from pathlib import Path
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+import unicodedata
+
+from langchain_neo4j import Neo4jGraph
+
+from src.config import CYPHER_TEMPLATE_CACHE_PATH
+from src.connetion.graph_writer import BASE_ENTITY_LABEL
+from src.constants import ALLOWED_RELATIONSHIPS
+
+_log = logging.getLogger(__name__)
+
+# Rótulos dos nós que identificam o medicamento citado na pergunta.
+DRUG_LABELS = ["Medicamento", "Fármaco"]
+
+# Intenção das perguntas que citam um medicamento sem um relacionamento específico.
+GENERAL_INTENT = "*"
+
+# Palavras-chave (sem acentos, em minúsculas) que indicam o relacionamento consultado. Cada
+# palavra-chave é comparada com o início das palavras da pergunta.
+RELATIONSHIP_KEYWORDS = {
+    "FORNECE": ["fornece", "fornecedor", "distribui"],
+    "INTERAÇÕES": ["interage"],
+    "PERTENCE": ["pertence", "classe", "categoria"],
+    "SEMELHANTE": ["semelhante", "similar", "generico", "parecido", "substitu"],
+    "INDICAÇÕES": ["indicac", "indicado", "serve para", "para que serve", "trata"],
+    "COMPOSIÇÃO": ["composic", "compost", "principio ativo", "formula", "ingrediente"],
+    "EFICÁCIA": ["eficacia", "eficaz", "efetivo"],
+    "CONTRAINDICAÇÕES": ["contraindic", "contra indic", "nao pode tomar", "nao deve tomar"],
+    "INTERAÇÕES MEDICAMENTOSAS": ["interac", "tomar junto", "misturar", "associar"],
+    "ADVERTÊNCIAS E PRECAUÇÕES": ["advertencia", "precauc", "cuidado", "gravidez", "gestante"],
+    "REAÇÕES ADVERSAS": ["reac", "efeito colateral", "efeitos colaterais", "efeitos adversos"],
+    "ADMINISTRAÇÃO": ["administr", "posologia", "dose", "dosagem", "como tomar", "como usar"],
+    "REGISTRO": ["registro", "registrado", "anvisa"],
+    "PRODUZIDO": ["produzido", "fabricado", "fabricante", "laboratorio", "produz"],
+}
+
+# Cláusulas que alteram o grafo: consultas geradas com elas nunca são armazenadas.
+WRITE_CLAUSES = re.compile(
+    r"\b(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|LOAD\s+CSV|CALL)\b", re.IGNORECASE
+)
+
+# Literais de texto de uma consulta Cypher (ex.: 'dipirona', "febre").
+STRING_LITERAL = re.compile(r"(['\"])(?:(?!\1).)*\1")
+
+# O rótulo base das entidades permite utilizar a restrição de unicidade do id (GraphWriter).
+RELATIONSHIP_TEMPLATE = """
+MATCH (m:`{entity_label}` {{id: $drug}})-[r:`{relationship}`]-(t)
+WHERE ({drug_filter})
+RETURN m.id AS medicamento, type(r) AS relacionamento, t.id AS valor
+LIMIT $top_k
+"""
+
+
+def normalize_text(text: str) -> str:
+    """
+    Remove os acentos, converte para minúsculas e normaliza os espaços do texto.
+
+    Args:
+        text (str): Texto.
+
+    Returns:
+        str: Texto normalizado.
+    """
+
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(i for i in text if not unicodedata.combining(i))
+    return " ".join(re.sub(r"[^\w]+", " ", text.lower()).split())
+
+
+def compile_drug_pattern(names: Iterable[str]) -> Optional[re.Pattern]:
+    """
+    Compila uma única expressão com os nomes dos medicamentos. A busca é feita em cada posição
+    do texto (lookahead), de forma que nomes que começam em posições diferentes são todos
+    encontrados; na mesma posição, prevalece o nome mais longo (ex.: "dipirona sodica").
+
+    Args:
+        names (Iterable[str]): Nomes normalizados (ver normalize_text).
+
+    Returns:
+        Optional[re.Pattern]: Expressão com o nome encontrado no grupo 1 ou None sem nomes.
+    """
+
+    names = sorted((i for i in names if i), key=len, reverse=True)
+    if not names:
+        return None
+    return re.compile(rf"\b(?=({'|'.join(map(re.escape, names))})\b)")
+
+
+def get_default_templates() -> Dict[str, str]:
+    """
+    Retorna a biblioteca de templates validados, um por relacionamento permitido. Todos recebem
+    os parâmetros `$drug` e `$top_k`.
+
+    Returns:
+        Dict[str, str]: Template Cypher por intenção.
+    """
+
+    drug_filter = " OR ".join(f"m:`{label}`" for label in DRUG_LABELS)
+    return {
+        relationship: RELATIONSHIP_TEMPLATE.format(
+            entity_label=BASE_ENTITY_LABEL, relationship=relationship, drug_filter=drug_filter
+        ).strip()
+        for relationship in ALLOWED_RELATIONSHIPS
+    }
+
+
+@dataclass
+class QuestionIntent:
+    """
+    Intenção da pergunta: medicamento citado e relacionamento consultado.
+    """
+
+    drug: str
+    relationship: str = GENERAL_INTENT
+
+    @property
+    def key(self) -> str:
+        return self.relationship
+
+
+@dataclass
+class CypherTemplateCache:
+    """
+    Classe responsável pelo cache de consultas Cypher do GraphCypherQAChain.
+    A pergunta é reduzida a uma intenção (medicamento presente no grafo e relacionamento de
+    ALLOWED_RELATIONSHIPS identificado por palavras-chave). Os templates da intenção (o validado e
+    o aprendido) são executados com o medicamento como parâmetro e, se algum retorna resultados,
+    o LLM não é chamado. As consultas geradas pelo LLM que retornam resultados são parametrizadas
+    e armazenadas para as próximas perguntas com a mesma intenção.
+
+    Args:
+        graph (Neo4jGraph): Conexão com o grafo.
+        get_graph_version (Callable[[], int], optional): Função que retorna a versão atual do grafo, utilizada para recarregar os medicamentos. Defaults to None.
+        cache_path (Union[str, Path], optional): Arquivo com as consultas aprendidas. Defaults to CYPHER_TEMPLATE_CACHE_PATH.
+        top_k (int, optional): Quantidade máxima de resultados. Defaults to 10.
+        version_check_interval (float, optional): Intervalo mínimo entre as consultas da versão do grafo em segundos. Defaults to 30.
+    """
+
+    graph: Neo4jGraph
+    get_graph_version: Optional[Callable[[], int]] = None
+    cache_path: Union[str, Path] = CYPHER_TEMPLATE_CACHE_PATH
+    top_k: int = 10
+    version_check_interval: float = 30
+
+    templates: Dict[str, str] = field(init=False, default_factory=get_default_templates)
+    learned_templates: Dict[str, str] = field(init=False, default_factory=dict)
+    drugs: Dict[str, str] = field(init=False, default=None)
+    drug_pattern: Optional[re.Pattern] = field(init=False, default=None)
+    lock: Any = field(init=False, default_factory=threading.Lock)
+    graph_version: Optional[int] = field(init=False, default=None)
+    version_checked_at: float = field(init=False, default=0.0)
+    hits: int = field(init=False, default=0)
+    misses: int = field(init=False, default=0)
+    keyword_patterns: List[Tuple[str, int, re.Pattern]] = field(init=False, default_factory=list)
+
+    def __post_init__(self):
+        self.keyword_patterns = [
+            (relationship, len(keyword), re.compile(rf"\b{re.escape(keyword)}"))
+            for relationship, keywords in RELATIONSHIP_KEYWORDS.items()
+            for keyword in keywords
+        ]
+        path = Path(self.cache_path)
+        if path.exists():
+            # Templates aprendidos antes das restrições de `learn` são descartados.
+            self.learned_templates = {
+                key: template
+                for key, template in json.loads(path.read_text(encoding="utf-8")).items()
+                if key != GENERAL_INTENT and not STRING_LITERAL.search(template)
+            }
+
+    def get_intent(self, question: str) -> Optional[QuestionIntent]:
+        """
+        Identifica a intenção da pergunta.
+
+        Args:
+            question (str): Pergunta do usuário.
+
+        Returns:
+            Optional[QuestionIntent]: Intenção ou None quando a pergunta não cita um medicamento do grafo.
+        """
+
+        text = normalize_text(question)
+        drug = self.find_drug(text)
+        if drug is None:
+            return None
+
+        # A palavra-chave mais longa define o relacionamento (ex.: "contraindic" e não "indicac").
+        matches = [
+            (size, relationship)
+            for relationship, size, pattern in self.keyword_patterns
+            if pattern.search(text)
+        ]
+        relationship = max(matches)[1] if matches else GENERAL_INTENT
+        return QuestionIntent(drug=drug, relationship=relationship)
+
+    def find_drug(self, text: str) -> Optional[str]:
+        # O nome mais longo citado na pergunta (ex.: "dipirona sodica" e não "dipirona").
+        found = self.find_drugs(text)
+        return max(found)[1] if found else None
+
+    def find_drugs(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Procura os medicamentos do grafo citados no texto.
+
+        Args:
+            text (str): Texto normalizado (ver normalize_text).
+
+        Returns:
+            List[Tuple[int, str]]: Tamanho do nome e id do nó de cada medicamento encontrado.
+        """
+
+        drugs = self.get_drugs()
+        if self.drug_pattern is None:
+            return []
+        names = {i.group(1) for i in self.drug_pattern.finditer(text)}
+        return [(len(name), drugs[name]) for name in names if name in drugs]
+
+    def get_drugs(self) -> Dict[str, str]:
+        """
+        Retorna os medicamentos do grafo indexados pelo nome normalizado. A lista é recarregada
+        quando a versão do grafo muda.
+
+        Returns:
+            Dict[str, str]: Id do nó do medicamento por nome normalizado.
+        """
+
+        self.check_graph_version()
+        if self.drugs is None:
+            labels = " OR ".join(f"n:`{label}`" for label in DRUG_LABELS)
+            rows = self.graph.query(f"MATCH (n) WHERE {labels} RETURN DISTINCT n.id AS id")
+            drugs = {normalize_text(str(i["id"])): i["id"] for i in rows if i["id"]}
+            self.drug_pattern = compile_drug_pattern(drugs)
+            self.drugs = drugs
+            _log.info(f"{len(self.drugs)} drugs loaded for Cypher template matching.")
+        return self.drugs
+
+    def check_graph_version(self):
+        now = time.time()
+        if self.get_graph_version is None:
+            return self
+        if now - self.version_checked_at < self.version_check_interval:
+            return self
+
+        self.version_checked_at = now
+        try:
+            version = self.get_graph_version()
+        except Exception as e:
+            _log.warning(f"Could not read graph version: {e!r}")
+            return self
+
+        if version != self.graph_version:
+            self.drugs = None
+        self.graph_version = version
+        return self
+
+    def get_templates(self, intent: QuestionIntent) -> List[Tuple[str, str]]:
+        templates = [("default", self.templates.get(intent.key))]
+        templates.append(("learned", self.learned_templates.get(intent.key)))
+        return [(source, template) for source, template in templates if template]
+
+    def search(self, question: str) -> Tuple[Optional[QuestionIntent], Optional[List[Dict]]]:
+        """
+        Executa o template da intenção da pergunta.
+
+        Args:
+            question (str): Pergunta do usuário.
+
+        Returns:
+            Tuple[Optional[QuestionIntent], Optional[List[Dict]]]: Intenção e resultados da consulta (None quando não há template ou a consulta não retorna resultados).
+        """
+
+        intent = self.get_intent(question)
+        for source, template in self.get_templates(intent) if intent else []:
+            params = {"drug": intent.drug, "top_k": self.top_k}
+            try:
+                context = self.graph.query(template, params=params)
+            except Exception as e:
+                _log.warning(f"Cypher {source} template for {intent.key!r} failed: {e!r}")
+                if source == "learned":
+                    with self.lock:
+                        self.learned_templates.pop(intent.key, None)
+                        self.save()
+                continue
+
+            if context:
+                self.hits += 1
+                _log.info(f"Cypher {source} template hit for {intent}. {self.stats()}")
+                return intent, context
+
+        self.misses += 1
+        return intent, None
+
+    def learn(self, intent: Optional[QuestionIntent], query: str):
+        """
+        Armazena uma consulta gerada pelo LLM que retornou resultados, substituindo o nome do
+        medicamento pelo parâmetro `$drug`. Consultas que alteram o grafo, que não citam o
+        medicamento literalmente ou que possuem outros literais de texto (ex.: um segundo
+        medicamento ou uma doença, que seriam repetidos em todas as perguntas da intenção) são
+        ignoradas, assim como as perguntas sem um relacionamento identificado (GENERAL_INTENT).
+
+        Args:
+            intent (Optional[QuestionIntent]): Intenção da pergunta.
+            query (str): Consulta Cypher gerada pelo LLM.
+        """
+
+        if intent is None or not query or WRITE_CLAUSES.search(query):
+            return self
+        if intent.relationship == GENERAL_INTENT:
+            return self
+
+        # O nome pode aparecer como está no grafo ou em minúsculas (ex.: toLower(m.id) = '...').
+        template, n_replaced = query, 0
+        for literal, param in [(intent.drug, "$drug"), (intent.drug.lower(), "toLower($drug)")]:
+            pattern = re.compile(r"(['\"])" + re.escape(literal) + r"\1")
+            template, n = pattern.subn(param, template)
+            n_replaced += n
+        if not n_replaced or STRING_LITERAL.search(template):
+            return self
+
+        with self.lock:
+            self.learned_templates[intent.key] = template
+            self.save()
+        _log.info(f"Cypher template learned for intent {intent.key!r}.")
+        return self
+
+    def save(self):
+        path = Path(self.cache_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(
+            json.dumps(self.learned_templates, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        tmp_path.replace(path)
+        return self
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna as estatísticas de uso do cache.
+
+        Returns:
+            Dict[str, Any]: Quantidade de acertos, falhas, taxa de acerto e consultas aprendidas.
+        """
+
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "learned_templates": len(self.learned_templates),
+        }
@@ -0,0 +1,216 @@
+import atexit
+from dataclasses import dataclass, field
+import functools
+import logging
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from langchain_neo4j import Neo4jGraph
+
+from src.config import (
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+    NEO4J_LIVENESS_CHECK_TIMEOUT,
+    NEO4J_MAX_CONNECTION_POOL_SIZE,
+    NEO4J_PASSWORD,
+    NEO4J_URI,
+    NEO4J_USERNAME,
+)
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolMetrics:
+    """
+    Métricas do pool de conexões de um driver do Neo4j.
+    """
+
+    acquisitions: int = 0
+    acquisition_errors: int = 0
+    acquisition_wait_time: float = 0.0
+    max_acquisition_wait_time: float = 0.0
+    lock: Any = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, wait_time: float, error: bool = False):
+        with self.lock:
+            self.acquisitions += 1
+            self.acquisition_errors += int(error)
+            self.acquisition_wait_time += wait_time
+            self.max_acquisition_wait_time = max(self.max_acquisition_wait_time, wait_time)
+
+    @property
+    def mean_acquisition_wait_time(self) -> float:
+        return self.acquisition_wait_time / self.acquisitions if self.acquisitions else 0.0
+
+
+@dataclass
+class Neo4jDriverRegistry:
+    """
+    Classe responsável pelos drivers do Neo4j compartilhados pelo processo.
+    Cada combinação de endereço e usuário possui um único `Neo4jGraph` (e portanto um único
+    driver e pool de conexões), reutilizado pelas classes Graph, Vector e QAChain de todas as
+    instâncias de KgDatabaseConnetion.
+
+    Args:
+        max_connection_pool_size (int, optional): Quantidade máxima de conexões do pool. Defaults to NEO4J_MAX_CONNECTION_POOL_SIZE.
+        connection_acquisition_timeout (float, optional): Tempo máximo de espera por uma conexão livre em segundos. Defaults to NEO4J_CONNECTION_ACQUISITION_TIMEOUT.
+        liveness_check_timeout (float, optional): Conexões ociosas há mais tempo que este valor (em segundos) são testadas antes do uso. Defaults to NEO4J_LIVENESS_CHECK_TIMEOUT.
+    """
+
+    max_connection_pool_size: int = NEO4J_MAX_CONNECTION_POOL_SIZE
+    connection_acquisition_timeout: float = NEO4J_CONNECTION_ACQUISITION_TIMEOUT
+    liveness_check_timeout: float = NEO4J_LIVENESS_CHECK_TIMEOUT
+
+    graphs: Dict[Tuple[str, str], Neo4jGraph] = field(init=False, default_factory=dict)
+    metrics: Dict[Tuple[str, str], PoolMetrics] = field(init=False, default_factory=dict)
+    lock: Any = field(init=False, default_factory=threading.Lock)
+
+    def get_graph(
+        self,
+        url: str = NEO4J_URI,
+        username: str = NEO4J_USERNAME,
+        password: str = NEO4J_PASSWORD,
+    ) -> Neo4jGraph:
+        """
+        Retorna a conexão compartilhada com o grafo, criando-a na primeira chamada.
+        A conexão é criada sem introspecção do schema (ver SchemaSnapshot).
+
+        Args:
+            url (str, optional): Endereço do banco. Defaults to NEO4J_URI.
+            username (str, optional): Usuário. Defaults to NEO4J_USERNAME.
+            password (str, optional): Senha. Defaults to NEO4J_PASSWORD.
+
+        Returns:
+            Neo4jGraph: Conexão com o grafo.
+        """
+
+        key = (url, username)
+        graph = self.graphs.get(key)
+        if graph is not None:
+            return graph
+
+        with self.lock:
+            if key not in self.graphs:
+                graph = Neo4jGraph(
+                    url=url,
+                    username=username,
+                    password=password,
+                    refresh_schema=False,
+                    enhanced_schema=True,
+                    driver_config={
+                        "max_connection_pool_size": self.max_connection_pool_size,
+                        "connection_acquisition_timeout": self.connection_acquisition_timeout,
+                        "liveness_check_timeout": self.liveness_check_timeout,
+                    },
+                )
+                self.metrics[key] = PoolMetrics()
+                self.instrument(graph, self.metrics[key])
+                self.graphs[key] = graph
+                _log.info(
+                    f"Neo4j driver created for {url} (pool size {self.max_connection_pool_size})."
+                )
+            return self.graphs[key]
+
+    def instrument(self, graph: Neo4jGraph, metrics: PoolMetrics):
+        """
+        Mede o tempo de espera de cada aquisição de conexão do pool do driver. O pool não faz
+        parte da API pública do driver: sem ele, somente as métricas de aquisição ficam zeradas.
+        """
+
+        pool = get_driver_pool(graph)
+        if not callable(getattr(pool, "acquire", None)):
+            _log.warning("Neo4j driver pool not found, acquisition metrics disabled.")
+            return
+
+        acquire = pool.acquire
+
+        @functools.wraps(acquire)
+        def timed_acquire(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                connection = acquire(*args, **kwargs)
+            except Exception:
+                metrics.record(time.perf_counter() - start_time, error=True)
+                raise
+            metrics.record(time.perf_counter() - start_time)
+            return connection
+
+        try:
+            pool.acquire = timed_acquire
+        except (AttributeError, TypeError):
+            _log.warning("Neo4j driver pool is read-only, acquisition metrics disabled.")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna as métricas dos pools de conexões.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Conexões em uso e ociosas e tempos de aquisição por banco.
+        """
+
+        result = {}
+        for (url, username), graph in self.graphs.items():
+            metrics = self.metrics[(url, username)]
+            in_use, idle = 0, 0
+            pool = get_driver_pool(graph)
+            for connections in list(getattr(pool, "connections", {}).values()):
+                for connection in list(connections):
+                    if getattr(connection, "in_use", False):
+                        in_use += 1
+                    else:
+                        idle += 1
+            result[f"{username}@{url}"] = {
+                "in_use": in_use,
+                "idle": idle,
+                "max_pool_size": self.max_connection_pool_size,
+                "acquisitions": metrics.acquisitions,
+                "acquisition_errors": metrics.acquisition_errors,
+                "mean_acquisition_wait_time": metrics.mean_acquisition_wait_time,
+                "max_acquisition_wait_time": metrics.max_acquisition_wait_time,
+            }
+        return result
+
+    def close(self):
+        """
+        Fecha todos os drivers.
+        """
+
+        with self.lock:
+            for graph in self.graphs.values():
+                graph.close()
+            self.graphs.clear()
+            self.metrics.clear()
+        return self
+
+
+def get_driver_pool(graph: Neo4jGraph) -> Any:
+    # Atributos internos do driver do neo4j (podem mudar entre versões): None se não existirem.
+    return getattr(getattr(graph, "_driver", None), "_pool", None)
+
+
+_REGISTRY = Neo4jDriverRegistry()
+atexit.register(_REGISTRY.close)
+
+
+def get_driver_registry() -> Neo4jDriverRegistry:
+    """
+    Retorna o registro de drivers do Neo4j compartilhado pelo processo.
+
+    Returns:
+        Neo4jDriverRegistry: Registro de drivers.
+    """
+
+    return _REGISTRY
+
+
+def get_shared_graph() -> Neo4jGraph:
+    """
+    Retorna a conexão com o grafo compartilhada pelo processo, configurada com as variáveis de
+    ambiente.
+
+    Returns:
+        Neo4jGraph: Conexão com o grafo.
+    """
+
+    return _REGISTRY.get_graph()
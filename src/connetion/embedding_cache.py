@@ -0,0 +1,158 @@
+from array import array
+from dataclasses import dataclass, field
+import hashlib
+import logging
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Union
+
+from langchain_core.embeddings import Embeddings
+
+from src.config import EMBEDDING_CACHE_MAX_ENTRIES, EMBEDDING_CACHE_PATH
+
+_log = logging.getLogger(__name__)
+
+# Limite de parâmetros por consulta do SQLite.
+SQLITE_MAX_VARIABLES = 500
+
+
+@dataclass
+class CachedEmbeddings(Embeddings):
+    """
+    Classe responsável por armazenar em cache (SQLite) os embeddings calculados por um modelo.
+    As entradas são indexadas pelo provedor, modelo e hash do texto; quando o cache atinge o
+    tamanho máximo, as entradas acessadas há mais tempo são removidas.
+
+    Args:
+        embeddings (Embeddings): Modelo de embeddings do provedor.
+        namespace (str): Identificador do provedor e do modelo (ex.: "hf:sentence-transformers/all-mpnet-base-v2").
+        cache_path (Union[str, Path], optional): Arquivo do banco SQLite. Defaults to EMBEDDING_CACHE_PATH.
+        max_entries (int, optional): Quantidade máxima de embeddings armazenados. Defaults to EMBEDDING_CACHE_MAX_ENTRIES.
+    """
+
+    embeddings: Embeddings
+    namespace: str
+    cache_path: Union[str, Path] = EMBEDDING_CACHE_PATH
+    max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES
+    hits: int = field(init=False, default=0)
+    misses: int = field(init=False, default=0)
+    connection: sqlite3.Connection = field(init=False, default=None)
+    lock: Any = field(init=False, default_factory=threading.Lock)
+    size: int = field(init=False, default=0)
+
+    def __post_init__(self):
+        Path(self.cache_path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.cache_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)"
+        )
+        self.connection.commit()
+        self.size = self.connection.execute("SELECT count(*) FROM embeddings").fetchone()[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, self.embeddings.embed_documents, "document")
+
+    def embed_query(self, text: str) -> List[float]:
+        # Alguns provedores calculam embeddings diferentes para consultas e documentos.
+        return self._embed([text], lambda texts: [self.embeddings.embed_query(texts[0])], "query")[
+            0
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna as estatísticas de uso do cache.
+
+        Returns:
+            Dict[str, Any]: Quantidade de acertos, falhas, taxa de acerto e tamanho do cache.
+        """
+
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": self.size,
+        }
+
+    def get_key(self, text: str, kind: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _embed(self, texts: List[str], embed_func, kind: str) -> List[List[float]]:
+        keys = [self.get_key(text, kind) for text in texts]
+        cached = self._get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        n_missing = sum(1 for key in keys if key not in cached)
+        self.misses += n_missing
+        self.hits += len(keys) - n_missing
+
+        if missing:
+            vectors = embed_func(list(missing.values()))
+            new_entries = dict(zip(missing.keys(), vectors))
+            self._put_many(new_entries)
+            cached.update(new_entries)
+
+        return [list(cached[key]) for key in keys]
+
+    def _get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        result = {}
+        unique_keys = list(set(keys))
+        with self.lock:
+            for i in range(0, len(unique_keys), SQLITE_MAX_VARIABLES):
+                batch = unique_keys[i : i + SQLITE_MAX_VARIABLES]
+                rows = self.connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, vector in rows:
+                    result[key] = array("f", vector).tolist()
+
+            if result:
+                now = time.time()
+                self.connection.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in result],
+                )
+                self.connection.commit()
+        return result
+
+    def _put_many(self, entries: Dict[str, List[float]]):
+        now = time.time()
+        with self.lock:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in entries.items()],
+            )
+            self.size += self.connection.total_changes - before
+
+            if self.size > self.max_entries:
+                # Remove 10% a mais que o excedente para não executar a limpeza a cada inserção.
+                n_evicted = self.size - int(self.max_entries * 0.9)
+                self.connection.execute(
+                    """
+                    DELETE FROM embeddings WHERE key IN (
+                        SELECT key FROM embeddings ORDER BY last_access LIMIT ?
+                    )
+                    """,
+                    (n_evicted,),
+                )
+                self.size -= n_evicted
+                _log.info(f"{n_evicted} embeddings evicted from cache.")
+            self.connection.commit()
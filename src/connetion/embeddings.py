@@ -1,43 +1,66 @@
 # https://python.langchain.com/docs/integrations/text_embedding/
 
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Dict
 
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_ollama import OllamaEmbeddings
-from langchain_openai import OpenAIEmbeddings
+from src.config import EMBEDDING_CACHE_ENABLED
+from src.connetion.embedding_cache import CachedEmbeddings
+from src.connetion.providers import Provider, get_provider
+
+# As integrações são importadas somente quando o provedor é selecionado; o modelo do
+# sentence-transformers ("hf" e "hf-local") só é carregado ao instanciar o EmbeddingsModel.
+EMBEDDING_PROVIDERS: Dict[str, Provider] = {
+    "local": Provider("langchain_ollama", "OllamaEmbeddings", "get_local_llm_model"),
+    "openai": Provider("langchain_openai", "OpenAIEmbeddings", "get_openai_llm_model"),
+    "google": Provider(
+        "langchain_google_genai", "GoogleGenerativeAIEmbeddings", "get_google_llm_model"
+    ),
+    "hf": Provider("langchain_huggingface", "HuggingFaceEmbeddings", "get_hf_llm_model"),
+    "hf-local": Provider(
+        "src.connetion.local_embeddings", "LocalEmbeddings", "get_hf_local_model"
+    ),
+}
 
 
 @dataclass
 class EmbeddingsModel:
     """
     Classe responsável por instanciar o modelo de embeddings de acorodo com o provedor do modelo.
+    Somente a integração do provedor selecionado (EMBEDDING_PROVIDERS) é importada.
+    Quando `cache` é True, o modelo é encapsulado por um cache persistente de embeddings, de forma
+    que textos já processados (na ingestão ou em perguntas repetidas) não são recalculados.
     """
 
     provider: str = "local"
     temperature: float = 0.7
     max_tokens: int = None
+    cache: bool = EMBEDDING_CACHE_ENABLED
     embeddings: Any = field(init=False, default=None)
 
     def __post_init__(self):
-        if self.provider == "local":
-            self.embeddings = self.get_local_llm_model()
-        if self.provider == "openai":
-            self.embeddings = self.get_openai_llm_model()
-        if self.provider == "google":
-            self.embeddings = self.get_google_llm_model()
-        if self.provider == "hf":
-            self.embeddings = self.get_hf_llm_model()
-
-    def get_local_llm_model(self):
-        return OllamaEmbeddings(model="llama3")
-
-    def get_openai_llm_model(self):
-        return OpenAIEmbeddings(model="text-embedding-3-large")
-
-    def get_google_llm_model(self):
-        return GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-
-    def get_hf_llm_model(self):
-        return HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
+        provider = get_provider(EMBEDDING_PROVIDERS, self.provider)
+        self.embeddings = getattr(self, provider.builder)(provider.load())
+
+        if self.cache and self.embeddings is not None:
+            model_name = getattr(self.embeddings, "model", None) or getattr(
+                self.embeddings, "model_name", None
+            )
+            self.embeddings = CachedEmbeddings(
+                embeddings=self.embeddings, namespace=f"{self.provider}:{model_name}"
+            )
+
+    def get_local_llm_model(self, model_class: Any):
+        return model_class(model="llama3")
+
+    def get_openai_llm_model(self, model_class: Any):
+        return model_class(model="text-embedding-3-large")
+
+    def get_google_llm_model(self, model_class: Any):
+        return model_class(model="models/embedding-001")
+
+    def get_hf_llm_model(self, model_class: Any):
+        return model_class(model_name="sentence-transformers/all-mpnet-base-v2")
+
+    def get_hf_local_model(self, model_class: Any):
+        # Modelo, backend, lote e threads definidos pelas variáveis EMBEDDING_* (LocalEmbeddings).
+        return model_class()
@@ -1,22 +1,64 @@
 from dataclasses import dataclass, field
-from typing import Dict, List, Tuple
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 
 from langchain_community.graphs.graph_document import GraphDocument
 from langchain_core.documents import Document
 from langchain_neo4j import GraphCypherQAChain, Neo4jGraph, Neo4jVector
 
-from src.config import NEO4J_PASSWORD, NEO4J_URI, NEO4J_USERNAME
+from src.config import (
+    CYPHER_TEMPLATE_CACHE_ENABLED,
+    EMBEDDING_BACKFILL_BATCH_SIZE,
+    NEO4J_REFRESH_SCHEMA,
+    NEO4J_URI,
+    NEO4J_WRITE_BATCH_SIZE,
+)
 from src.connetion.chat_model import LLMModel
+from src.connetion.cypher_templates import CypherTemplateCache
+from src.connetion.driver_registry import get_shared_graph
 from src.connetion.embeddings import EmbeddingsModel
+from src.connetion.graph_writer import (
+    DOCUMENT_LABEL,
+    BulkWriteReport,
+    GraphBulkWriter,
+    get_text_hash,
+)
+from src.connetion.schema_snapshot import SchemaSnapshot
+
+_log = logging.getLogger(__name__)
+
+# Nó que guarda a versão do grafo, incrementada a cada ingestão.
+GRAPH_META_LABEL = "__GraphMeta__"
+
+# Documentos sem embedding ou cujo texto mudou desde o último embedding.
+PENDING_EMBEDDINGS_FILTER = f"""
+MATCH (d:`{DOCUMENT_LABEL}`)
+WHERE d.text IS NOT NULL AND (
+    d.embedding IS NULL
+    OR d.text_hash IS NULL
+    OR d.embedding_text_hash IS NULL
+    OR d.embedding_text_hash <> d.text_hash
+)
+"""
 
 
 @dataclass
 class Graph:
     """
     Classe responsável pelas operações do grafo.
+    O schema do grafo é lido de um snapshot local e só é recalculado quando a versão do grafo
+    muda ou quando `refresh_schema` é verdadeiro.
+
+    Args:
+        refresh_schema (bool, optional): Força a introspecção do schema na conexão. Defaults to NEO4J_REFRESH_SCHEMA.
     """
 
+    refresh_schema: bool = NEO4J_REFRESH_SCHEMA
     graph: Neo4jGraph = field(init=False, default=None)
+    schema_snapshot: SchemaSnapshot = field(init=False, default=None)
+    write_report: BulkWriteReport = field(init=False, default=None)
 
     def __post_init__(self):
         self.connection()
@@ -25,42 +67,102 @@ class Graph:
         """
         Estabelece a conexão com o Neo4J
         """
-        self.graph = Neo4jGraph(
-            url=NEO4J_URI,
-            username=NEO4J_USERNAME,
-            password=NEO4J_PASSWORD,
-            refresh_schema=True,
-            enhanced_schema=True,
-        )
+        # Driver e pool de conexões compartilhados pelo processo.
+        self.graph = get_shared_graph()
+        self.schema_snapshot = SchemaSnapshot(
+            graph=self.graph, get_graph_version=self.get_version, url=NEO4J_URI
+        ).load(refresh=self.refresh_schema)
         return self
 
-    def save(self, graph_documents: List[GraphDocument]):
+    def save(self, graph_documents: List[GraphDocument], batch_size: int = NEO4J_WRITE_BATCH_SIZE):
         """
-        Salva o grafo de conhecimento no banco de dados incluindo o índice e embeddings dos chunks
-        textuais identificados pelo Nó Document.
-        O parâmetro include_source igual a True, faz com que o texto original também seja salvo no banco.
-        O parâmetro baseEntityLabel é utilizado na indexação e cria um rótulo secundário __Entity__.
+        Salva o grafo de conhecimento no banco de dados incluindo os chunks textuais identificados
+        pelo Nó Document.
+        A gravação é feita em lotes pelo GraphBulkWriter, com MERGE sobre o rótulo secundário
+        __Entity__ (mesma convenção do baseEntityLabel do langchain), de forma que reprocessar os
+        mesmos documentos não duplica o grafo.
 
         Args:
             graph_documents (List[GraphDocument]): Documentos no formato de grafos.
+            batch_size (int, optional): Quantidade de linhas por consulta. Defaults to NEO4J_WRITE_BATCH_SIZE.
         """
 
-        self.graph.add_graph_documents(graph_documents, baseEntityLabel=True, include_source=True)
+        writer = GraphBulkWriter(graph=self.graph, batch_size=batch_size, include_source=True)
+        self.write_report = writer.write(graph_documents).report
         return self
 
+    def get_version(self) -> int:
+        """
+        Retorna a versão atual do grafo. A versão é incrementada a cada ingestão e é utilizada
+        para invalidar os caches que dependem do conteúdo do grafo.
+
+        Returns:
+            int: Versão do grafo (0 quando o grafo nunca foi versionado).
+        """
+
+        result = self.graph.query(
+            f"MATCH (m:`{GRAPH_META_LABEL}` {{key: 'graph'}}) RETURN m.version AS version"
+        )
+        return result[0]["version"] if result else 0
+
+    def bump_version(self) -> int:
+        """
+        Incrementa a versão do grafo.
+
+        Returns:
+            int: Nova versão do grafo.
+        """
+
+        result = self.graph.query(
+            f"""
+            MERGE (m:`{GRAPH_META_LABEL}` {{key: 'graph'}})
+            SET m.version = coalesce(m.version, 0) + 1, m.updated_at = datetime()
+            RETURN m.version AS version
+            """
+        )
+        version = result[0]["version"]
+        _log.info(f"Graph version bumped to {version}.")
+
+        # O schema mudou com a ingestão: o snapshot é atualizado para os demais processos.
+        self.schema_snapshot.refresh(version)
+        return version
+
 
 @dataclass
 class QAChain:
     """
     Classe responsável pelas operações da chain question ansewering.
+    Com o cache de templates habilitado, perguntas cuja intenção (medicamento e relacionamento)
+    possui uma consulta Cypher conhecida são respondidas sem gerar a consulta com o LLM.
+    Com o snapshot do schema, a chain é recriada com o novo schema quando a versão do grafo muda.
+
+    Args:
+        get_graph_version (Callable[[], int], optional): Função que retorna a versão atual do grafo. Defaults to None.
+        use_template_cache (bool, optional): Habilita o cache de consultas Cypher. Defaults to CYPHER_TEMPLATE_CACHE_ENABLED.
+        schema_snapshot (SchemaSnapshot, optional): Snapshot do schema utilizado pela conexão. Defaults to None.
+        version_check_interval (float, optional): Intervalo mínimo entre as consultas da versão do grafo em segundos. Defaults to 30.
     """
 
     llm: LLMModel
     graph: Neo4jGraph
+    get_graph_version: Optional[Callable[[], int]] = None
+    use_template_cache: bool = CYPHER_TEMPLATE_CACHE_ENABLED
+    schema_snapshot: Optional[SchemaSnapshot] = None
+    version_check_interval: float = 30
     qa_chain: GraphCypherQAChain = field(init=False, default=None)
+    template_cache: CypherTemplateCache = field(init=False, default=None)
+    graph_version: Optional[int] = field(init=False, default=None)
+    version_checked_at: float = field(init=False, default=0.0)
 
     def __post_init__(self):
+        self.version_checked_at = time.time()
+        if self.get_graph_version is not None:
+            self.graph_version = self.get_graph_version()
         self.connection()
+        if self.use_template_cache:
+            self.template_cache = CypherTemplateCache(
+                graph=self.graph, get_graph_version=self.get_graph_version
+            )
 
     def connection(self):
         """
@@ -76,9 +178,36 @@ class QAChain:
             return_intermediate_steps=True,
             return_direct=False,
             allow_dangerous_requests=True,
+            exclude_types=[GRAPH_META_LABEL],
         )
         return self
 
+    def check_schema(self):
+        """
+        Recarrega o schema e recria a chain quando a versão do grafo muda (consulta a versão no
+        máximo a cada `version_check_interval` segundos).
+        """
+
+        now = time.time()
+        if self.get_graph_version is None or self.schema_snapshot is None:
+            return self
+        if now - self.version_checked_at < self.version_check_interval:
+            return self
+
+        self.version_checked_at = now
+        try:
+            version = self.get_graph_version()
+        except Exception as e:
+            _log.warning(f"Could not read graph version: {e!r}")
+            return self
+
+        if version != self.graph_version:
+            _log.info(f"Graph version changed to {version}, reloading schema.")
+            self.schema_snapshot.load()
+            self.connection()
+            self.graph_version = version
+        return self
+
     def search(self, question: str) -> List:
         """
         Método responsável por fazer a consulta no grafo de conhecimento.
@@ -89,6 +218,21 @@ class QAChain:
         Returns:
             List: Lista com os nós e relacionamentos relevantes para a consulta do grafo.
         """
+
+        self.check_schema()
+
+        intent = None
+        if self.template_cache is not None:
+            try:
+                intent, context = self.template_cache.search(question)
+            except Exception as e:
+                _log.error(f"Cypher template cache failed: {e!r}")
+                context = None
+            if context:
+                print("** Cypher template cache hit **")
+                print(context)
+                return context
+
         response = self.qa_chain.invoke({"query": question})
         print("** QA chain results **")
         print(response)
@@ -102,11 +246,36 @@ class QAChain:
         for i in intermediate_steps:
             context.extend(i.get("context", []))
         print(context)
+
+        # A consulta gerada que retornou resultados é reutilizada em perguntas de mesma intenção.
+        if context and self.template_cache is not None:
+            query = next((i["query"] for i in intermediate_steps if "query" in i), None)
+            self.template_cache.learn(intent, query)
         if not context:
             context = ["Não sei responder com base nos dados estruturados."]
         return context
 
 
+@dataclass
+class BackfillProgress:
+    """
+    Progresso do preenchimento incremental dos embeddings.
+    """
+
+    total: int = 0
+    processed: int = 0
+    elapsed_time: float = 0.0
+    running: bool = False
+    error: Optional[str] = None
+
+    def __str__(self) -> str:
+        rate = self.processed / self.elapsed_time if self.elapsed_time else 0.0
+        return (
+            f"{self.processed}/{self.total} documents embedded in {self.elapsed_time:.1f}s "
+            f"({rate:.1f} documents/s)"
+        )
+
+
 @dataclass
 class Vector:
     """
@@ -115,6 +284,8 @@ class Vector:
 
     embedding: EmbeddingsModel
     vector: Neo4jVector = field(init=False, default=None)
+    backfill_progress: BackfillProgress = field(init=False, default_factory=BackfillProgress)
+    backfill_thread: threading.Thread = field(init=False, default=None)
 
     def __post_init__(self):
         self.connection()
@@ -122,14 +293,10 @@ class Vector:
     def connection(self):
         """
         Função que cria a conexão com o vector stor do Neo4j.
+        O vector store utiliza o driver compartilhado pelo processo.
         """
 
-        self.vector = Neo4jVector(
-            embedding=self.embedding,
-            url=NEO4J_URI,
-            username=NEO4J_USERNAME,
-            password=NEO4J_PASSWORD,
-        )
+        self.vector = Neo4jVector(embedding=self.embedding, graph=get_shared_graph())
         return self
 
     def save_embeddings_from_existing_graph(self):
@@ -146,6 +313,107 @@ class Vector:
         )
         return self
 
+    def backfill_embeddings(
+        self, batch_size: int = EMBEDDING_BACKFILL_BATCH_SIZE, background: bool = False
+    ):
+        """
+        Preenche de forma incremental os embeddings dos nós Document. Somente os documentos sem
+        embedding ou cujo texto mudou desde o último embedding (comparação de `text_hash` com
+        `embedding_text_hash`) são enviados ao modelo de embeddings, em lotes, e os vetores são
+        gravados com `UNWIND`. O progresso fica disponível em `backfill_progress`.
+
+        Args:
+            batch_size (int, optional): Quantidade de documentos por lote. Defaults to EMBEDDING_BACKFILL_BATCH_SIZE.
+            background (bool, optional): Executa o preenchimento em uma thread separada. Defaults to False.
+        """
+
+        if self.backfill_thread is not None and self.backfill_thread.is_alive():
+            _log.warning("Embedding backfill already running.")
+            return self
+
+        if background:
+            self.backfill_thread = threading.Thread(
+                target=self._backfill_embeddings, args=(batch_size,), daemon=True
+            )
+            self.backfill_thread.start()
+        else:
+            self._backfill_embeddings(batch_size)
+        return self
+
+    def _backfill_embeddings(self, batch_size: int):
+        start_time = time.time()
+        self.backfill_progress = BackfillProgress(running=True)
+        try:
+            self.backfill_progress.total = self.vector.query(
+                PENDING_EMBEDDINGS_FILTER + "RETURN count(d) AS total"
+            )[0]["total"]
+            _log.info(f"{self.backfill_progress.total} documents pending embeddings.")
+
+            while True:
+                rows = self.vector.query(
+                    PENDING_EMBEDDINGS_FILTER
+                    + "RETURN elementId(d) AS element_id, d.text AS text LIMIT $limit",
+                    params={"limit": batch_size},
+                )
+                if not rows:
+                    break
+
+                embeddings = self.embedding.embed_documents([i["text"] for i in rows])
+                self.vector.query(
+                    """
+                    UNWIND $rows AS row
+                    MATCH (d) WHERE elementId(d) = row.element_id
+                    CALL db.create.setNodeVectorProperty(d, 'embedding', row.embedding)
+                    SET d.text_hash = row.text_hash, d.embedding_text_hash = row.text_hash
+                    """,
+                    params={
+                        "rows": [
+                            {
+                                "element_id": row["element_id"],
+                                "embedding": embedding,
+                                "text_hash": get_text_hash(row["text"]),
+                            }
+                            for row, embedding in zip(rows, embeddings)
+                        ]
+                    },
+                )
+
+                self.backfill_progress.processed += len(rows)
+                self.backfill_progress.elapsed_time = time.time() - start_time
+                _log.info(f"Embedding backfill: {self.backfill_progress}")
+
+            if self.backfill_progress.processed:
+                self.create_vector_index(dimensions=len(embeddings[0]))
+        except Exception as e:
+            self.backfill_progress.error = repr(e)
+            _log.error(f"Embedding backfill failed: {e!r}")
+            raise
+        finally:
+            self.backfill_progress.elapsed_time = time.time() - start_time
+            self.backfill_progress.running = False
+
+        _log.info(f"Embedding backfill finished: {self.backfill_progress}")
+
+    def create_vector_index(self, dimensions: int):
+        """
+        Cria o índice vetorial dos nós Document, caso ainda não exista.
+
+        Args:
+            dimensions (int): Dimensão dos embeddings.
+        """
+
+        self.vector.query(
+            f"""
+            CREATE VECTOR INDEX `{self.vector.index_name}` IF NOT EXISTS
+            FOR (d:`{DOCUMENT_LABEL}`) ON (d.embedding)
+            OPTIONS {{indexConfig: {{
+                `vector.dimensions`: {int(dimensions)},
+                `vector.similarity_function`: 'cosine'
+            }}}}
+            """
+        )
+        return self
+
     def save_embeddings_from_documents(self, documents: List[Document]):
         """
         Salva os embeddings do texto do nó Documentos (contém o conteúdo do chunk) no vector store
@@ -235,4 +503,9 @@ class KgDatabaseConnetion:
     def __post_init__(self):
         self.vector = Vector(embedding=self.embedding)
         self.graph = Graph()
-        self.qa_chain = QAChain(llm=self.llm, graph=self.graph.graph)
+        self.qa_chain = QAChain(
+            llm=self.llm,
+            graph=self.graph.graph,
+            get_graph_version=self.graph.get_version,
+            schema_snapshot=self.graph.schema_snapshot,
+        )
@@ -0,0 +1,270 @@
+from dataclasses import dataclass, field
+import hashlib
+import logging
+import time
+from typing import Any, Dict, List, Tuple
+
+from langchain_community.graphs.graph_document import GraphDocument, Node
+from langchain_neo4j import Neo4jGraph
+
+from src.config import NEO4J_WRITE_BATCH_SIZE
+
+_log = logging.getLogger(__name__)
+
+BASE_ENTITY_LABEL = "__Entity__"
+DOCUMENT_LABEL = "Document"
+
+CONSTRAINTS = [
+    f"CREATE CONSTRAINT entity_id IF NOT EXISTS FOR (n:`{BASE_ENTITY_LABEL}`) REQUIRE n.id IS UNIQUE",
+    f"CREATE CONSTRAINT document_id IF NOT EXISTS FOR (d:`{DOCUMENT_LABEL}`) REQUIRE d.id IS UNIQUE",
+]
+
+
+def escape_name(name: str) -> str:
+    """
+    Escapa um rótulo ou tipo de relacionamento para uso em uma consulta Cypher.
+
+    Args:
+        name (str): Rótulo do nó ou tipo do relacionamento.
+
+    Returns:
+        str: Nome entre crases.
+    """
+
+    return "`" + name.replace("`", "``") + "`"
+
+
+def clean_properties(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Mantém somente valores aceitos como propriedade pelo Neo4j (tipos primitivos e listas de
+    tipos primitivos). Os demais valores são convertidos para texto.
+
+    Args:
+        properties (Dict[str, Any]): Propriedades.
+
+    Returns:
+        Dict[str, Any]: Propriedades aceitas pelo Neo4j.
+    """
+
+    cleaned = {}
+    for key, value in (properties or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (str, int, float, bool)):
+            cleaned[key] = value
+        elif isinstance(value, (list, tuple)) and all(
+            isinstance(i, (str, int, float, bool)) for i in value
+        ):
+            cleaned[key] = list(value)
+        else:
+            cleaned[key] = str(value)
+    return cleaned
+
+
+def get_document_id(graph_document: GraphDocument) -> str:
+    """
+    Retorna o identificador do nó Document de um grafo. Segue a mesma regra do
+    `Neo4jGraph.add_graph_documents` (id dos metadados ou md5 do texto) para manter a
+    compatibilidade com grafos já gravados.
+
+    Args:
+        graph_document (GraphDocument): Grafo extraído de um chunk.
+
+    Returns:
+        str: Identificador do documento.
+    """
+
+    source = graph_document.source
+    return (
+        source.metadata.get("id") or hashlib.md5(source.page_content.encode("utf-8")).hexdigest()
+    )
+
+
+def get_text_hash(text: str) -> str:
+    """
+    Retorna o hash sha256 do texto de um nó Document. É gravado em `text_hash` e utilizado para
+    identificar os documentos cujo embedding precisa ser recalculado.
+
+    Args:
+        text (str): Texto do documento.
+
+    Returns:
+        str: Hash sha256 do texto em hexadecimal.
+    """
+
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class BulkWriteReport:
+    """
+    Resumo da gravação em lote do grafo no Neo4j.
+    """
+
+    nodes: int = 0
+    relationships: int = 0
+    documents: int = 0
+    elapsed_time: float = 0.0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed_time if self.elapsed_time else 0.0
+
+    @property
+    def relationships_per_second(self) -> float:
+        return self.relationships / self.elapsed_time if self.elapsed_time else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.nodes} nodes, {self.relationships} relationships and {self.documents} "
+            f"documents written in {self.elapsed_time:.2f}s ({self.nodes_per_second:.0f} "
+            f"nodes/s, {self.relationships_per_second:.0f} relationships/s)"
+        )
+
+
+@dataclass
+class GraphBulkWriter:
+    """
+    Classe responsável por gravar os grafos de conhecimento no Neo4j em lotes.
+    Os nós e relacionamentos são agrupados por rótulo/tipo e gravados com consultas `UNWIND`
+    parametrizadas e semântica de `MERGE`, de forma que novas execuções não duplicam o grafo.
+
+    Args:
+        graph (Neo4jGraph): Conexão com o grafo.
+        batch_size (int, optional): Quantidade de linhas por consulta. Defaults to NEO4J_WRITE_BATCH_SIZE.
+        include_source (bool, optional): Grava o chunk de origem como nó Document. Defaults to True.
+    """
+
+    graph: Neo4jGraph
+    batch_size: int = NEO4J_WRITE_BATCH_SIZE
+    include_source: bool = True
+    report: BulkWriteReport = field(init=False, default_factory=BulkWriteReport)
+
+    def create_constraints(self):
+        """
+        Cria as constraints de unicidade utilizadas pelo MERGE dos nós.
+        """
+
+        for constraint in CONSTRAINTS:
+            self.graph.query(constraint)
+        return self
+
+    def write(self, graph_documents: List[GraphDocument]):
+        """
+        Grava os grafos de conhecimento no banco de dados.
+
+        Args:
+            graph_documents (List[GraphDocument]): Documentos no formato de grafos.
+        """
+
+        start_time = time.time()
+        self.report = BulkWriteReport()
+        self.create_constraints()
+
+        nodes, relationships, documents = self.group(graph_documents)
+
+        for label, rows in nodes.items():
+            query = (
+                "UNWIND $rows AS row "
+                f"MERGE (n:{escape_name(BASE_ENTITY_LABEL)} {{id: row.id}}) "
+                f"SET n:{escape_name(label)} "
+                "SET n += row.properties"
+            )
+            self.report.nodes += self.run_in_batches(query, list(rows.values()))
+
+        for rel_type, rows in relationships.items():
+            query = (
+                "UNWIND $rows AS row "
+                f"MATCH (s:{escape_name(BASE_ENTITY_LABEL)} {{id: row.source}}) "
+                f"MATCH (t:{escape_name(BASE_ENTITY_LABEL)} {{id: row.target}}) "
+                f"MERGE (s)-[r:{escape_name(rel_type)}]->(t) "
+                "SET r += row.properties"
+            )
+            self.report.relationships += self.run_in_batches(query, list(rows.values()))
+
+        if self.include_source and documents:
+            query = (
+                "UNWIND $rows AS row "
+                f"MERGE (d:{escape_name(DOCUMENT_LABEL)} {{id: row.id}}) "
+                "SET d.text = row.text, d.text_hash = row.text_hash "
+                "SET d += row.metadata "
+                "WITH d, row "
+                "UNWIND row.entity_ids AS entity_id "
+                f"MATCH (e:{escape_name(BASE_ENTITY_LABEL)} {{id: entity_id}}) "
+                "MERGE (d)-[:MENTIONS]->(e)"
+            )
+            self.report.documents += self.run_in_batches(query, list(documents.values()))
+
+        self.report.elapsed_time = time.time() - start_time
+        _log.info(f"Graph bulk write finished: {self.report}")
+        return self
+
+    def group(
+        self, graph_documents: List[GraphDocument]
+    ) -> Tuple[Dict[str, Dict], Dict[str, Dict], Dict[str, Dict]]:
+        """
+        Agrupa os nós por rótulo e os relacionamentos por tipo, removendo duplicados entre os
+        documentos.
+
+        Args:
+            graph_documents (List[GraphDocument]): Documentos no formato de grafos.
+
+        Returns:
+            Tuple[Dict[str, Dict], Dict[str, Dict], Dict[str, Dict]]: Linhas dos nós por rótulo, dos relacionamentos por tipo e dos documentos por id.
+        """
+
+        nodes: Dict[str, Dict] = {}
+        relationships: Dict[str, Dict] = {}
+        documents: Dict[str, Dict] = {}
+
+        def add_node(node: Node):
+            row = nodes.setdefault(node.type, {}).setdefault(
+                node.id, {"id": node.id, "properties": {}}
+            )
+            row["properties"].update(clean_properties(node.properties))
+
+        for graph_document in graph_documents:
+            for node in graph_document.nodes:
+                add_node(node)
+
+            for rel in graph_document.relationships:
+                # Os nós das extremidades podem não estar na lista de nós do documento.
+                add_node(rel.source)
+                add_node(rel.target)
+                row = relationships.setdefault(rel.type, {}).setdefault(
+                    (rel.source.id, rel.target.id),
+                    {"source": rel.source.id, "target": rel.target.id, "properties": {}},
+                )
+                row["properties"].update(clean_properties(rel.properties))
+
+            if self.include_source and graph_document.source is not None:
+                document_id = get_document_id(graph_document)
+                row = documents.setdefault(
+                    document_id,
+                    {
+                        "id": document_id,
+                        "text": graph_document.source.page_content,
+                        "text_hash": get_text_hash(graph_document.source.page_content),
+                        "metadata": clean_properties(graph_document.source.metadata),
+                        "entity_ids": [],
+                    },
+                )
+                row["entity_ids"].extend(i.id for i in graph_document.nodes)
+
+        return nodes, relationships, documents
+
+    def run_in_batches(self, query: str, rows: List[Dict]) -> int:
+        """
+        Executa a consulta em lotes de `batch_size` linhas.
+
+        Args:
+            query (str): Consulta Cypher que recebe o parâmetro `$rows`.
+            rows (List[Dict]): Linhas a serem gravadas.
+
+        Returns:
+            int: Quantidade de linhas gravadas.
+        """
+
+        for i in range(0, len(rows), self.batch_size):
+            self.graph.query(query, params={"rows": rows[i : i + self.batch_size]})
+        return len(rows)
@@ -0,0 +1,344 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import json
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from src.api.schemas.request.horus import HorusMedicineStockRequest
+from src.config import (
+    API_DADOS_ABERTOS,
+    HORUS_CACHE_MAX_SIZE,
+    HORUS_CACHE_TTL,
+    HORUS_MAX_CONNECTIONS,
+    HORUS_MAX_PAGES,
+    HORUS_MAX_RETRIES,
+    HORUS_PAGE_SIZE,
+    HORUS_ROUTE,
+    HORUS_TIMEOUT,
+)
+
+_log = logging.getLogger(__name__)
+
+# Status HTTP que indicam falhas temporárias da API.
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class HorusAPIError(Exception):
+    """
+    Erro na consulta da API de estoque de medicamentos (BNAFAR/Hórus).
+    """
+
+
+def get_cache_key(request: HorusMedicineStockRequest) -> str:
+    """
+    Retorna a chave de cache de uma consulta: parâmetros preenchidos, sem espaços nas bordas e
+    em ordem alfabética.
+
+    Args:
+        request (HorusMedicineStockRequest): Parâmetros da consulta.
+
+    Returns:
+        str: Chave da consulta.
+    """
+
+    params = {
+        key: value.strip() if isinstance(value, str) else value
+        for key, value in request.model_dump(exclude_none=True).items()
+    }
+    return json.dumps(params, sort_keys=True, ensure_ascii=False)
+
+
+@dataclass
+class ResponseCache:
+    """
+    Cache em memória das respostas da API, com tempo de vida e descarte das entradas usadas há
+    mais tempo.
+
+    Args:
+        ttl (float, optional): Tempo de vida das entradas em segundos. Defaults to HORUS_CACHE_TTL.
+        max_size (int, optional): Quantidade máxima de respostas armazenadas. Defaults to HORUS_CACHE_MAX_SIZE.
+    """
+
+    ttl: float = HORUS_CACHE_TTL
+    max_size: int = HORUS_CACHE_MAX_SIZE
+    entries: OrderedDict = field(init=False, default_factory=OrderedDict)
+    lock: Any = field(init=False, default_factory=threading.Lock)
+    hits: int = field(init=False, default=0)
+    misses: int = field(init=False, default=0)
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.time():
+                self.entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Dict):
+        with self.lock:
+            self.entries[key] = (time.time() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self.entries),
+        }
+
+
+@dataclass
+class HorusClient:
+    """
+    Classe responsável pelas consultas à API de estoque de medicamentos (BNAFAR/Hórus).
+    As conexões HTTP são reutilizadas entre as consultas (pool do httpx), as páginas da API são
+    buscadas automaticamente até completar o `limit` da consulta e as respostas ficam em cache
+    pelos parâmetros normalizados. Falhas temporárias (timeouts, erros de rede, 429 e 5xx) são
+    repetidas com espera exponencial.
+
+    O `limit` da consulta é a quantidade de itens desejada e o `offset` é a página (de `limit`
+    itens) a partir da qual os itens são retornados, como na API; internamente os itens são
+    buscados em páginas de `page_size`.
+
+    Args:
+        base_url (str, optional): Endereço da API. Defaults to API_DADOS_ABERTOS.
+        route (str, optional): Rota do estoque de medicamentos. Defaults to HORUS_ROUTE.
+        timeout (float, optional): Tempo máximo de cada requisição em segundos. Defaults to HORUS_TIMEOUT.
+        max_retries (int, optional): Quantidade máxima de novas tentativas por página. Defaults to HORUS_MAX_RETRIES.
+        max_connections (int, optional): Quantidade máxima de conexões simultâneas. Defaults to HORUS_MAX_CONNECTIONS.
+        page_size (int, optional): Quantidade de itens por requisição à API. Defaults to HORUS_PAGE_SIZE.
+        max_pages (int, optional): Quantidade máxima de páginas buscadas por consulta. Defaults to HORUS_MAX_PAGES.
+        cache (ResponseCache, optional): Cache das respostas. Defaults to ResponseCache().
+    """
+
+    base_url: str = API_DADOS_ABERTOS
+    route: str = HORUS_ROUTE
+    timeout: float = HORUS_TIMEOUT
+    max_retries: int = HORUS_MAX_RETRIES
+    max_connections: int = HORUS_MAX_CONNECTIONS
+    page_size: int = HORUS_PAGE_SIZE
+    max_pages: int = HORUS_MAX_PAGES
+    cache: ResponseCache = field(default_factory=ResponseCache)
+
+    client: httpx.Client = field(init=False, default=None)
+    async_client: httpx.AsyncClient = field(init=False, default=None)
+    async_client_loop: Any = field(init=False, default=None)
+    lock: Any = field(init=False, default_factory=threading.Lock)
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}{self.route}"
+
+    def get_client(self) -> httpx.Client:
+        with self.lock:
+            if self.client is None or self.client.is_closed:
+                self.client = httpx.Client(timeout=self.timeout, limits=self.get_limits())
+            return self.client
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        # O cliente assíncrono pertence ao event loop em que foi criado.
+        loop = asyncio.get_running_loop()
+        if (
+            self.async_client is None
+            or self.async_client.is_closed
+            or self.async_client_loop is not loop
+        ):
+            self.async_client = httpx.AsyncClient(timeout=self.timeout, limits=self.get_limits())
+            self.async_client_loop = loop
+        return self.async_client
+
+    def get_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections, max_keepalive_connections=self.max_connections
+        )
+
+    def get_pages(self, request: HorusMedicineStockRequest) -> Tuple[List[Dict], int]:
+        """
+        Converte a consulta nos parâmetros de cada página da API.
+
+        Args:
+            request (HorusMedicineStockRequest): Parâmetros da consulta.
+
+        Returns:
+            Tuple[List[Dict], int]: Parâmetros de cada página e quantidade de itens a descartar no início da primeira página.
+        """
+
+        params = request.model_dump(exclude_none=True, exclude={"limit", "offset"})
+        first_item = request.offset * request.limit
+        first_page, skip = divmod(first_item, self.page_size)
+        n_pages = min(math.ceil((skip + request.limit) / self.page_size), self.max_pages)
+        pages = [
+            {**params, "limit": self.page_size, "offset": first_page + i} for i in range(n_pages)
+        ]
+        return pages, skip
+
+    def merge_pages(self, pages: List[List[Dict]], skip: int, limit: int) -> Dict[str, List]:
+        items = []
+        for page in pages:
+            items.extend(page)
+            # Página incompleta: não há mais itens na API.
+            if len(page) < self.page_size:
+                break
+        return {"parametros": items[skip : skip + limit]}
+
+    def get_stock(self, request: HorusMedicineStockRequest) -> Dict[str, List]:
+        """
+        Consulta o estoque de medicamentos.
+
+        Args:
+            request (HorusMedicineStockRequest): Parâmetros da consulta.
+
+        Returns:
+            Dict[str, List]: Resposta no formato da API (`{"parametros": [...]}`).
+        """
+
+        key = get_cache_key(request)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        start_time = time.perf_counter()
+        pages_params, skip = self.get_pages(request)
+        pages = []
+        for params in pages_params:
+            page = self.get_page(params)
+            pages.append(page)
+            if len(page) < self.page_size:
+                break
+
+        response = self.merge_pages(pages, skip, request.limit)
+        self.cache.put(key, response)
+        _log.info(
+            f"Horus stock: {len(response['parametros'])} items from {len(pages)} pages in "
+            f"{time.perf_counter() - start_time:.2f}s."
+        )
+        return response
+
+    async def aget_stock(self, request: HorusMedicineStockRequest) -> Dict[str, List]:
+        """
+        Versão assíncrona do `get_stock`. As páginas necessárias para completar o `limit` são
+        buscadas em paralelo.
+
+        Args:
+            request (HorusMedicineStockRequest): Parâmetros da consulta.
+
+        Returns:
+            Dict[str, List]: Resposta no formato da API (`{"parametros": [...]}`).
+        """
+
+        key = get_cache_key(request)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        start_time = time.perf_counter()
+        pages_params, skip = self.get_pages(request)
+        pages = await asyncio.gather(*[self.aget_page(params) for params in pages_params])
+
+        response = self.merge_pages(pages, skip, request.limit)
+        self.cache.put(key, response)
+        _log.info(
+            f"Horus stock: {len(response['parametros'])} items from {len(pages)} pages in "
+            f"{time.perf_counter() - start_time:.2f}s."
+        )
+        return response
+
+    def get_page(self, params: Dict) -> List[Dict]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.get_client().get(self.url, params=params)
+            except httpx.TransportError as e:
+                error, retry_after = e, None
+            else:
+                if response.status_code == 200:
+                    return response.json().get("parametros", [])
+                error, retry_after = self.get_status_error(response)
+
+            self.raise_if_final(error, attempt)
+            time.sleep(self.get_backoff(attempt, retry_after))
+
+    async def aget_page(self, params: Dict) -> List[Dict]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.get_async_client().get(self.url, params=params)
+            except httpx.TransportError as e:
+                error, retry_after = e, None
+            else:
+                if response.status_code == 200:
+                    return response.json().get("parametros", [])
+                error, retry_after = self.get_status_error(response)
+
+            self.raise_if_final(error, attempt)
+            await asyncio.sleep(self.get_backoff(attempt, retry_after))
+
+    def get_status_error(self, response: httpx.Response) -> Tuple[Exception, Optional[float]]:
+        error = HorusAPIError(f"Failed: {response.status_code}")
+        if response.status_code not in TRANSIENT_STATUS_CODES:
+            raise error
+        retry_after = response.headers.get("Retry-After")
+        return error, float(retry_after) if retry_after and retry_after.isdigit() else None
+
+    def raise_if_final(self, error: Exception, attempt: int):
+        if attempt >= self.max_retries:
+            if isinstance(error, HorusAPIError):
+                raise error
+            raise HorusAPIError(f"Failed: {error!r}") from error
+        _log.warning(f"Horus API request failed ({error!r}), retrying.")
+
+    def get_backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        return retry_after if retry_after is not None else min(0.5 * 2**attempt, 10)
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+        return self
+
+    async def aclose(self):
+        if self.async_client is not None:
+            await self.async_client.aclose()
+        self.close()
+        return self
+
+
+_CLIENT = HorusClient()
+
+
+def get_horus_client() -> HorusClient:
+    """
+    Retorna o cliente da API Hórus compartilhado pelo processo.
+
+    Returns:
+        HorusClient: Cliente da API.
+    """
+
+    return _CLIENT
+
+
+def fetch_horus_medicine_stock(request: HorusMedicineStockRequest) -> Union[Dict, str]:
+    """
+    Consulta síncrona do estoque de medicamentos utilizada pelas tools do agente.
+
+    Args:
+        request (HorusMedicineStockRequest): Parâmetros da consulta.
+
+    Returns:
+        Union[Dict, str]: Resposta da API ou a mensagem de erro.
+    """
+
+    try:
+        return get_horus_client().get_stock(request)
+    except HorusAPIError as e:
+        return str(e)
@@ -0,0 +1,258 @@
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+import logging
+from pathlib import Path
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union, get_args
+
+from src.api.schemas.request.horus import HorusMedicineStockRequest
+from src.api.schemas.response.horus import HorusMedicineStockParams
+from src.config import HORUS_SNAPSHOT_DIR
+
+_log = logging.getLogger(__name__)
+
+# Colunas utilizadas no particionamento (diretórios `coluna=valor`) do snapshot.
+PARTITION_COLUMNS = ["codigo_uf", "data_posicao_estoque"]
+
+_DUCKDB_TYPES = {int: "BIGINT", float: "DOUBLE", str: "VARCHAR"}
+
+
+def get_columns() -> Dict[str, str]:
+    """
+    Retorna as colunas do snapshot e seus tipos no DuckDB, a partir do schema da resposta da API.
+
+    Returns:
+        Dict[str, str]: Tipo DuckDB por coluna.
+    """
+
+    columns = {}
+    for name, info in HorusMedicineStockParams.model_fields.items():
+        annotation = next((i for i in get_args(info.annotation) if i is not type(None)), None)
+        columns[name] = _DUCKDB_TYPES.get(annotation or info.annotation, "VARCHAR")
+    return columns
+
+
+def get_duckdb():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError(
+            "O snapshot local do Hórus requer o pacote duckdb: pip install duckdb"
+        ) from e
+    return duckdb
+
+
+def quote_path(path: Union[str, Path]) -> str:
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+@dataclass
+class HorusSnapshot:
+    """
+    Classe responsável pelas consultas ao snapshot local (Parquet) do estoque de medicamentos.
+    Os arquivos são particionados por `codigo_uf` e `data_posicao_estoque`, de forma que os
+    filtros por UF e data leem somente as partições necessárias. As consultas respondem no mesmo
+    formato da API (`{"parametros": [...]}`) e incluem agregações que a API não oferece.
+
+    Args:
+        snapshot_dir (Union[str, Path], optional): Diretório do snapshot. Defaults to HORUS_SNAPSHOT_DIR.
+    """
+
+    snapshot_dir: Union[str, Path] = HORUS_SNAPSHOT_DIR
+    connection: Any = field(init=False, default=None)
+    lock: Any = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self.connection = get_duckdb().connect(database=":memory:")
+
+    @property
+    def source(self) -> str:
+        files = quote_path(Path(self.snapshot_dir) / "**" / "*.parquet")
+        return (
+            f"read_parquet({files}, hive_partitioning = true, union_by_name = true, "
+            "hive_types = {'codigo_uf': BIGINT, 'data_posicao_estoque': VARCHAR})"
+        )
+
+    def query(self, sql: str, params: Optional[List] = None) -> List[Dict]:
+        """
+        Executa uma consulta sobre o snapshot, disponível como a tabela `stock`.
+
+        Args:
+            sql (str): Consulta SQL.
+            params (Optional[List], optional): Parâmetros da consulta. Defaults to None.
+
+        Returns:
+            List[Dict]: Linhas do resultado.
+        """
+
+        if not any(Path(self.snapshot_dir).glob("**/*.parquet")):
+            _log.warning(f"Horus snapshot {self.snapshot_dir} is empty.")
+            return []
+
+        start_time = time.perf_counter()
+        with self.lock:
+            cursor = self.connection.execute(
+                f"WITH stock AS (SELECT * FROM {self.source}) {sql}", params or []
+            )
+            names = [i[0] for i in cursor.description]
+            rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+        _log.info(
+            f"Horus snapshot query: {len(rows)} rows in {time.perf_counter() - start_time:.3f}s."
+        )
+        return rows
+
+    def get_filters(
+        self,
+        codigo_uf: Optional[str] = None,
+        codigo_municipio: Optional[str] = None,
+        data_posicao_estoque: Optional[str] = None,
+        codigo_catmat: Optional[str] = None,
+    ) -> Tuple[str, List]:
+        conditions, params = [], []
+        for column, value in [
+            ("codigo_uf", codigo_uf),
+            ("codigo_municipio", codigo_municipio),
+            ("data_posicao_estoque", data_posicao_estoque),
+            ("codigo_catmat", codigo_catmat),
+        ]:
+            if value is None:
+                continue
+            # Os códigos numéricos chegam como texto nas consultas do agente.
+            conditions.append(f"CAST({column} AS VARCHAR) = ?")
+            params.append(str(value).strip())
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, params
+
+    def get_stock(
+        self, request: HorusMedicineStockRequest, expires_before: Optional[str] = None
+    ) -> Dict[str, List]:
+        """
+        Consulta o estoque com os mesmos filtros da API.
+
+        Args:
+            request (HorusMedicineStockRequest): Parâmetros da consulta.
+            expires_before (Optional[str], optional): Retorna somente os lotes com validade até esta data (AAAA-MM-DD). Defaults to None.
+
+        Returns:
+            Dict[str, List]: Resposta no formato da API (`{"parametros": [...]}`).
+        """
+
+        where, params = self.get_filters(
+            codigo_uf=request.codigo_uf,
+            codigo_municipio=getattr(request, "codigo_municipio", None),
+            data_posicao_estoque=request.data_posicao_estoque,
+            codigo_catmat=request.codigo_catmat,
+        )
+        if expires_before is not None:
+            where += " AND " if where else "WHERE "
+            where += "try_cast(left(data_validade, 10) AS DATE) <= CAST(? AS DATE)"
+            params.append(expires_before)
+
+        rows = self.query(
+            f"SELECT * FROM stock {where} "
+            "ORDER BY data_posicao_estoque DESC, codigo_municipio, codigo_cnes "
+            "LIMIT ? OFFSET ?",
+            params + [request.limit, request.offset * request.limit],
+        )
+        return {"parametros": rows}
+
+    def get_total_stock_by_city(
+        self,
+        codigo_catmat: Optional[str] = None,
+        codigo_uf: Optional[str] = None,
+        data_posicao_estoque: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Soma a quantidade em estoque por município.
+
+        Args:
+            codigo_catmat (Optional[str], optional): Código CATMAT do item. Defaults to None.
+            codigo_uf (Optional[str], optional): Código IBGE da UF. Defaults to None.
+            data_posicao_estoque (Optional[str], optional): Data da posição de estoque (AAAA-MM-DD). Defaults to None.
+
+        Returns:
+            List[Dict]: Município, UF e quantidade total em estoque, da maior para a menor.
+        """
+
+        where, params = self.get_filters(
+            codigo_uf=codigo_uf,
+            data_posicao_estoque=data_posicao_estoque,
+            codigo_catmat=codigo_catmat,
+        )
+        return self.query(
+            "SELECT codigo_uf, uf, codigo_municipio, municipio, "
+            "sum(quantidade_estoque) AS quantidade_estoque, count(*) AS lotes "
+            f"FROM stock {where} "
+            "GROUP BY ALL ORDER BY quantidade_estoque DESC",
+            params,
+        )
+
+    def get_expiring_lots(
+        self,
+        days: int,
+        codigo_catmat: Optional[str] = None,
+        codigo_uf: Optional[str] = None,
+        reference_date: Optional[date] = None,
+    ) -> List[Dict]:
+        """
+        Retorna os lotes que vencem nos próximos `days` dias.
+
+        Args:
+            days (int): Quantidade de dias a partir da data de referência.
+            codigo_catmat (Optional[str], optional): Código CATMAT do item. Defaults to None.
+            codigo_uf (Optional[str], optional): Código IBGE da UF. Defaults to None.
+            reference_date (Optional[date], optional): Data de referência. Defaults to None (hoje).
+
+        Returns:
+            List[Dict]: Lotes ordenados pela data de validade.
+        """
+
+        reference_date = reference_date or date.today()
+        where, params = self.get_filters(codigo_uf=codigo_uf, codigo_catmat=codigo_catmat)
+        where += " AND " if where else "WHERE "
+        where += "try_cast(left(data_validade, 10) AS DATE) BETWEEN ? AND ?"
+        params += [reference_date, reference_date + timedelta(days=days)]
+        return self.query(
+            "SELECT codigo_uf, uf, codigo_municipio, municipio, codigo_cnes, nome_fantasia, "
+            "codigo_catmat, descricao_produto, numero_lote, data_validade, quantidade_estoque, "
+            "data_posicao_estoque "
+            f"FROM stock {where} "
+            "ORDER BY data_validade, quantidade_estoque DESC",
+            params,
+        )
+
+
+_SNAPSHOT: HorusSnapshot = None
+_SNAPSHOT_LOCK = threading.Lock()
+
+
+def get_horus_snapshot() -> HorusSnapshot:
+    """
+    Retorna o snapshot local do Hórus compartilhado pelo processo.
+
+    Returns:
+        HorusSnapshot: Consultas ao snapshot.
+    """
+
+    global _SNAPSHOT
+    if _SNAPSHOT is None:
+        with _SNAPSHOT_LOCK:
+            if _SNAPSHOT is None:
+                _SNAPSHOT = HorusSnapshot()
+    return _SNAPSHOT
+
+
+def query_horus_medicine_stock(request: HorusMedicineStockRequest) -> Dict[str, List]:
+    """
+    Consulta o estoque de medicamentos no snapshot local. Utilizada pelas tools do agente
+    quando HORUS_BACKEND é "local".
+
+    Args:
+        request (HorusMedicineStockRequest): Parâmetros da consulta.
+
+    Returns:
+        Dict[str, List]: Resposta no formato da API (`{"parametros": [...]}`).
+    """
+
+    return get_horus_snapshot().get_stock(request)
@@ -0,0 +1,155 @@
+import atexit
+from dataclasses import dataclass, field
+import logging
+import threading
+import time
+from typing import Any, List
+
+from langchain_core.embeddings import Embeddings
+import numpy as np
+
+from src.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_LOCAL_MODEL,
+    EMBEDDING_NUM_THREADS,
+    EMBEDDING_ONNX_INT8_FILE,
+    EMBEDDING_PROCESSES,
+)
+
+_log = logging.getLogger(__name__)
+
+BACKENDS = ["torch", "torch-int8", "onnx", "onnx-int8"]
+
+
+def get_sentence_transformers():
+    try:
+        import sentence_transformers
+    except ImportError as e:
+        raise ImportError(
+            "O provedor hf-local requer o pacote sentence-transformers: "
+            "pip install sentence-transformers"
+        ) from e
+    return sentence_transformers
+
+
+@dataclass
+class LocalEmbeddings(Embeddings):
+    """
+    Classe responsável pela inferência local (CPU) de embeddings com o sentence-transformers,
+    com controle do tamanho do lote, da quantidade de threads e do backend de execução:
+    - torch: modelo original (mesmos vetores do provedor "hf");
+    - torch-int8: camadas lineares quantizadas dinamicamente para int8;
+    - onnx: ONNX Runtime;
+    - onnx-int8: modelo ONNX quantizado para int8 (`onnx_int8_file` do repositório do modelo).
+
+    Os textos são ordenados pelo tamanho antes de formar os lotes, de forma que cada lote é
+    completado (padding) somente até o maior texto do próprio lote. Com `processes` > 1, lotes
+    grandes (ingestão) são distribuídos entre processos.
+
+    Args:
+        model_name (str, optional): Modelo do sentence-transformers. Defaults to EMBEDDING_LOCAL_MODEL.
+        backend (str, optional): Backend de execução (BACKENDS). Defaults to EMBEDDING_BACKEND.
+        batch_size (int, optional): Quantidade de textos por lote. Defaults to EMBEDDING_BATCH_SIZE.
+        num_threads (int, optional): Quantidade de threads da inferência (0 para o padrão da biblioteca). Defaults to EMBEDDING_NUM_THREADS.
+        processes (int, optional): Quantidade de processos na codificação de muitos textos (0 ou 1 para desabilitar). Defaults to EMBEDDING_PROCESSES.
+        onnx_int8_file (str, optional): Arquivo do modelo ONNX quantizado. Defaults to EMBEDDING_ONNX_INT8_FILE.
+    """
+
+    model_name: str = EMBEDDING_LOCAL_MODEL
+    backend: str = EMBEDDING_BACKEND
+    batch_size: int = EMBEDDING_BATCH_SIZE
+    num_threads: int = EMBEDDING_NUM_THREADS
+    processes: int = EMBEDDING_PROCESSES
+    onnx_int8_file: str = EMBEDDING_ONNX_INT8_FILE
+
+    encoder: Any = field(init=False, default=None)
+    pool: Any = field(init=False, default=None)
+    lock: Any = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Backend {self.backend!r} inválido. Opções: {', '.join(BACKENDS)}.")
+
+        start_time = time.perf_counter()
+        self.encoder = self.load_encoder()
+        _log.info(
+            f"Embedding model {self.model} loaded in {time.perf_counter() - start_time:.2f}s."
+        )
+
+    @property
+    def model(self) -> str:
+        # Identificador do modelo e do backend (utilizado no namespace do cache de embeddings).
+        if self.backend == "torch":
+            return self.model_name
+        return f"{self.model_name}@{self.backend}"
+
+    def load_encoder(self) -> Any:
+        sentence_transformers = get_sentence_transformers()
+
+        if self.backend.startswith("torch"):
+            import torch
+
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+            encoder = sentence_transformers.SentenceTransformer(self.model_name, device="cpu")
+            if self.backend == "torch-int8":
+                encoder = torch.quantization.quantize_dynamic(
+                    encoder, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            return encoder
+
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError(
+                f"O backend {self.backend} requer as dependências opcionais onnx: "
+                "poetry install --extras onnx"
+            ) from e
+
+        session_options = onnxruntime.SessionOptions()
+        if self.num_threads:
+            session_options.intra_op_num_threads = self.num_threads
+        model_kwargs = {"provider": "CPUExecutionProvider", "session_options": session_options}
+        if self.backend == "onnx-int8":
+            model_kwargs["file_name"] = self.onnx_int8_file
+        return sentence_transformers.SentenceTransformer(
+            self.model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs
+        )
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if self.processes > 1 and len(texts) >= self.batch_size * self.processes:
+            # Os blocos enviados aos processos também são formados por textos de tamanho próximo.
+            order = np.argsort([len(i) for i in texts], kind="stable")
+            vectors = self.encoder.encode_multi_process(
+                [texts[i] for i in order], self.get_pool(), batch_size=self.batch_size
+            )
+            result = np.empty_like(vectors)
+            result[order] = vectors
+            return result
+
+        return self.encoder.encode(
+            texts, batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False
+        )
+
+    def get_pool(self) -> Any:
+        with self.lock:
+            if self.pool is None:
+                self.pool = self.encoder.start_multi_process_pool(["cpu"] * self.processes)
+                atexit.register(self.close)
+            return self.pool
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+    def close(self):
+        with self.lock:
+            if self.pool is not None:
+                self.encoder.stop_multi_process_pool(self.pool)
+                self.pool = None
+        return self
@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+import importlib
+from typing import Any, Dict
+
+
+@dataclass(frozen=True)
+class Provider:
+    """
+    Integração de um provedor de modelos. O módulo da integração só é importado quando o provedor
+    é utilizado, de forma que os pacotes dos demais provedores não são carregados na inicialização.
+
+    Args:
+        module (str): Módulo da integração (ex.: "langchain_openai").
+        class_name (str): Classe do modelo no módulo (ex.: "ChatOpenAI").
+        builder (str): Método que instancia o modelo a partir da classe.
+    """
+
+    module: str
+    class_name: str
+    builder: str
+
+    def load(self) -> Any:
+        try:
+            module = importlib.import_module(self.module)
+        except ImportError as e:
+            # O pacote ausente pode ser uma dependência da integração (ex.: openai).
+            missing = (e.name or self.module).split(".")[0]
+            raise ImportError(
+                f"O provedor {self.module} requer o pacote {missing}, que não está instalado: "
+                f"pip install {missing.replace('_', '-')}"
+            ) from e
+        return getattr(module, self.class_name)
+
+
+def get_provider(providers: Dict[str, Provider], name: str) -> Provider:
+    """
+    Retorna o provedor cadastrado com o nome informado.
+
+    Args:
+        providers (Dict[str, Provider]): Provedores disponíveis.
+        name (str): Nome do provedor.
+
+    Returns:
+        Provider: Integração do provedor.
+    """
+
+    if name not in providers:
+        raise ValueError(f"Provedor {name!r} inválido. Opções: {', '.join(providers)}.")
+    return providers[name]
@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+from pathlib import Path
+import time
+from typing import Any, Callable, Dict, Optional, Union
+
+from langchain_neo4j import Neo4jGraph
+
+from src.config import NEO4J_SCHEMA_SNAPSHOT_PATH
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class SchemaSnapshot:
+    """
+    Classe responsável pelo snapshot do schema do Neo4j.
+    A introspecção do schema (principalmente o enhanced schema, que amostra os valores de cada
+    propriedade) é executada somente quando o snapshot não existe, quando a versão do grafo muda
+    ou quando solicitada explicitamente; nos demais casos o schema é lido do arquivo local e
+    compartilhado entre os processos.
+
+    Args:
+        graph (Neo4jGraph): Conexão com o grafo, criada com `refresh_schema=False`.
+        get_graph_version (Callable[[], int], optional): Função que retorna a versão atual do grafo. Defaults to None.
+        path (Union[str, Path], optional): Arquivo do snapshot. Defaults to NEO4J_SCHEMA_SNAPSHOT_PATH.
+        url (str, optional): Endereço do banco, utilizado na identificação do snapshot. Defaults to "".
+        enhanced_schema (bool, optional): Indica se o schema inclui a amostragem das propriedades. Defaults to True.
+    """
+
+    graph: Neo4jGraph
+    get_graph_version: Optional[Callable[[], int]] = None
+    path: Union[str, Path] = NEO4J_SCHEMA_SNAPSHOT_PATH
+    url: str = ""
+    enhanced_schema: bool = True
+
+    def get_fingerprint(self, version: int) -> str:
+        """
+        Retorna a identificação do schema: banco, tipo de schema e versão do grafo.
+
+        Args:
+            version (int): Versão do grafo.
+
+        Returns:
+            str: Hash que identifica o snapshot.
+        """
+
+        key = f"{self.url}|enhanced={self.enhanced_schema}|version={version}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+    def load(self, refresh: bool = False):
+        """
+        Carrega o schema do snapshot na conexão com o grafo, refazendo a introspecção quando o
+        snapshot está desatualizado.
+
+        Args:
+            refresh (bool, optional): Força a introspecção do schema. Defaults to False.
+        """
+
+        version = self.get_graph_version() if self.get_graph_version else 0
+        fingerprint = self.get_fingerprint(version)
+
+        snapshot = None if refresh else self.read()
+        if snapshot is not None and snapshot.get("fingerprint") == fingerprint:
+            self.graph.schema = snapshot["schema"]
+            self.graph.structured_schema = snapshot["structured_schema"]
+            _log.info(f"Neo4j schema loaded from snapshot (graph version {version}).")
+            return self
+
+        return self.refresh(version, fingerprint)
+
+    def refresh(self, version: int = None, fingerprint: str = None):
+        """
+        Refaz a introspecção do schema e grava o snapshot.
+
+        Args:
+            version (int, optional): Versão do grafo. Defaults to None (consulta a versão atual).
+            fingerprint (str, optional): Identificação do snapshot. Defaults to None (calculada a partir da versão).
+        """
+
+        if version is None:
+            version = self.get_graph_version() if self.get_graph_version else 0
+        fingerprint = fingerprint or self.get_fingerprint(version)
+
+        start_time = time.perf_counter()
+        self.graph.refresh_schema()
+        _log.info(
+            f"Neo4j schema refreshed in {time.perf_counter() - start_time:.2f}s "
+            f"(graph version {version})."
+        )
+
+        self.write(
+            {
+                "fingerprint": fingerprint,
+                "version": version,
+                "created_at": time.time(),
+                "schema": self.graph.schema,
+                "structured_schema": self.graph.structured_schema,
+            }
+        )
+        return self
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        path = Path(self.path)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            _log.warning(f"Invalid Neo4j schema snapshot {path}: {e!r}")
+            return None
+
+    def write(self, snapshot: Dict[str, Any]):
+        # Gravação atômica: outros processos nunca leem um snapshot incompleto.
+        path = Path(self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f"{path.suffix}.{time.time_ns()}.tmp")
+        tmp_path.write_text(
+            json.dumps(snapshot, ensure_ascii=False, default=str), encoding="utf-8"
+        )
+        tmp_path.replace(path)
+        return self
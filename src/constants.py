@@ -35,7 +35,38 @@ IBGE_CODE_FOR_BRAZILIAN_UF = [
     {"nome": "Bahia", "codigo": 29, "sigla": "BA"},
     {"nome": "Goiás", "codigo": 52, "sigla": "GO"},
     {"nome": "Distrito Federal", "codigo": 53, "sigla": "DF"},
-    {"nome": "Santa Catarina", "codigo": 42, "sigla": "BA"},
+    {"nome": "Santa Catarina", "codigo": 42, "sigla": "SC"},
+]
+
+# Todas as 27 UFs (os exemplos acima são as UFs listadas no prompt do agente).
+ALL_BRAZILIAN_UF = [
+    {"nome": "Rondônia", "codigo": 11, "sigla": "RO"},
+    {"nome": "Acre", "codigo": 12, "sigla": "AC"},
+    {"nome": "Amazonas", "codigo": 13, "sigla": "AM"},
+    {"nome": "Roraima", "codigo": 14, "sigla": "RR"},
+    {"nome": "Pará", "codigo": 15, "sigla": "PA"},
+    {"nome": "Amapá", "codigo": 16, "sigla": "AP"},
+    {"nome": "Tocantins", "codigo": 17, "sigla": "TO"},
+    {"nome": "Maranhão", "codigo": 21, "sigla": "MA"},
+    {"nome": "Piauí", "codigo": 22, "sigla": "PI"},
+    {"nome": "Ceará", "codigo": 23, "sigla": "CE"},
+    {"nome": "Rio Grande do Norte", "codigo": 24, "sigla": "RN"},
+    {"nome": "Paraíba", "codigo": 25, "sigla": "PB"},
+    {"nome": "Pernambuco", "codigo": 26, "sigla": "PE"},
+    {"nome": "Alagoas", "codigo": 27, "sigla": "AL"},
+    {"nome": "Sergipe", "codigo": 28, "sigla": "SE"},
+    {"nome": "Bahia", "codigo": 29, "sigla": "BA"},
+    {"nome": "Minas Gerais", "codigo": 31, "sigla": "MG"},
+    {"nome": "Espírito Santo", "codigo": 32, "sigla": "ES"},
+    {"nome": "Rio de Janeiro", "codigo": 33, "sigla": "RJ"},
+    {"nome": "São Paulo", "codigo": 35, "sigla": "SP"},
+    {"nome": "Paraná", "codigo": 41, "sigla": "PR"},
+    {"nome": "Santa Catarina", "codigo": 42, "sigla": "SC"},
+    {"nome": "Rio Grande do Sul", "codigo": 43, "sigla": "RS"},
+    {"nome": "Mato Grosso do Sul", "codigo": 50, "sigla": "MS"},
+    {"nome": "Mato Grosso", "codigo": 51, "sigla": "MT"},
+    {"nome": "Goiás", "codigo": 52, "sigla": "GO"},
+    {"nome": "Distrito Federal", "codigo": 53, "sigla": "DF"},
 ]
 
 CATMAT_CODE = [
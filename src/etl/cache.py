@@ -0,0 +1,233 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from langchain_community.graphs.graph_document import GraphDocument
+from langchain_core.documents import Document
+
+from src.config import INGESTION_CACHE_DIR
+
+_log = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = "manifest.json"
+JOURNAL_FILE_NAME = "manifest.journal.jsonl"
+
+
+def file_hash(file_path: Union[str, Path]) -> str:
+    """
+    Calcula o hash sha256 do conteúdo de um arquivo.
+
+    Args:
+        file_path (Union[str, Path]): Caminho do arquivo.
+
+    Returns:
+        str: Hash sha256 do arquivo em hexadecimal.
+    """
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_hash(text: str) -> str:
+    """
+    Calcula o hash sha256 de um texto.
+
+    Args:
+        text (str): Texto.
+
+    Returns:
+        str: Hash sha256 do texto em hexadecimal.
+    """
+
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def params_hash(**params) -> str:
+    """
+    Calcula um hash curto para um conjunto de parâmetros (ex.: parâmetros de chunking ou do LLM).
+    Quando qualquer parâmetro muda, o hash muda e as entradas antigas do cache deixam de ser usadas.
+
+    Returns:
+        str: Hash dos parâmetros em hexadecimal.
+    """
+
+    return text_hash(json.dumps(params, sort_keys=True, default=str))[:16]
+
+
+@dataclass
+class IngestionCache:
+    """
+    Classe responsável pelo cache incremental da ingestão (pdf -> markdown -> chunks -> grafo).
+    Os artefatos são endereçados pelo hash do conteúdo de origem e pelos parâmetros utilizados
+    para gerá-los, de forma que somente os arquivos alterados são reprocessados.
+    Cada pdf convertido é registrado com um append no journal do manifesto; o manifesto completo
+    é reescrito somente em `save_manifest` (ao final de cada lote), que incorpora o journal.
+
+    Args:
+        cache_dir (Union[str, Path], optional): Diretório do cache. Defaults to INGESTION_CACHE_DIR.
+    """
+
+    cache_dir: Union[str, Path] = INGESTION_CACHE_DIR
+    manifest: Dict = field(init=False, default_factory=dict)
+
+    def __post_init__(self):
+        self.cache_dir = Path(self.cache_dir)
+        for sub_dir in ["markdown", "chunks", "graph_documents"]:
+            self.cache_dir.joinpath(sub_dir).mkdir(parents=True, exist_ok=True)
+
+        manifest_path = self.cache_dir.joinpath(MANIFEST_FILE_NAME)
+        if manifest_path.exists():
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+        self.manifest.setdefault("pdfs", {})
+
+        # Entradas registradas após o último save_manifest (ex.: processo interrompido).
+        journal_path = self.cache_dir.joinpath(JOURNAL_FILE_NAME)
+        if journal_path.exists():
+            truncated = False
+            with open(journal_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Última linha incompleta de uma escrita interrompida.
+                        truncated = True
+                        continue
+                    self.manifest["pdfs"][entry.pop("source_file_path")] = entry
+            if truncated:
+                # Os próximos appends não podem continuar a linha incompleta.
+                self.save_manifest()
+
+    def save_manifest(self):
+        """
+        Salva o manifesto do cache em disco e descarta o journal já incorporado.
+        """
+
+        self._write_json(self.cache_dir.joinpath(MANIFEST_FILE_NAME), self.manifest)
+        self.cache_dir.joinpath(JOURNAL_FILE_NAME).unlink(missing_ok=True)
+        return self
+
+    def get_markdown(self, pdf_hash: str) -> Optional[str]:
+        """
+        Retorna o markdown em cache de um pdf.
+
+        Args:
+            pdf_hash (str): Hash do arquivo pdf.
+
+        Returns:
+            Optional[str]: Texto markdown ou None quando o pdf ainda não foi convertido.
+        """
+
+        file_path = self.cache_dir.joinpath("markdown", f"{pdf_hash}.md")
+        if not file_path.exists():
+            return None
+        with open(file_path) as f:
+            return f.read()
+
+    def put_markdown(self, pdf_hash: str, text: str, source_file_path: Union[str, Path]):
+        """
+        Armazena o markdown de um pdf no cache e registra o pdf no journal do manifesto.
+
+        Args:
+            pdf_hash (str): Hash do arquivo pdf.
+            text (str): Texto markdown extraído do pdf.
+            source_file_path (Union[str, Path]): Caminho do arquivo pdf de origem.
+        """
+
+        file_path = self.cache_dir.joinpath("markdown", f"{pdf_hash}.md")
+        self._write_text(file_path, text)
+        entry = {
+            "sha256": pdf_hash,
+            "markdown_sha256": text_hash(text),
+            "updated_at": datetime.now().isoformat(),
+        }
+        self.manifest["pdfs"][str(source_file_path)] = entry
+        with open(self.cache_dir.joinpath(JOURNAL_FILE_NAME), "a") as f:
+            f.write(json.dumps({"source_file_path": str(source_file_path), **entry}) + "\n")
+        return self
+
+    def get_chunks(self, markdown_hash: str, params_key: str) -> Optional[List[Document]]:
+        """
+        Retorna a lista de chunks em cache de um markdown.
+
+        Args:
+            markdown_hash (str): Hash do conteúdo do markdown.
+            params_key (str): Hash dos parâmetros de chunking.
+
+        Returns:
+            Optional[List[Document]]: Chunks ou None quando não existem no cache.
+        """
+
+        file_path = self.cache_dir.joinpath("chunks", params_key, f"{markdown_hash}.json")
+        if not file_path.exists():
+            return None
+        with open(file_path) as f:
+            return [Document(**i) for i in json.load(f)]
+
+    def put_chunks(self, markdown_hash: str, params_key: str, chunk_documents: List[Document]):
+        """
+        Armazena a lista de chunks de um markdown no cache.
+
+        Args:
+            markdown_hash (str): Hash do conteúdo do markdown.
+            params_key (str): Hash dos parâmetros de chunking.
+            chunk_documents (List[Document]): Chunks gerados a partir do markdown.
+        """
+
+        file_path = self.cache_dir.joinpath("chunks", params_key, f"{markdown_hash}.json")
+        self._write_json(
+            file_path,
+            [{"page_content": i.page_content, "metadata": i.metadata} for i in chunk_documents],
+        )
+        return self
+
+    def get_graph_document(self, chunk_hash: str, params_key: str) -> Optional[GraphDocument]:
+        """
+        Retorna o grafo extraído em cache de um chunk.
+
+        Args:
+            chunk_hash (str): Hash do conteúdo do chunk.
+            params_key (str): Hash dos parâmetros do LLM e do prompt de extração.
+
+        Returns:
+            Optional[GraphDocument]: Grafo extraído ou None quando não existe no cache.
+        """
+
+        file_path = self.cache_dir.joinpath("graph_documents", params_key, f"{chunk_hash}.json")
+        if not file_path.exists():
+            return None
+        with open(file_path) as f:
+            return GraphDocument.model_validate(json.load(f))
+
+    def put_graph_document(self, chunk_hash: str, params_key: str, graph_document: GraphDocument):
+        """
+        Armazena o grafo extraído de um chunk no cache.
+
+        Args:
+            chunk_hash (str): Hash do conteúdo do chunk.
+            params_key (str): Hash dos parâmetros do LLM e do prompt de extração.
+            graph_document (GraphDocument): Grafo extraído do chunk.
+        """
+
+        file_path = self.cache_dir.joinpath("graph_documents", params_key, f"{chunk_hash}.json")
+        self._write_json(file_path, graph_document.model_dump())
+        return self
+
+    def _write_json(self, file_path: Path, data):
+        self._write_text(file_path, json.dumps(data, ensure_ascii=False, default=str))
+
+    def _write_text(self, file_path: Path, text: str):
+        # Escrita atômica para não deixar entradas corrompidas caso o processo seja interrompido.
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file_path = file_path.with_name(f"{file_path.name}.tmp")
+        with open(tmp_file_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_file_path, file_path)
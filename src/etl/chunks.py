@@ -1,10 +1,12 @@
 from dataclasses import dataclass, field
-from typing import List, Tuple, Union
+from typing import Iterable, Iterator, List, Tuple, Union
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from langchain_text_splitters import MarkdownHeaderTextSplitter
 
+from src.etl.cache import text_hash
+
 HEADERS_TO_SPLIT_ON = [
     ("#", "Header 1"),
     ("##", "Header 2"),
@@ -20,33 +22,73 @@ HEADERS_TO_SPLIT_ON = [
 class ChunksFromMarkdow:
     """
     Classe responsável por gerar os chunks a partir do conteúdo de texto do markdown.
+    Quando `source_document` é informado, os chunks são gerados e armazenados em
+    `chunk_documents`. Para corpora grandes, utilize `iter_chunks`, que gera os chunks sob demanda.
 
     Args:
+        source_document (Union[str, List[Document], List[str]], optional): Texto markdown ou lista de documentos. Defaults to None.
         chunk_size (int, optional): Tamanho dos chunks. Defaults to 400.
         chunk_overlap (int, optional): Tamanho da sobreposição entre os chunks. Defaults to 100.
         headers_to_split_on (_type_, optional): Lista de cabeçalhos utilizados para gerar os chunks. Defaults to field(default_factory=lambda: HEADERS_TO_SPLIT_ON).
     """
 
-    source_document: Union[str, List[Document]]
+    source_document: Union[str, List[Document], List[str]] = None
     chunk_size: int = 400
     chunk_overlap: int = 100
     headers_to_split_on: List[Tuple[str, str]] = field(default_factory=lambda: HEADERS_TO_SPLIT_ON)
-    
-    md_header_splits: list = field(init=False, default_factory=list)
+
     chunk_documents: list = field(init=False, default_factory=list)
+    markdown_splitter: MarkdownHeaderTextSplitter = field(init=False, default=None)
+    text_splitter: RecursiveCharacterTextSplitter = field(init=False, default=None)
 
     def __post_init__(self):
-        markdown_documents = []
-        if isinstance(self.source_document, str):
-            markdown_documents.append(self.source_document)
-        elif isinstance(self.source_document, list) and all(isinstance(i, Document) for i in self.source_document):
-            markdown_documents = [i.page_content for i in self.source_document]
-        else:
-            markdown_documents = self.source_document
-
-        for markdown_document in markdown_documents:
-            self.md_header_splits.extend(self.get_md_header_splits(markdown_document))
-            self.chunk_documents.extend(self.get_chunk_documents(self.md_header_splits))
+        # MD splits
+        self.markdown_splitter = MarkdownHeaderTextSplitter(
+            headers_to_split_on=self.headers_to_split_on,
+            strip_headers=False
+        )
+        # Char-level splits
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap
+        )
+
+        if self.source_document is not None:
+            self.chunk_documents = list(self.iter_chunks(self.source_document))
+
+    def iter_chunks(
+        self, documents: Union[str, Iterable[Document], Iterable[str]]
+    ) -> Iterator[Document]:
+        """
+        Gera os chunks de um ou mais documentos markdown sob demanda, um documento por vez.
+        Cada chunk recebe os metadados do documento de origem, o índice do chunk no documento e
+        um identificador estável (`chunk_id`) derivado da origem, do índice e do conteúdo.
+
+        Args:
+            documents (Union[str, Iterable[Document], Iterable[str]]): Texto markdown ou iterável de documentos.
+
+        Yields:
+            Document: Chunk no formato de documento de texto do langchain.
+        """
+
+        if isinstance(documents, (str, Document)):
+            documents = [documents]
+
+        for document_index, document in enumerate(documents):
+            if isinstance(document, str):
+                document = Document(page_content=document)
+
+            source = str(document.metadata.get("source", document_index))
+            md_header_splits = self.get_md_header_splits(document.page_content)
+            for chunk_index, chunk in enumerate(self.get_chunk_documents(md_header_splits)):
+                chunk.metadata = {
+                    **document.metadata,
+                    **chunk.metadata,
+                    "source": source,
+                    "chunk_index": chunk_index,
+                    "chunk_id": text_hash(f"{source}:{chunk_index}:{chunk.page_content}")[:32],
+                }
+                yield chunk
 
     def get_md_header_splits(self, markdown_document: str) -> List[Document]:
         """
@@ -59,12 +101,7 @@ class ChunksFromMarkdow:
             List[Document]: Lista de documentos do langchain quebrados por seções de cabeçalho do markdown.
         """
 
-        # MD splits
-        markdown_splitter = MarkdownHeaderTextSplitter(
-            headers_to_split_on=self.headers_to_split_on, 
-            strip_headers=False
-        )
-        return markdown_splitter.split_text(markdown_document)
+        return self.markdown_splitter.split_text(markdown_document)
 
     def get_chunk_documents(self, md_header_splits: List[Document]) -> List[Document]:
         """
@@ -77,11 +114,5 @@ class ChunksFromMarkdow:
             List[Document]: Lista de chunks no formato de documentos de texto do langchain.
         """
 
-        # Char-level splits        
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap
-        )
-
         # Split chunk documents
-        return text_splitter.split_documents(md_header_splits)
\ No newline at end of file
+        return self.text_splitter.split_documents(md_header_splits)
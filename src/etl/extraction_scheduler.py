@@ -0,0 +1,329 @@
+import asyncio
+from dataclasses import dataclass, field
+import json
+import logging
+from pathlib import Path
+import random
+import time
+from typing import Dict, List, Optional, Union
+
+from langchain_community.graphs.graph_document import GraphDocument
+from langchain_core.documents import Document
+from langchain_experimental.graph_transformers import LLMGraphTransformer
+from tqdm import tqdm
+
+from src.config import (
+    EXTRACTION_MAX_IN_FLIGHT,
+    EXTRACTION_MAX_RETRIES,
+    EXTRACTION_REQUESTS_PER_MINUTE,
+)
+from src.etl.cache import text_hash
+
+_log = logging.getLogger(__name__)
+
+TRANSIENT_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+TRANSIENT_ERROR_NAMES = (
+    "RateLimit",
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "InternalServerError",
+    "APIConnectionError",
+    "Timeout",
+    "DeadlineExceeded",
+)
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Indica se o erro de uma chamada ao LLM é transitório (limite de requisições, indisponibilidade
+    ou timeout) e se a chamada pode ser repetida.
+
+    Args:
+        error (Exception): Erro lançado pela chamada.
+
+    Returns:
+        bool: True quando o erro é transitório.
+    """
+
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+
+    response = getattr(error, "response", None)
+    for status_code in [
+        getattr(error, "status_code", None),
+        getattr(error, "code", None),
+        getattr(response, "status_code", None),
+    ]:
+        if status_code in TRANSIENT_STATUS_CODES:
+            return True
+
+    error_name = type(error).__name__
+    return any(i in error_name for i in TRANSIENT_ERROR_NAMES) or "429" in str(error)
+
+
+@dataclass
+class TokenBucket:
+    """
+    Limitador de requisições do tipo token bucket.
+
+    Args:
+        requests_per_minute (float): Quantidade de requisições permitidas por minuto.
+        capacity (float, optional): Quantidade máxima de requisições em rajada. Defaults to 1.
+    """
+
+    requests_per_minute: float
+    capacity: float = 1
+    tokens: float = field(init=False)
+    updated_at: float = field(init=False)
+    lock: asyncio.Lock = field(init=False, default=None)
+    loop: asyncio.AbstractEventLoop = field(init=False, default=None)
+
+    def __post_init__(self):
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    async def acquire(self):
+        """
+        Aguarda até que exista um token disponível e o consome.
+        """
+
+        # O lock do asyncio pertence a um event loop; o bucket é compartilhado entre execuções.
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.lock = asyncio.Lock()
+            self.loop = loop
+
+        rate = self.requests_per_minute / 60
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / rate)
+
+
+# Um token bucket por provedor, compartilhado por todas as extrações do processo.
+_TOKEN_BUCKETS: Dict[str, TokenBucket] = {}
+
+
+def get_token_bucket(provider: str) -> Optional[TokenBucket]:
+    """
+    Retorna o token bucket do provedor de LLM ou None quando o provedor não possui limite.
+
+    Args:
+        provider (str): Provedor do LLM.
+
+    Returns:
+        Optional[TokenBucket]: Limitador de requisições do provedor.
+    """
+
+    requests_per_minute = EXTRACTION_REQUESTS_PER_MINUTE.get(provider)
+    if not requests_per_minute:
+        return None
+    if provider not in _TOKEN_BUCKETS:
+        _TOKEN_BUCKETS[provider] = TokenBucket(requests_per_minute=requests_per_minute)
+    return _TOKEN_BUCKETS[provider]
+
+
+@dataclass
+class ExtractionReport:
+    """
+    Resumo da execução da extração do grafo de conhecimento.
+    """
+
+    total: int = 0
+    from_checkpoint: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    retries: int = 0
+    transient_errors: int = 0
+    elapsed_time: float = 0.0
+    failed_chunk_ids: List[str] = field(default_factory=list)
+
+    @property
+    def chunks_per_minute(self) -> float:
+        if not self.elapsed_time:
+            return 0.0
+        return 60 * self.succeeded / self.elapsed_time
+
+    def __str__(self) -> str:
+        return (
+            f"{self.succeeded} chunks extracted, {self.from_checkpoint} from checkpoint, "
+            f"{self.failed} failed of {self.total} in {self.elapsed_time:.1f}s "
+            f"({self.chunks_per_minute:.1f} chunks/min, {self.retries} retries, "
+            f"{self.transient_errors} transient errors)"
+        )
+
+
+@dataclass
+class ExtractionScheduler:
+    """
+    Classe responsável por agendar a extração dos grafos de conhecimento chunk a chunk, com limite
+    de requisições simultâneas, limite de requisições por minuto por provedor, novas tentativas com
+    backoff exponencial em erros transitórios e checkpoint em disco dos chunks já processados.
+
+    Args:
+        llm_graph_transformer (LLMGraphTransformer): Transformador utilizado na extração.
+        provider (str): Provedor do LLM, utilizado para selecionar o limite de requisições.
+        max_in_flight (int, optional): Máximo de requisições simultâneas. Defaults to EXTRACTION_MAX_IN_FLIGHT.
+        max_retries (int, optional): Máximo de novas tentativas por chunk. Defaults to EXTRACTION_MAX_RETRIES.
+        backoff_base (float, optional): Tempo base do backoff exponencial em segundos. Defaults to 2.
+        backoff_max (float, optional): Tempo máximo de espera entre tentativas em segundos. Defaults to 60.
+        checkpoint_path (Union[str, Path], optional): Arquivo jsonl de checkpoint. Defaults to None.
+    """
+
+    llm_graph_transformer: LLMGraphTransformer
+    provider: str
+    max_in_flight: int = EXTRACTION_MAX_IN_FLIGHT
+    max_retries: int = EXTRACTION_MAX_RETRIES
+    backoff_base: float = 2.0
+    backoff_max: float = 60.0
+    checkpoint_path: Union[str, Path] = None
+    report: ExtractionReport = field(init=False, default_factory=ExtractionReport)
+
+    async def run(self, chunk_documents: List[Document]) -> List[Optional[GraphDocument]]:
+        """
+        Extrai os grafos dos chunks. Chunks presentes no checkpoint não são reenviados ao LLM e
+        falhas definitivas de um chunk não interrompem a execução.
+
+        Args:
+            chunk_documents (List[Document]): Chunks de texto no formato de documento do langchain.
+
+        Returns:
+            List[Optional[GraphDocument]]: Grafos na mesma ordem dos chunks (None para os chunks que falharam).
+        """
+
+        start_time = time.time()
+        self.report = ExtractionReport(total=len(chunk_documents))
+        checkpoint = self.load_checkpoint()
+
+        graph_documents: List[Optional[GraphDocument]] = [None] * len(chunk_documents)
+        pending = []
+        for i, chunk_document in enumerate(chunk_documents):
+            graph_doc = checkpoint.get(self.get_chunk_id(chunk_document))
+            if graph_doc is None:
+                pending.append(i)
+                continue
+            graph_doc.source = chunk_document
+            graph_documents[i] = graph_doc
+            self.report.from_checkpoint += 1
+
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        token_bucket = get_token_bucket(self.provider)
+        progress = tqdm(total=len(pending), desc="KG extraction", unit="chunk")
+        checkpoint_file = None
+        if self.checkpoint_path is not None:
+            Path(self.checkpoint_path).parent.mkdir(parents=True, exist_ok=True)
+            checkpoint_file = open(self.checkpoint_path, "a")
+
+        async def extract(i: int):
+            async with semaphore:
+                graph_doc = await self.extract_with_retry(chunk_documents[i], token_bucket)
+            progress.update(1)
+            if graph_doc is None:
+                return
+            graph_documents[i] = graph_doc
+            if checkpoint_file is not None:
+                self.write_checkpoint(checkpoint_file, chunk_documents[i], graph_doc)
+
+        try:
+            await asyncio.gather(*[extract(i) for i in pending])
+        finally:
+            progress.close()
+            if checkpoint_file is not None:
+                checkpoint_file.close()
+
+        self.report.elapsed_time = time.time() - start_time
+        _log.info(f"KG extraction finished: {self.report}")
+        return graph_documents
+
+    async def extract_with_retry(
+        self, chunk_document: Document, token_bucket: Optional[TokenBucket]
+    ) -> Optional[GraphDocument]:
+        """
+        Extrai o grafo de um chunk, repetindo a chamada com backoff exponencial em erros transitórios.
+
+        Args:
+            chunk_document (Document): Chunk de texto.
+            token_bucket (Optional[TokenBucket]): Limitador de requisições do provedor.
+
+        Returns:
+            Optional[GraphDocument]: Grafo extraído ou None quando a extração falhou.
+        """
+
+        chunk_id = self.get_chunk_id(chunk_document)
+        for attempt in range(self.max_retries + 1):
+            if token_bucket is not None:
+                await token_bucket.acquire()
+            try:
+                graph_doc = await self.llm_graph_transformer.aprocess_response(chunk_document)
+                self.report.succeeded += 1
+                return graph_doc
+            except Exception as e:
+                transient = is_transient_error(e)
+                if transient:
+                    self.report.transient_errors += 1
+                if not transient or attempt == self.max_retries:
+                    _log.error(f"Chunk {chunk_id} failed after {attempt + 1} attempts: {e!r}")
+                    break
+
+                delay = min(self.backoff_max, self.backoff_base * 2**attempt)
+                delay = random.uniform(delay / 2, delay)
+                _log.warning(f"Chunk {chunk_id} transient error ({e!r}), retrying in {delay:.1f}s")
+                self.report.retries += 1
+                await asyncio.sleep(delay)
+
+        self.report.failed += 1
+        self.report.failed_chunk_ids.append(chunk_id)
+        return None
+
+    def get_chunk_id(self, chunk_document: Document) -> str:
+        """
+        Retorna o identificador do chunk utilizado no checkpoint.
+
+        Args:
+            chunk_document (Document): Chunk de texto.
+
+        Returns:
+            str: Identificador do chunk.
+        """
+
+        return chunk_document.metadata.get("chunk_id") or text_hash(chunk_document.page_content)
+
+    def load_checkpoint(self) -> Dict[str, GraphDocument]:
+        """
+        Carrega os grafos dos chunks já processados em execuções anteriores.
+
+        Returns:
+            Dict[str, GraphDocument]: Grafos indexados pelo identificador do chunk.
+        """
+
+        checkpoint = {}
+        if self.checkpoint_path is None or not Path(self.checkpoint_path).exists():
+            return checkpoint
+
+        with open(self.checkpoint_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última linha incompleta de uma execução interrompida.
+                    continue
+                checkpoint[entry["chunk_id"]] = GraphDocument.model_validate(
+                    entry["graph_document"]
+                )
+        _log.info(f"{len(checkpoint)} chunks loaded from checkpoint {self.checkpoint_path}.")
+        return checkpoint
+
+    def write_checkpoint(
+        self, checkpoint_file, chunk_document: Document, graph_doc: GraphDocument
+    ):
+        entry = {
+            "chunk_id": self.get_chunk_id(chunk_document),
+            "graph_document": graph_doc.model_dump(),
+        }
+        checkpoint_file.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        checkpoint_file.flush()
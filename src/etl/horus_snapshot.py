@@ -0,0 +1,240 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import json
+import logging
+from pathlib import Path
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from loguru import logger
+import typer
+
+from src.config import HORUS_SNAPSHOT_DIR
+from src.connetion.horus_client import HorusClient, get_horus_client
+from src.connetion.horus_snapshot import (
+    PARTITION_COLUMNS,
+    get_columns,
+    get_duckdb,
+    quote_path,
+)
+from src.constants import ALL_BRAZILIAN_UF
+
+_log = logging.getLogger(__name__)
+
+app = typer.Typer()
+
+# Chave dos itens do estoque nas sincronizações interrompidas por `max_pages`.
+STOCK_KEY_COLUMNS = ["codigo_cnes", "codigo_catmat", "numero_lote"]
+
+
+@dataclass
+class SnapshotSyncReport:
+    """
+    Resumo da sincronização do snapshot do Hórus.
+    """
+
+    rows: int = 0
+    pages: int = 0
+    partitions: int = 0
+    elapsed_time: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.rows} rows from {self.pages} pages written to {self.partitions} partitions "
+            f"in {self.elapsed_time:.2f}s"
+        )
+
+
+@dataclass
+class HorusSnapshotSync:
+    """
+    Classe responsável por sincronizar o snapshot local (Parquet) do estoque de medicamentos.
+    Os itens de cada UF são baixados página a página da API e gravados em partições
+    `codigo_uf=<uf>/data_posicao_estoque=<data>/data.parquet`. Cada partição sincronizada é
+    gravada de forma atômica; as demais partições não são alteradas.
+    - Sincronização completa: a partição é substituída pelos itens baixados.
+    - Filtrada por `codigo_catmat`: somente os itens do CATMAT são substituídos na partição.
+    - Interrompida por `max_pages`: os itens baixados substituem os itens com a mesma chave
+      (STOCK_KEY_COLUMNS) e os demais itens da partição são mantidos.
+
+    Args:
+        client (HorusClient, optional): Cliente da API. Defaults to get_horus_client().
+        snapshot_dir (Union[str, Path], optional): Diretório do snapshot. Defaults to HORUS_SNAPSHOT_DIR.
+        workers (int, optional): Quantidade de UFs baixadas em paralelo. Defaults to 4.
+        max_pages (Optional[int], optional): Quantidade máxima de páginas por UF (None para todas). Defaults to None.
+    """
+
+    client: HorusClient = field(default_factory=get_horus_client)
+    snapshot_dir: Union[str, Path] = HORUS_SNAPSHOT_DIR
+    workers: int = 4
+    max_pages: Optional[int] = None
+    report: SnapshotSyncReport = field(init=False, default_factory=SnapshotSyncReport)
+
+    def sync(
+        self,
+        codigos_uf: Optional[List[int]] = None,
+        data_posicao_estoque: Optional[str] = None,
+        codigo_catmat: Optional[str] = None,
+    ):
+        """
+        Baixa o estoque das UFs e grava as partições do snapshot.
+
+        Args:
+            codigos_uf (Optional[List[int]], optional): Códigos IBGE das UFs. Defaults to None (todas as UFs).
+            data_posicao_estoque (Optional[str], optional): Data da posição de estoque (AAAA-MM-DD). Defaults to None (todas as datas).
+            codigo_catmat (Optional[str], optional): Código CATMAT do item. Defaults to None (todos os itens).
+        """
+
+        start_time = time.time()
+        self.report = SnapshotSyncReport()
+        codigos_uf = codigos_uf or [i["codigo"] for i in ALL_BRAZILIAN_UF]
+
+        params = {"data_posicao_estoque": data_posicao_estoque, "codigo_catmat": codigo_catmat}
+        params = {key: value for key, value in params.items() if value is not None}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # Os contadores do relatório são atualizados somente nesta thread.
+            for rows, pages, complete in executor.map(
+                lambda codigo_uf: self.download({**params, "codigo_uf": codigo_uf}), codigos_uf
+            ):
+                self.report.pages += pages
+                if not complete:
+                    merge_on = STOCK_KEY_COLUMNS
+                elif codigo_catmat is not None:
+                    merge_on = ["codigo_catmat"]
+                else:
+                    merge_on = None
+                self.write(rows, merge_on=merge_on)
+
+        self.report.elapsed_time = time.time() - start_time
+        _log.info(f"Horus snapshot sync finished: {self.report}")
+        return self
+
+    def download(self, params: Dict) -> Tuple[List[Dict], int, bool]:
+        """
+        Baixa todas as páginas de uma consulta (no máximo `max_pages`).
+
+        Args:
+            params (Dict): Filtros da consulta.
+
+        Returns:
+            Tuple[List[Dict], int, bool]: Itens do estoque, quantidade de páginas baixadas e se a última página foi baixada.
+        """
+
+        rows = []
+        offset = 0
+        complete = False
+        while self.max_pages is None or offset < self.max_pages:
+            page_params = {**params, "limit": self.client.page_size, "offset": offset}
+            page = self.client.get_page(page_params)
+            rows.extend(page)
+            offset += 1
+            if len(page) < self.client.page_size:
+                complete = True
+                break
+        if not complete:
+            _log.warning(f"Horus UF {params['codigo_uf']}: sync stopped after {offset} pages.")
+        _log.info(f"Horus UF {params['codigo_uf']}: {len(rows)} rows from {offset} pages.")
+        return rows, offset, complete
+
+    def write(self, rows: List[Dict], merge_on: Optional[List[str]] = None):
+        """
+        Grava os itens nas partições por UF e data da posição de estoque.
+
+        Args:
+            rows (List[Dict]): Itens do estoque.
+            merge_on (Optional[List[str]], optional): Colunas dos itens substituídos nas partições existentes. Defaults to None (substitui as partições).
+        """
+
+        partitions = defaultdict(list)
+        for row in rows:
+            partitions[tuple(row.get(i) for i in PARTITION_COLUMNS)].append(row)
+
+        for (codigo_uf, data_posicao_estoque), partition_rows in partitions.items():
+            if codigo_uf is None or data_posicao_estoque is None:
+                _log.warning(f"{len(partition_rows)} rows without UF or date skipped.")
+                continue
+            path = (
+                Path(self.snapshot_dir)
+                / f"codigo_uf={codigo_uf}"
+                / f"data_posicao_estoque={str(data_posicao_estoque)[:10]}"
+                / "data.parquet"
+            )
+            self.write_partition(path, partition_rows, merge_on)
+            self.report.rows += len(partition_rows)
+            self.report.partitions += 1
+        return self
+
+    def write_partition(self, path: Path, rows: List[Dict], merge_on: Optional[List[str]] = None):
+        # As colunas de particionamento ficam somente no caminho do arquivo.
+        columns = {
+            name: dtype for name, dtype in get_columns().items() if name not in PARTITION_COLUMNS
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".parquet.tmp")
+
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".jsonl", encoding="utf-8", delete=False
+        ) as file:
+            for row in rows:
+                file.write(json.dumps({i: row.get(i) for i in columns}, ensure_ascii=False))
+                file.write("\n")
+
+        try:
+            columns_struct = ", ".join(f"'{name}': '{dtype}'" for name, dtype in columns.items())
+            source = (
+                f"SELECT * FROM read_json({quote_path(file.name)}, "
+                f"format = 'newline_delimited', columns = {{{columns_struct}}})"
+            )
+            if merge_on and path.exists():
+                # Mantém os itens da partição que não foram baixados nesta sincronização.
+                matches = " AND ".join(
+                    f"new.{name} IS NOT DISTINCT FROM old.{name}" for name in merge_on
+                )
+                source = (
+                    f"WITH new AS ({source}) SELECT * FROM new UNION ALL BY NAME "
+                    f"SELECT * FROM read_parquet({quote_path(path)}) AS old "
+                    f"WHERE NOT EXISTS (SELECT 1 FROM new WHERE {matches})"
+                )
+            connection = get_duckdb().connect(database=":memory:")
+            connection.execute(
+                f"COPY ({source} "
+                # Itens agrupados por CATMAT: as estatísticas dos row groups filtram os arquivos.
+                "ORDER BY codigo_catmat) "
+                f"TO {quote_path(tmp_path)} (FORMAT PARQUET, COMPRESSION ZSTD)"
+            )
+            connection.close()
+            tmp_path.replace(path)
+        finally:
+            Path(file.name).unlink(missing_ok=True)
+        return self
+
+
+@app.command()
+def main(
+    codigo_uf: List[int] = typer.Option(None, help="Códigos IBGE das UFs (todas por padrão)."),
+    data_posicao_estoque: str = typer.Option(None, help="Data da posição de estoque."),
+    codigo_catmat: str = typer.Option(None, help="Código CATMAT do item."),
+    max_pages: int = typer.Option(None, help="Quantidade máxima de páginas por UF."),
+    workers: int = typer.Option(4, help="Quantidade de UFs baixadas em paralelo."),
+):
+    """
+    Sincroniza o snapshot local do estoque de medicamentos (BNAFAR/Hórus).
+    """
+
+    report = (
+        HorusSnapshotSync(workers=workers, max_pages=max_pages)
+        .sync(
+            codigos_uf=codigo_uf or None,
+            data_posicao_estoque=data_posicao_estoque,
+            codigo_catmat=codigo_catmat,
+        )
+        .report
+    )
+    logger.info(f"Horus snapshot: {report}")
+
+
+if __name__ == "__main__":
+    app()
@@ -1,27 +1,52 @@
 from dataclasses import dataclass, field
-from typing import Any, List, Tuple
+from importlib.metadata import PackageNotFoundError, version
+import logging
+from pathlib import Path
+from typing import Any, List, Tuple, Union
 
 from langchain_core.documents import Document
 from langchain_experimental.graph_transformers import LLMGraphTransformer
 
-from src.config import BUILD_GRAPH_AUTO
+from src.config import (
+    BUILD_GRAPH_AUTO,
+    EXTRACTION_CHECKPOINT_DIR,
+    EXTRACTION_MAX_IN_FLIGHT,
+    LLM_PROVIDER,
+)
 from src.connetion.chat_model import LLMModel
 from src.connetion.embeddings import EmbeddingsModel
 from src.connetion.graph_db import KgDatabaseConnetion
 from src.constants import ALLOWED_NODES, ALLOWED_RELATIONSHIPS
+from src.etl.cache import IngestionCache, params_hash, text_hash
+from src.etl.extraction_scheduler import ExtractionReport, ExtractionScheduler
 from src.utils.dataviz import export_graph_documment_to_html, plot_graph_documents
 
+_log = logging.getLogger(__name__)
+
 
 @dataclass
 class KGFromText:
     """
     Classe responsável pela extração dos grafos de conhecimento de textos.
+
+    Args:
+        cache (IngestionCache, optional): Cache incremental da ingestão. Quando informado, os
+            grafos já extraídos de chunks sem alteração são reaproveitados. Defaults to None.
+        provider (str, optional): Provedor do LLM, utilizado no limite de requisições. Defaults to LLM_PROVIDER.
+        max_in_flight (int, optional): Máximo de requisições simultâneas ao LLM. Defaults to EXTRACTION_MAX_IN_FLIGHT.
+        checkpoint_path (Union[str, Path], optional): Arquivo de checkpoint da extração. Por padrão
+            é definido a partir dos parâmetros de extração, permitindo retomar execuções interrompidas.
     """
 
     llm: LLMModel
     embeddings: EmbeddingsModel
+    cache: IngestionCache = None
+    provider: str = LLM_PROVIDER
+    max_in_flight: int = EXTRACTION_MAX_IN_FLIGHT
+    checkpoint_path: Union[str, Path] = None
     db: KgDatabaseConnetion = field(init=False, default=None)
     graph_documents: Any = field(init=False, default=None)  #  List[GraphDocument]
+    extraction_report: ExtractionReport = field(init=False, default=None)
 
     def __post_init__(self):
         self.db = KgDatabaseConnetion(llm=self.llm, embedding=self.embeddings)
@@ -30,6 +55,8 @@ class KGFromText:
         """
         Função que gera os grafos de conhecimento utilizando um modelo LLM.
         Lembrar de chamar essa função com await.
+        Os chunks são enviados ao LLM pelo `ExtractionScheduler`; chunks que falharem após todas as
+        tentativas são descartados e listados em `extraction_report`.
 
         Args:
             chunk_documents (List[Document]): Chunks de texto no formato de documento do langchain.
@@ -45,9 +72,74 @@ class KGFromText:
                 allowed_nodes=ALLOWED_NODES,
                 allowed_relationships=ALLOWED_RELATIONSHIPS,
             )
-        self.graph_documents = await llm_gt.aconvert_to_graph_documents(chunk_documents)
+
+        params_key = self.get_extraction_params_key()
+        scheduler = ExtractionScheduler(
+            llm_graph_transformer=llm_gt,
+            provider=self.provider,
+            max_in_flight=self.max_in_flight,
+            checkpoint_path=self.checkpoint_path
+            or EXTRACTION_CHECKPOINT_DIR.joinpath(f"{params_key}.jsonl"),
+        )
+
+        if self.cache is None:
+            graph_documents = await scheduler.run(chunk_documents)
+            self.extraction_report = scheduler.report
+            self.graph_documents = [i for i in graph_documents if i is not None]
+            return self
+
+        graph_documents = [
+            self.cache.get_graph_document(text_hash(i.page_content), params_key)
+            for i in chunk_documents
+        ]
+        missing = [i for i, graph_doc in enumerate(graph_documents) if graph_doc is None]
+        _log.info(
+            f"{len(chunk_documents) - len(missing)} of {len(chunk_documents)} chunks found in "
+            "the extraction cache."
+        )
+
+        extracted = await scheduler.run([chunk_documents[i] for i in missing])
+        self.extraction_report = scheduler.report
+        for i, graph_doc in zip(missing, extracted):
+            if graph_doc is None:
+                continue
+            self.cache.put_graph_document(
+                text_hash(chunk_documents[i].page_content), params_key, graph_doc
+            )
+            graph_documents[i] = graph_doc
+
+        # O chunk atual é mantido como origem, preservando os metadados da execução corrente.
+        for chunk_document, graph_doc in zip(chunk_documents, graph_documents):
+            if graph_doc is not None:
+                graph_doc.source = chunk_document
+
+        self.graph_documents = [i for i in graph_documents if i is not None]
         return self
 
+    def get_extraction_params_key(self) -> str:
+        """
+        Retorna o hash dos parâmetros que influenciam a extração do grafo (modelo LLM, nós e
+        relacionamentos permitidos e versão do prompt do LLMGraphTransformer).
+
+        Returns:
+            str: Hash dos parâmetros de extração.
+        """
+
+        try:
+            transformer_version = version("langchain-experimental")
+        except PackageNotFoundError:
+            transformer_version = None
+
+        return params_hash(
+            llm=type(self.llm).__name__,
+            model=getattr(self.llm, "model_name", None) or getattr(self.llm, "model", None),
+            temperature=getattr(self.llm, "temperature", None),
+            build_graph_auto=BUILD_GRAPH_AUTO,
+            allowed_nodes=None if BUILD_GRAPH_AUTO else ALLOWED_NODES,
+            allowed_relationships=None if BUILD_GRAPH_AUTO else ALLOWED_RELATIONSHIPS,
+            transformer_version=transformer_version,
+        )
+
     def plot_and_export_visualization(
         self, file_name: str, figsize: Tuple = (10, 8), show_node_properties: bool = False
     ):
@@ -80,9 +172,13 @@ class KGFromText:
         self.db.graph.save(graph_documents=self.graph_documents)
 
         # Salvando o embedding do texto dos chunks
-        # Por hora vamos utilizar este método, mas é possível utilizar os demais métodos do vetor.
-        self.db.vector.save_embeddings_from_existing_graph()
+        # Somente os documentos novos ou alterados são enviados ao modelo de embeddings.
+        self.db.vector.backfill_embeddings()
         # Outros métodos possíveis
+        # self.db.vector.save_embeddings_from_existing_graph()
         # self.db.vector.save_embeddings_from_documents(chunk_documents)
         # self.db.vector.add_documents_embeddings(chunk_documents)
+
+        # Nova versão do grafo: invalida os caches que dependem do conteúdo do grafo.
+        self.db.graph.bump_version()
         return self
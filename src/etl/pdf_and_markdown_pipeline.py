@@ -1,10 +1,11 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass, field
 import logging
 from pathlib import Path
 import time
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple, Union
 
-from docling.datamodel.base_models import InputFormat
+from docling.datamodel.base_models import ConversionStatus, InputFormat
 from docling.datamodel.pipeline_options import (
     AcceleratorDevice,
     AcceleratorOptions,
@@ -13,25 +14,188 @@ from docling.datamodel.pipeline_options import (
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from langchain_community.document_loaders import UnstructuredMarkdownLoader
 from langchain_core.documents import Document
-import spacy
 
+from src.etl.cache import IngestionCache, file_hash, params_hash, text_hash
 from src.etl.chunks import HEADERS_TO_SPLIT_ON, ChunksFromMarkdow
 
-nlp = spacy.load("pt_core_news_md")
-
 logging.basicConfig(level=logging.INFO)
 _log = logging.getLogger(__name__)  # Initialize the logger here
 
+# Conversor do docling mantido "aquecido" em cada processo (modelos de OCR e tabelas carregados
+# uma única vez por processo).
+_DOCLING_CONVERTER: Optional[DocumentConverter] = None
+
+# Modelo do spaCy carregado somente na primeira chamada de get_spacy_model.
+_SPACY_MODEL = None
+
+
+def build_docling_converter() -> DocumentConverter:
+    """
+    Função responsável por criar o conversor do docling com as opções de pipeline do projeto.
+
+    Returns:
+        DocumentConverter: Conversor do docling configurado com OCR e estrutura de tabelas.
+    """
+    ###########################################################################
+    # Docling Parse with EasyOCR
+    # ----------------------
+    pipeline_options = PdfPipelineOptions()
+    pipeline_options.do_ocr = True
+    pipeline_options.do_table_structure = True
+    pipeline_options.table_structure_options.do_cell_matching = True
+    # pipeline_options.images_scale = IMAGE_RESOLUTION_SCALE
+    # pipeline_options.generate_page_images = True
+    # pipeline_options.generate_picture_images = True
+
+    pipeline_options.ocr_options.lang = [
+        "pt",
+        "en",
+        "es",
+    ]
+    pipeline_options.accelerator_options = AcceleratorOptions(
+        num_threads=4, device=AcceleratorDevice.AUTO
+    )
+
+    doc_converter = DocumentConverter(
+        format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
+    )
+    ###########################################################################
+    return doc_converter
+
+
+def get_docling_converter() -> DocumentConverter:
+    """
+    Retorna o conversor do docling do processo atual, criando-o somente na primeira chamada.
+
+    Returns:
+        DocumentConverter: Conversor do docling compartilhado pelo processo.
+    """
+    global _DOCLING_CONVERTER
+    if _DOCLING_CONVERTER is None:
+        start_time = time.time()
+        _DOCLING_CONVERTER = build_docling_converter()
+        # Inicializa o pipeline de PDF (carrega os modelos) antes da primeira conversão.
+        _DOCLING_CONVERTER.initialize_pipeline(InputFormat.PDF)
+        _log.info(f"Docling converter initialized in {time.time() - start_time:.2f} seconds.")
+    return _DOCLING_CONVERTER
+
+
+def get_spacy_model(name: str = "pt_core_news_md"):
+    """
+    Retorna o modelo do spaCy do processo atual, importando o spaCy e carregando o modelo somente
+    na primeira chamada.
+
+    Args:
+        name (str, optional): Nome do modelo. Defaults to "pt_core_news_md".
+
+    Returns:
+        spacy.language.Language: Modelo do spaCy.
+    """
+    global _SPACY_MODEL
+    if _SPACY_MODEL is None:
+        import spacy
+
+        start_time = time.time()
+        _SPACY_MODEL = spacy.load(name)
+        _log.info(f"spaCy model {name} loaded in {time.time() - start_time:.2f} seconds.")
+    return _SPACY_MODEL
+
+
+@dataclass
+class PdfConversionResult:
+    """
+    Resultado da conversão de um arquivo pdf em markdown no modo batch.
+
+    Args:
+        source_file_path (Path): Caminho do arquivo pdf de origem.
+        dest_file_path (Path, optional): Caminho do arquivo markdown gerado.
+        success (bool): Indica se a conversão foi realizada com sucesso.
+        elapsed_time (float): Tempo de conversão do arquivo em segundos.
+        error (str, optional): Mensagem de erro quando a conversão falha.
+        cached (bool): Indica se o markdown foi reaproveitado do cache de ingestão.
+    """
+
+    source_file_path: Path
+    dest_file_path: Optional[Path] = None
+    success: bool = False
+    elapsed_time: float = 0.0
+    error: Optional[str] = None
+    cached: bool = False
+
+
+def _convert_pdf_batch(
+    source_file_paths: List[Path], dest_dir_path: Path
+) -> List[PdfConversionResult]:
+    """
+    Converte um lote de arquivos pdf no processo atual reutilizando o conversor do docling.
+    Falhas individuais são registradas no resultado e não interrompem o lote.
+
+    Args:
+        source_file_paths (List[Path]): Caminhos dos arquivos pdf de origem.
+        dest_dir_path (Path): Diretório em que os arquivos markdown devem ser armazenados.
+
+    Returns:
+        List[PdfConversionResult]: Resultado da conversão de cada arquivo.
+    """
+
+    # Os resultados são indexados pelo caminho absoluto: o docling pode informar o arquivo de
+    # entrada com um caminho diferente (relativo ou resolvido) do recebido.
+    results = {i.resolve(): PdfConversionResult(source_file_path=i) for i in source_file_paths}
+    try:
+        doc_converter = get_docling_converter()
+        start_time = time.time()
+        for conv_result in doc_converter.convert_all(source_file_paths, raises_on_error=False):
+            end_time = time.time()
+            result = results.get(Path(conv_result.input.file).resolve())
+            if result is None:
+                _log.warning(f"Unexpected conversion result for {conv_result.input.file}.")
+                continue
+            result.elapsed_time = end_time - start_time
+            start_time = end_time
+            try:
+                if conv_result.status in (
+                    ConversionStatus.SUCCESS,
+                    ConversionStatus.PARTIAL_SUCCESS,
+                ):
+                    text = conv_result.document.export_to_text()
+                    result.dest_file_path = dest_dir_path.joinpath(
+                        f"{result.source_file_path.name}.md"
+                    )
+                    with open(result.dest_file_path, "w") as f:
+                        f.write(text)
+                    result.success = True
+                else:
+                    errors = "; ".join(i.error_message for i in conv_result.errors)
+                    result.error = f"{conv_result.status}: {errors}"
+            except Exception as e:
+                result.error = repr(e)
+        for result in results.values():
+            if not result.success and result.error is None:
+                result.error = "Missing conversion result."
+    except Exception as e:
+        # Falha do conversor: os arquivos ainda não convertidos do lote são marcados com erro.
+        for result in results.values():
+            if not result.success and result.error is None:
+                result.error = repr(e)
+
+    return list(results.values())
+
 
 @dataclass
 class PdfAndMarkdownPipeline:
     """
     Classe responsável por realizar todo o tratamento dos dados de arquivos pdfs e/ou markdown.
+
+    Args:
+        cache (IngestionCache, optional): Cache incremental da ingestão. Quando informado, pdfs e
+            markdowns sem alteração não são reprocessados. Defaults to None.
     """
 
+    cache: IngestionCache = None
     md_documents: List[Document] = field(init=False, default=None)
     chunk_documents: list = field(init=False, default_factory=list)
     chunk_object: ChunksFromMarkdow = field(init=False, default=None)
+    conversion_results: List[PdfConversionResult] = field(init=False, default_factory=list)
 
     def pdf_to_markdown(self, source_file_path: Union[str, Path], dest_dir_path: Union[str, Path]):
         """
@@ -47,15 +211,138 @@ class PdfAndMarkdownPipeline:
         if isinstance(dest_dir_path, str):
             dest_dir_path = Path(dest_dir_path)
 
+        pdf_hash = None
+        if self.cache is not None:
+            pdf_hash = file_hash(source_file_path)
+            text = self.cache.get_markdown(pdf_hash)
+            if text is not None:
+                _log.info(f"Document {source_file_path} unchanged, using cached markdown.")
+                self.save_text_on_md_file(text, source_file_path.name, dest_dir_path)
+                return self
+
         conv_result = self.docling_converter(source_file_path)
         if conv_result and conv_result.document:
             text = self.extract_text_from_docling_document(conv_result.document)
             self.save_text_on_md_file(text, source_file_path.name, dest_dir_path)
+            if self.cache is not None:
+                self.cache.put_markdown(pdf_hash, text, source_file_path)
         else:
             _log.error("Docling conversion failed or returned an empty document.")
 
         return self
 
+    def pdf_to_markdown_batch(
+        self,
+        source_file_paths: List[Union[str, Path]],
+        dest_dir_path: Union[str, Path],
+        workers: int = 1,
+        batch_size: int = 8,
+    ):
+        """
+        Função responsável por converter um conjunto de arquivos pdf em markdown.
+        Cada processo mantém um único conversor do docling carregado e recebe os arquivos em
+        lotes, que são convertidos em fluxo com o `convert_all`. Falhas de arquivos individuais
+        são registradas em `conversion_results` e não interrompem o processamento.
+
+        Args:
+            source_file_paths (List[Union[str, Path]]): Caminhos dos arquivos pdf de origem.
+            dest_dir_path (Union[str, Path]): Caminho do diretório em que os arquivos markdown gerados devem ser armazenados.
+            workers (int, optional): Quantidade de processos utilizados na conversão. Defaults to 1.
+            batch_size (int, optional): Quantidade de arquivos enviados por vez para cada processo. Defaults to 8.
+        """
+
+        source_file_paths = [Path(i) for i in source_file_paths]
+        dest_dir_path = Path(dest_dir_path)
+        dest_dir_path.mkdir(parents=True, exist_ok=True)
+
+        start_time = time.time()
+        self.conversion_results = []
+
+        pdf_hashes = {}
+        pending_file_paths = source_file_paths
+        if self.cache is not None:
+            pending_file_paths = []
+            cached_results = []
+            for source_file_path in source_file_paths:
+                pdf_hashes[source_file_path] = file_hash(source_file_path)
+                text = self.cache.get_markdown(pdf_hashes[source_file_path])
+                if text is None:
+                    pending_file_paths.append(source_file_path)
+                    continue
+                self.save_text_on_md_file(text, source_file_path.name, dest_dir_path)
+                cached_results.append(
+                    PdfConversionResult(
+                        source_file_path=source_file_path,
+                        dest_file_path=dest_dir_path.joinpath(f"{source_file_path.name}.md"),
+                        success=True,
+                        cached=True,
+                    )
+                )
+            self.conversion_results.extend(cached_results)
+
+        batches = [
+            pending_file_paths[i : i + batch_size]
+            for i in range(0, len(pending_file_paths), batch_size)
+        ]
+
+        if workers <= 1:
+            for batch in batches:
+                self._log_conversion_results(_convert_pdf_batch(batch, dest_dir_path))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(_convert_pdf_batch, batch, dest_dir_path): batch
+                    for batch in batches
+                }
+                for future in as_completed(futures):
+                    try:
+                        batch_results = future.result()
+                    except Exception as e:
+                        # Processo encerrado de forma inesperada (ex.: falta de memória).
+                        batch_results = [
+                            PdfConversionResult(source_file_path=i, error=repr(e))
+                            for i in futures[future]
+                        ]
+                    self._log_conversion_results(batch_results)
+        end_time = time.time() - start_time
+
+        if self.cache is not None:
+            for result in self.conversion_results:
+                if result.success and not result.cached:
+                    with open(result.dest_file_path) as f:
+                        text = f.read()
+                    self.cache.put_markdown(
+                        pdf_hashes[result.source_file_path], text, result.source_file_path
+                    )
+            self.cache.save_manifest()
+
+        cached = sum(1 for i in self.conversion_results if i.cached)
+        succeeded = sum(1 for i in self.conversion_results if i.success) - cached
+        failed = len(self.conversion_results) - succeeded - cached
+        _log.info(
+            f"Batch of {len(source_file_paths)} documents converted in {end_time:.2f} seconds "
+            f"({succeeded} succeeded, {cached} cached, {failed} failed, {workers} workers)."
+        )
+        return self
+
+    def _log_conversion_results(self, results: List[PdfConversionResult]):
+        """
+        Registra o resultado da conversão de um lote de arquivos.
+
+        Args:
+            results (List[PdfConversionResult]): Resultado da conversão de cada arquivo.
+        """
+
+        for result in results:
+            if result.success:
+                _log.info(
+                    f"Document {result.source_file_path} converted in "
+                    f"{result.elapsed_time:.2f} seconds."
+                )
+            else:
+                _log.error(f"Document {result.source_file_path} failed: {result.error}")
+        self.conversion_results.extend(results)
+
     def docling_converter(self, source_file_path: Path):
         """
         Função responsável pela conversão do arquivo pdf em texto utilizando o docling.
@@ -66,30 +353,7 @@ class PdfAndMarkdownPipeline:
         Returns:
             Docling: Objeto do docling que contém o texto do pdf.
         """
-        ###########################################################################
-        # Docling Parse with EasyOCR
-        # ----------------------
-        pipeline_options = PdfPipelineOptions()
-        pipeline_options.do_ocr = True
-        pipeline_options.do_table_structure = True
-        pipeline_options.table_structure_options.do_cell_matching = True
-        # pipeline_options.images_scale = IMAGE_RESOLUTION_SCALE
-        # pipeline_options.generate_page_images = True
-        # pipeline_options.generate_picture_images = True
-
-        pipeline_options.ocr_options.lang = [
-            "pt",
-            "en",
-            "es",
-        ]
-        pipeline_options.accelerator_options = AcceleratorOptions(
-            num_threads=4, device=AcceleratorDevice.AUTO
-        )
-
-        doc_converter = DocumentConverter(
-            format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
-        )
-        ###########################################################################
+        doc_converter = get_docling_converter()
 
         start_time = time.time()
         conv_result = doc_converter.convert(source_file_path)
@@ -152,9 +416,7 @@ class PdfAndMarkdownPipeline:
         self,
         chunk_size: int = 400,
         chunk_overlap: int = 100,
-        headers_to_split_on: List[Tuple[str, str]] = field(
-            default_factory=lambda: HEADERS_TO_SPLIT_ON
-        ),
+        headers_to_split_on: List[Tuple[str, str]] = None,
     ):
         """
         Função responsável por gerar os chunks a partir do conteúdo de texto do markdown.
@@ -162,9 +424,25 @@ class PdfAndMarkdownPipeline:
         Args:
             chunk_size (int, optional): Tamanho dos chunks. Defaults to 400.
             chunk_overlap (int, optional): Tamanho da sobreposição entre os chunks. Defaults to 100.
-            headers_to_split_on (_type_, optional): Lista de cabeçalhos utilizados para gerar os chunks. Defaults to field(default_factory=lambda: HEADERS_TO_SPLIT_ON).
+            headers_to_split_on (_type_, optional): Lista de cabeçalhos utilizados para gerar os chunks. Defaults to HEADERS_TO_SPLIT_ON.
         """
 
+        if headers_to_split_on is None:
+            headers_to_split_on = HEADERS_TO_SPLIT_ON
+
+        if self.cache is not None:
+            params_key = params_hash(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                headers_to_split_on=headers_to_split_on,
+            )
+            markdown_hash = text_hash("".join(i.page_content for i in self.md_documents))
+            chunk_documents = self.cache.get_chunks(markdown_hash, params_key)
+            if chunk_documents is not None:
+                _log.info(f"Using {len(chunk_documents)} cached chunks.")
+                self.chunk_documents = chunk_documents
+                return self
+
         self.chunk_object = ChunksFromMarkdow(
             source_document=self.md_documents,
             chunk_size=chunk_size,
@@ -172,4 +450,6 @@ class PdfAndMarkdownPipeline:
             headers_to_split_on=headers_to_split_on,
         )
         self.chunk_documents = self.chunk_object.chunk_documents
+        if self.cache is not None:
+            self.cache.put_chunks(markdown_hash, params_key, self.chunk_documents)
         return self
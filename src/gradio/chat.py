@@ -1,22 +1,20 @@
-import time
-
 import gradio as gr
-from src.agents.main import MyAgent
-from src.config import EMBEDDING_PROVIDER, LLM_MAX_TOKENS, LLM_PROVIDER, LLM_TEMPERATURE
+from src.agents.main import DEFAULT_SESSION_ID, get_agent
 
 
-def my_agent(message, history):
-    for i in range(len(message)):
-        time.sleep(0.05)
-        # yield "You typed: " + message[: i + 1]
+async def my_agent(message, history, request: gr.Request):
+    # O agente é compartilhado pelo processo; cada sessão do Gradio tem a sua própria memória.
+    session_id = request.session_hash if request else DEFAULT_SESSION_ID
 
-        agent = MyAgent(
-            llm_provider=LLM_PROVIDER,
-            llm_temperature=LLM_TEMPERATURE,
-            llm_max_tokens=LLM_MAX_TOKENS,
-            embedding_provider=EMBEDDING_PROVIDER,
-        )
-        yield agent.invoke(message)
+    # Enquanto a resposta final não começa, exibe o status das tools em execução.
+    status = []
+    answer = ""
+    async for event in get_agent().astream(message, session_id=session_id):
+        if event["type"] == "status":
+            status.append(f"_{event['content']}_")
+        else:
+            answer += event["content"]
+        yield answer or "\n\n".join(status)
 
 
 with gr.Blocks() as chat_interface:
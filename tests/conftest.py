@@ -0,0 +1,5 @@
+import os
+
+# src.config copia as chaves dos provedores para o ambiente e exige que estejam definidas.
+for key in ["OPENAI_API_KEY", "GOOGLE_API_KEY", "GROQ_API_KEY", "HUGGINGFACEHUB_API_TOKEN"]:
+    os.environ.setdefault(key, "")
@@ -0,0 +1,45 @@
+import pytest
+
+from src.connetion.cypher_templates import CypherTemplateCache, normalize_text
+
+
+class FakeGraph:
+    def __init__(self, drugs):
+        self.drugs = drugs
+        self.queries = []
+
+    def query(self, query, params=None):
+        self.queries.append(query)
+        return [{"id": i} for i in self.drugs]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    graph = FakeGraph(["Dipirona", "Dipirona Sódica", "Paracetamol", "Ácido Acetilsalicílico"])
+    return CypherTemplateCache(graph=graph, cache_path=tmp_path / "templates.json")
+
+
+def test_default_templates_match_the_entity_label(cache):
+    for template in cache.templates.values():
+        assert template.startswith("MATCH (m:`__Entity__` {id: $drug})")
+
+
+def test_find_drugs(cache):
+    text = normalize_text("Posso tomar dipirona sódica com paracetamol ou ácido acetilsalicílico?")
+
+    assert sorted(cache.find_drugs(text)) == [
+        (11, "Paracetamol"),
+        (15, "Dipirona Sódica"),
+        (22, "Ácido Acetilsalicílico"),
+    ]
+    assert cache.find_drug(normalize_text("dipirona para febre")) == "Dipirona"
+    assert cache.find_drugs(normalize_text("paracetamolxyz")) == []
+    # Os medicamentos são consultados no grafo uma única vez.
+    assert len(cache.graph.queries) == 1
+
+
+def test_get_intent(cache):
+    intent = cache.get_intent("Quais as contraindicações da dipirona sódica?")
+
+    assert (intent.drug, intent.relationship) == ("Dipirona Sódica", "CONTRAINDICAÇÕES")
+    assert cache.get_intent("Qual a posologia do ibuprofeno?") is None
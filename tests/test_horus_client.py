@@ -0,0 +1,189 @@
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.api.schemas.request.horus import HorusMedicineStockRequest
+from src.connetion import horus_client
+from src.connetion.horus_client import HorusAPIError, HorusClient, ResponseCache
+
+ROUTE = "/daf/estoque-medicamentos-bnafar-horus"
+ITEMS = [{"codigo_catmat": f"BR{i:07d}", "quantidade_estoque": i} for i in range(23)]
+
+
+class StubHorusAPI(ThreadingHTTPServer):
+    """
+    Servidor local que imita a API de estoque: paginação por `limit`/`offset` (número da página)
+    e respostas de erro programadas em `failures` (status e cabeçalho Retry-After).
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHorusHandler)
+        self.requests = []
+        self.failures = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHorusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: value[0] for key, value in parse_qs(url.query).items()}
+        self.server.requests.append(params)
+
+        if self.server.failures:
+            status, retry_after = self.server.failures.pop(0)
+            self.send_response(status)
+            if retry_after is not None:
+                self.send_header("Retry-After", retry_after)
+            self.end_headers()
+            return
+
+        limit, offset = int(params["limit"]), int(params["offset"])
+        body = json.dumps({"parametros": ITEMS[offset * limit : (offset + 1) * limit]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api():
+    server = StubHorusAPI()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Esperas entre as tentativas registradas em vez de executadas.
+    calls = []
+    monkeypatch.setattr(horus_client.time, "sleep", calls.append)
+    return calls
+
+
+def get_client(stub_api, **kwargs) -> HorusClient:
+    return HorusClient(base_url=stub_api.url, route=ROUTE, page_size=5, max_retries=2, **kwargs)
+
+
+def test_get_stock_fetches_pages_until_limit(stub_api):
+    client = get_client(stub_api)
+
+    response = client.get_stock(HorusMedicineStockRequest(limit=12))
+
+    assert response["parametros"] == ITEMS[:12]
+    assert [i["offset"] for i in stub_api.requests] == ["0", "1", "2"]
+    assert all(i["limit"] == "5" for i in stub_api.requests)
+
+
+def test_get_stock_offset_is_page_of_limit_items(stub_api):
+    client = get_client(stub_api)
+
+    response = client.get_stock(HorusMedicineStockRequest(limit=7, offset=2))
+
+    assert response["parametros"] == ITEMS[14:21]
+    assert [i["offset"] for i in stub_api.requests] == ["2", "3", "4"]
+
+
+def test_get_stock_stops_at_last_page(stub_api):
+    client = get_client(stub_api)
+
+    response = client.get_stock(HorusMedicineStockRequest(limit=100))
+
+    assert response["parametros"] == ITEMS
+    assert len(stub_api.requests) == 5
+
+
+def test_aget_stock_matches_get_stock(stub_api):
+    client = get_client(stub_api)
+    request = HorusMedicineStockRequest(limit=12, offset=1)
+
+    response = asyncio.run(client.aget_stock(request))
+
+    assert response == get_client(stub_api).get_stock(request)
+    assert response["parametros"] == ITEMS[12:23]
+
+
+def test_get_stock_cache_hit_until_ttl(stub_api):
+    client = get_client(stub_api, cache=ResponseCache(ttl=0.3))
+    request = HorusMedicineStockRequest(limit=5, codigo_uf="52")
+
+    first = client.get_stock(request)
+    # Mesmos parâmetros, com espaços nas bordas: atendido pelo cache.
+    second = client.get_stock(HorusMedicineStockRequest(limit=5, codigo_uf=" 52 "))
+    assert second == first
+    assert len(stub_api.requests) == 1
+    assert client.cache.stats()["hits"] == 1
+
+    time.sleep(0.4)
+    client.get_stock(request)
+    assert len(stub_api.requests) == 2
+
+
+def test_get_stock_retries_429_with_retry_after(stub_api, sleeps):
+    stub_api.failures = [(429, "3")]
+    client = get_client(stub_api)
+
+    response = client.get_stock(HorusMedicineStockRequest(limit=5))
+
+    assert response["parametros"] == ITEMS[:5]
+    assert len(stub_api.requests) == 2
+    assert sleeps == [3.0]
+
+
+def test_get_stock_retries_5xx_with_backoff(stub_api, sleeps):
+    stub_api.failures = [(503, None), (502, None)]
+    client = get_client(stub_api)
+
+    response = client.get_stock(HorusMedicineStockRequest(limit=5))
+
+    assert response["parametros"] == ITEMS[:5]
+    assert sleeps == [0.5, 1.0]
+
+
+def test_get_stock_fails_after_max_retries(stub_api, sleeps):
+    stub_api.failures = [(500, None)] * 3
+    client = get_client(stub_api)
+
+    with pytest.raises(HorusAPIError, match="500"):
+        client.get_stock(HorusMedicineStockRequest(limit=5))
+    assert len(stub_api.requests) == 3
+
+
+def test_get_stock_does_not_retry_client_errors(stub_api, sleeps):
+    stub_api.failures = [(400, None)]
+    client = get_client(stub_api)
+
+    with pytest.raises(HorusAPIError, match="400"):
+        client.get_stock(HorusMedicineStockRequest(limit=5))
+    assert len(stub_api.requests) == 1
+    assert sleeps == []
+
+
+def test_aget_stock_retries_429_with_retry_after(stub_api, monkeypatch):
+    calls = []
+
+    async def sleep(seconds):
+        calls.append(seconds)
+
+    monkeypatch.setattr(horus_client.asyncio, "sleep", sleep)
+    stub_api.failures = [(429, "2")]
+    client = get_client(stub_api)
+
+    response = asyncio.run(client.aget_stock(HorusMedicineStockRequest(limit=5)))
+
+    assert response["parametros"] == ITEMS[:5]
+    assert calls == [2.0]
@@ -0,0 +1,103 @@
+import pytest
+
+from src.agents.request_extractor import HorusRequestExtractor
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    return HorusRequestExtractor()
+
+
+def test_extracts_uf_catmat_and_date(extractor):
+    request = extractor.extract("Qual o estoque de paracetamol em Goiás em 21/02/2024?")
+
+    assert request.codigo_uf == "52"
+    assert request.codigo_catmat == "BR0267778"
+    assert request.data_posicao_estoque == "2024-02-21"
+
+
+@pytest.mark.parametrize(
+    "question, codigo_uf",
+    [
+        ("Qual o estoque de paracetamol em Minas Gerais?", "31"),
+        ("Qual o estoque de paracetamol em MG?", "31"),
+        ("Qual o estoque de nimesulida no Rio Grande do Sul?", "43"),
+    ],
+)
+def test_extracts_every_uf(extractor, question, codigo_uf):
+    assert extractor.extract(question).codigo_uf == codigo_uf
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Qual o estoque de paracetamol hoje em Goiás?",
+        "Qual era o estoque de paracetamol ontem?",
+        "Qual o estoque de ibuprofeno na semana passada em SP?",
+        "Qual o estoque de ibuprofeno em março de 2024?",
+    ],
+)
+def test_defers_relative_and_partial_dates(extractor, question):
+    assert extractor.extract(question) is None
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Qual o estoque de paracetamol em Uberlândia?",
+        "Qual o estoque de paracetamol no Triângulo Mineiro?",
+        "Qual o estoque de paracetamol na cidade de Goiânia?",
+    ],
+)
+def test_defers_unknown_places(extractor, question):
+    assert extractor.extract(question) is None
+
+
+def test_defers_ambiguous_questions(extractor):
+    assert extractor.extract("Compare o estoque de paracetamol em Goiás e na Bahia.") is None
+    assert extractor.extract("Qual o horário de funcionamento?") is None
+
+
+@pytest.fixture(scope="module")
+def municipality_extractor():
+    return HorusRequestExtractor(
+        municipality_rows=[
+            {"codigo_municipio": "5201108", "municipio": "Anápolis", "codigo_uf": "52"},
+            {"codigo_municipio": "5208905", "municipio": "Goiás", "codigo_uf": "52"},
+            {"codigo_municipio": "3550308", "municipio": "São Paulo", "codigo_uf": "35"},
+            {"codigo_municipio": "2201101", "municipio": "Bom Jesus", "codigo_uf": "22"},
+            {"codigo_municipio": "4302501", "municipio": "Bom Jesus", "codigo_uf": "43"},
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "question, codigo_municipio, codigo_uf",
+    [
+        ("Qual o estoque de paracetamol em Anápolis?", "5201108", "52"),
+        ("Qual o estoque de paracetamol na cidade de Anápolis, GO?", "5201108", "52"),
+        ("Qual o estoque de paracetamol na cidade de São Paulo?", "3550308", "35"),
+        ("Qual o estoque de paracetamol em São Paulo?", None, "35"),
+        ("Qual o estoque de paracetamol em Goiás?", None, "52"),
+        ("Qual o estoque de paracetamol em Bom Jesus, RS?", "4302501", "43"),
+    ],
+)
+def test_extracts_municipality(municipality_extractor, question, codigo_municipio, codigo_uf):
+    request = municipality_extractor.extract(question)
+
+    assert request.codigo_municipio == codigo_municipio
+    assert request.codigo_uf == codigo_uf
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        # Homônimos em UFs diferentes.
+        "Qual o estoque de paracetamol em Bom Jesus?",
+        # Município de outra UF.
+        "Qual o estoque de paracetamol em Anápolis, SP?",
+        "Qual o estoque de paracetamol na cidade de Uberlândia?",
+    ],
+)
+def test_defers_ambiguous_municipalities(municipality_extractor, question):
+    assert municipality_extractor.extract(question) is None
@@ -0,0 +1,49 @@
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+import pytest
+
+from src.agents.semantic_cache import SemanticAnswerCache
+
+DRUGS = ["paracetamol", "nimesulida"]
+
+
+class TemplateEmbeddings(Embeddings):
+    """Embeddings que ignoram o medicamento: perguntas com o mesmo modelo são idênticas."""
+
+    def embed_query(self, text: str) -> List[float]:
+        words = [i for i in text.lower().strip("?").split() if i not in DRUGS]
+        return [float(sum(map(ord, " ".join(words)))), 1.0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(i) for i in texts]
+
+
+@pytest.fixture
+def cache():
+    return SemanticAnswerCache(
+        embeddings=TemplateEmbeddings(),
+        get_entities=lambda question: {i for i in DRUGS if i in question.lower()},
+    )
+
+
+def test_returns_cached_answer_and_context(cache):
+    cache.store("Qual a posologia do paracetamol?", "500 mg", "contexto do paracetamol", 2.0)
+
+    entry = cache.lookup("qual a posologia do paracetamol")
+    assert (entry.answer, entry.context) == ("500 mg", "contexto do paracetamol")
+    assert cache.stats()["hits"] == 1
+
+
+def test_does_not_share_answers_between_entities(cache):
+    cache.store("Qual a posologia do paracetamol?", "500 mg", "contexto", 2.0)
+
+    assert cache.lookup("Qual a posologia do nimesulida?") is None
+
+
+def test_bypasses_questions_without_entities(cache):
+    cache.store("Qual a posologia do dorflex?", "1 comprimido", "contexto", 2.0)
+
+    assert len(cache.entries) == 0
+    assert cache.lookup("Qual a posologia do buscopan?") is None
+    assert cache.stats()["bypassed"] == 1